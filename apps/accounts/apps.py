@@ -13,4 +13,5 @@ class AccountsConfig(AppConfig):
     def ready(self):
         """Import signals when app is ready."""
         import apps.accounts.credit_signals  # noqa
+        import apps.accounts.matching_signals  # noqa
 
@@ -0,0 +1,401 @@
+"""
+Management command to benchmark matching.
+
+--mode candidates (default) times match candidate generation with the skill
+index against the previous scan of every active listing. Scanning every
+listing issues M2M queries per listing, so the legacy scan is timed over
+--legacy-sample listings and scaled to the full table (marked "est.").
+
+--mode all-pairs checks the sparse-matrix all-pairs skill swap scores
+(matching_matrix) against _calculate_skill_swap_score for every pair of
+--users sampled users and compares their top-k lists, failing on any
+mismatch, then times scoring all pairs against an estimate for calling the
+Python score per pair.
+
+--mode lsh reports the recall@10 and latency of approximate freelance
+collaborator retrieval (matching_lsh) for several numbers of probed bands,
+next to the exact skill index. Recall is measured against exactly scoring
+every listing sharing a skill, with no candidate cap; a retrieved match
+counts if its score reaches the true 10th best score, so ties do not count
+as misses.
+
+Synthetic users with skill swap and freelance listings are inserted inside a
+transaction that is rolled back at the end, so the command can be run against
+a development database safely.
+"""
+
+import random
+import statistics
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from apps.accounts.matching_index import load_listing_skills, sync_listing_skills
+from apps.accounts.matching_lsh import BANDS, sync_freelance_lsh
+from apps.accounts.matching_matrix import SkillSwapFeatures, score_block, top_k_pairs
+from apps.accounts.matching_reputation import load_reputation, sync_user_reputation
+from apps.accounts.matching_service import MatchingService
+from apps.accounts.models import CustomUser
+from apps.accounts.modes_models import FreelanceListing, Skill, SkillSwapListing
+
+
+FREE_TEXT_SKILLS = [
+    'cooking', 'guitar', 'yoga', 'chess', 'gardening', 'tutoring', 'photography',
+    'knitting', 'baking', 'spanish', 'french', 'piano', 'running', 'pottery',
+]
+ANALYZE_TABLES = [
+    'accounts_customuser', 'accounts_skillswaplisting', 'accounts_freelancelisting',
+    'accounts_skillswaplisting_skills_offered', 'accounts_skillswaplisting_skills_wanted',
+    'accounts_freelancelisting_skills', 'accounts_listingskill', 'accounts_userreputation',
+]
+CITIES = [('Austin', 'TX', '78701'), ('Denver', 'CO', '80202'), ('Portland', 'OR', '97201'),
+          ('Boston', 'MA', '02108'), ('Chicago', 'IL', '60601')]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark skill-index match candidates against scanning every listing'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--mode',
+            choices=['candidates', 'all-pairs', 'lsh'],
+            default='candidates',
+            help='What to benchmark (default: candidates)',
+        )
+        parser.add_argument(
+            '--listings',
+            type=int,
+            default=100000,
+            help='Synthetic users with skill swap and freelance listings (default: 100000)',
+        )
+        parser.add_argument(
+            '--skills',
+            type=int,
+            default=300,
+            help='Synthetic Skill rows to draw listing skills from (default: 300)',
+        )
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=3,
+            help='Users to find matches for, or to check all-pairs parity for (default: 3)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Timed runs per user (default: 3)',
+        )
+        parser.add_argument(
+            '--legacy-sample',
+            type=int,
+            default=500,
+            help='Listings the legacy scan is timed over before scaling (default: 500)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows per bulk insert (default: 5000)',
+        )
+        parser.add_argument(
+            '--block-size',
+            type=int,
+            default=256,
+            help='Users per block of the all-pairs scoring (default: 256)',
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=MatchingService.MATCHES_PER_USER,
+            help=f'Matches per user compared in all-pairs mode (default: {MatchingService.MATCHES_PER_USER})',
+        )
+    
+    def handle(self, *args, **options):
+        count = options['listings']
+        rng = random.Random(11)
+        
+        with transaction.atomic():
+            skills = Skill.objects.bulk_create([
+                Skill(name=f'Benchmark Skill {i}', slug=f'benchmark-skill-{i}')
+                for i in range(options['skills'])
+            ])
+            self.stdout.write(f'Inserting {count} synthetic users with listings...')
+            user_ids = self._insert_listings(count, skills, options['batch_size'], rng)
+            self._analyze()
+            
+            sample = rng.sample(user_ids, options['users'])
+            if options['mode'] == 'all-pairs':
+                self._benchmark_all_pairs(count, sample, options)
+            elif options['mode'] == 'lsh':
+                self._benchmark_lsh(count, sample, options)
+            else:
+                self._benchmark_candidates(count, sample, options)
+            
+            # Never keep the synthetic rows
+            transaction.set_rollback(True)
+        
+        self.stdout.write(self.style.SUCCESS('\nDone. Synthetic rows were rolled back.'))
+    
+    def _benchmark_candidates(self, count, sample_ids, options):
+        """Time skill-index candidate generation against the legacy scan."""
+        repeat = options['repeat']
+        sample = min(options['legacy_sample'], count)
+        users = CustomUser.objects.filter(id__in=sample_ids)
+        
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n{count} listings'))
+        self.stdout.write(
+            f'  {"user / match type":<28}{"candidates":>12}{"matches":>10}'
+            f'{"index ms":>12}{"scan ms":>14}{"speedup":>10}'
+        )
+        for user in users:
+            for label, score, legacy in (
+                ('skill swap', 'score_skill_swap_candidates', self._legacy_skill_swap),
+                ('freelance', 'score_freelance_collab_candidates', self._legacy_freelance),
+            ):
+                service = MatchingService(user)
+                matches = len(getattr(service, score)())
+                candidates = self._count_candidates(service, score)
+                index_ms = self._time(lambda: getattr(MatchingService(user), score)(), repeat)
+                
+                started = time.perf_counter()
+                legacy(MatchingService(user), sample)
+                scan_ms = (time.perf_counter() - started) * 1000 * count / sample
+                speedup = scan_ms / index_ms if index_ms else 0
+                estimate = ' est.' if sample < count else ''
+                self.stdout.write(
+                    f'  {f"{user.id} / {label}":<28}{candidates:>12}{matches:>10}'
+                    f'{index_ms:>12.2f}{scan_ms:>9.0f}{estimate:<5}{speedup:>9.0f}x'
+                )
+    
+    def _insert_listings(self, count, skills, batch_size, rng):
+        """Bulk insert users with both listings and their index rows; returns the user ids."""
+        password = make_password(None)
+        # Skewed popularity, as real skill demand is
+        weights = [1 / (rank + 1) for rank in range(len(skills))]
+        offered_through = SkillSwapListing.skills_offered.through
+        wanted_through = SkillSwapListing.skills_wanted.through
+        freelance_through = FreelanceListing.skills.through
+        
+        user_ids = []
+        for batch_start in range(0, count, batch_size):
+            batch = range(batch_start, min(batch_start + batch_size, count))
+            users = []
+            for i in batch:
+                city, state, zip_code = rng.choice(CITIES)
+                users.append(CustomUser(
+                    username=f'benchmark-match-{i}', email=f'match{i}@example.com', password=password,
+                    city=city, state=state, zip_code=zip_code,
+                    is_skill_swap_active=True, is_freelancer_active=True,
+                ))
+            users = CustomUser.objects.bulk_create(users)
+            
+            swaps = SkillSwapListing.objects.bulk_create([
+                SkillSwapListing(
+                    user=user, bio='Benchmark listing', accepts_remote=rng.random() < 0.6,
+                    is_verified=rng.random() < 0.2,
+                    additional_skills_offered=', '.join(rng.sample(FREE_TEXT_SKILLS, rng.randint(0, 2))),
+                    additional_skills_wanted=', '.join(rng.sample(FREE_TEXT_SKILLS, rng.randint(0, 2))),
+                )
+                for user in users
+            ])
+            freelances = FreelanceListing.objects.bulk_create([
+                FreelanceListing(
+                    user=user, title='Benchmark freelancer', bio='Benchmark listing',
+                    availability_status=rng.choice(['available', 'busy', 'unavailable']),
+                    is_verified=rng.random() < 0.2,
+                )
+                for user in users
+            ])
+            
+            offered, wanted, freelance = [], [], []
+            for swap in swaps:
+                for skill in set(rng.choices(skills, weights, k=3)):
+                    offered.append(offered_through(skillswaplisting_id=swap.id, skill_id=skill.id))
+                for skill in set(rng.choices(skills, weights, k=3)):
+                    wanted.append(wanted_through(skillswaplisting_id=swap.id, skill_id=skill.id))
+            for listing in freelances:
+                for skill in set(rng.choices(skills, weights, k=4)):
+                    freelance.append(freelance_through(freelancelisting_id=listing.id, skill_id=skill.id))
+            offered_through.objects.bulk_create(offered)
+            wanted_through.objects.bulk_create(wanted)
+            freelance_through.objects.bulk_create(freelance)
+            
+            # Fresh statistics keep the index sync queries on good plans as
+            # the tables grow; bulk_create skips the signals that run it
+            self._analyze()
+            batch_ids = [user.id for user in users]
+            sync_listing_skills(batch_ids)
+            sync_freelance_lsh(batch_ids)
+            sync_user_reputation(batch_ids)
+            user_ids.extend(batch_ids)
+            self.stdout.write(f'  Inserted {len(user_ids)}/{count}...')
+        return user_ids
+    
+    def _analyze(self):
+        with connection.cursor() as cursor:
+            for table in ANALYZE_TABLES:
+                cursor.execute(f'ANALYZE {table}')
+    
+    def _count_candidates(self, service, score):
+        """Candidates the index yields for a user (before the score threshold)."""
+        return len(getattr(service, score)(min_score=0))
+    
+    def _legacy_skill_swap(self, service, limit):
+        """The pre-index skill swap scan: score every active listing, limited to `limit`."""
+        user_listing = service.user.skill_swap_listing
+        others = CustomUser.objects.filter(
+            is_skill_swap_active=True,
+            skill_swap_listing__is_active=True
+        ).exclude(id=service.user.id).select_related('skill_swap_listing')[:limit]
+        for other_user in others:
+            service._calculate_skill_swap_score(user_listing, other_user.skill_swap_listing)
+    
+    def _legacy_freelance(self, service, limit):
+        """The pre-index freelance scan: score every active listing, limited to `limit`."""
+        user_listing = service.user.freelance_listing
+        others = CustomUser.objects.filter(
+            is_freelancer_active=True,
+            freelance_listing__is_active=True
+        ).exclude(id=service.user.id).select_related('freelance_listing')[:limit]
+        for other_user in others:
+            service._calculate_freelance_score(user_listing, other_user.freelance_listing)
+    
+    def _benchmark_all_pairs(self, count, sample_ids, options):
+        """Check all-pairs matrix scores against the Python score, then time both."""
+        top = options['top']
+        users = {
+            user.id: user
+            for user in CustomUser.objects.filter(
+                is_skill_swap_active=True,
+                skill_swap_listing__is_active=True
+            ).select_related('skill_swap_listing', 'freelance_listing')
+        }
+        skills = load_listing_skills(list(users), 'skill_swap')
+        features = SkillSwapFeatures.load()
+        # Loaded up front as _get_candidates does, so the Python timing
+        # below covers scoring only
+        reputation = load_reputation(list(users))
+        
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\nParity ({len(sample_ids)} users x {len(features)} users)'))
+        mismatches = 0
+        pairs = 0
+        python_seconds = 0.0
+        for user_id in sample_ids:
+            position = features.index[user_id]
+            service = MatchingService(users[user_id])
+            service._reputation.update(reputation)
+            listing = users[user_id].skill_swap_listing
+            scored = score_block(features, position, position + 1)
+            matrix = {
+                features.user_ids[col]: {term: scored[term][i] for term in MatchingService.SCORE_TERMS}
+                for i, col in enumerate(scored['col'])
+            }
+            
+            # The Python score for every other user sharing a skill interest,
+            # in user id order as the per-user path scores them
+            started = time.perf_counter()
+            reference = {}
+            for other_id in features.user_ids.tolist():
+                if other_id == user_id:
+                    continue
+                other_skills = skills[other_id]
+                if not (skills[user_id]['offered'] & other_skills['wanted'] or
+                        skills[user_id]['wanted'] & other_skills['offered']):
+                    continue
+                reference[other_id] = service._calculate_skill_swap_score(
+                    listing, users[other_id].skill_swap_listing, skills[user_id], other_skills
+                )
+            python_seconds += time.perf_counter() - started
+            pairs += len(reference)
+            
+            if set(reference) != set(matrix):
+                mismatches += 1
+                self.stderr.write(f'  user {user_id}: scored pairs differ')
+                continue
+            for other_id, score_data in reference.items():
+                if any(matrix[other_id][term] != score_data[term] for term in MatchingService.SCORE_TERMS):
+                    mismatches += 1
+                    self.stderr.write(f'  user {user_id} / {other_id}: {matrix[other_id]} != {score_data}')
+            
+            kept = top_k_pairs(scored, top, min_score=30)
+            expected = sorted(
+                (other_id for other_id, score_data in reference.items() if score_data['compatibility_score'] >= 30),
+                key=lambda other_id: -reference[other_id]['compatibility_score']
+            )[:top]
+            if features.user_ids[kept['col']].tolist() != expected:
+                mismatches += 1
+                self.stderr.write(f'  user {user_id}: top {top} differs')
+        
+        if mismatches:
+            raise CommandError(f'{mismatches} all-pairs mismatches in {pairs} pairs compared.')
+        self.stdout.write(self.style.SUCCESS(f'  {pairs} pairs compared, 0 mismatches'))
+        
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\nAll pairs ({len(features)} users)'))
+        started = time.perf_counter()
+        scored_pairs = 0
+        for start in range(0, len(features), options['block_size']):
+            stop = min(start + options['block_size'], len(features))
+            scored = score_block(features, start, stop)
+            scored_pairs += len(scored['row'])
+            top_k_pairs(scored, top, min_score=30)
+        matrix_seconds = time.perf_counter() - started
+        python_estimate = python_seconds / pairs * scored_pairs if pairs else 0
+        self.stdout.write(f'  pairs sharing a skill interest: {scored_pairs}')
+        self.stdout.write(f'  matrix (score + top {top}):     {matrix_seconds:.2f} s')
+        self.stdout.write(f'  python per pair (est.):        {python_estimate:.2f} s')
+        if matrix_seconds:
+            self.stdout.write(f'  speedup:                       {python_estimate / matrix_seconds:.0f}x')
+    
+    def _benchmark_lsh(self, count, sample_ids, options):
+        """Recall@10 and latency of LSH freelance retrieval against the exact paths."""
+        repeat = options['repeat']
+        users = list(CustomUser.objects.filter(id__in=sample_ids))
+        
+        # Ground truth: every listing sharing a skill, scored exactly
+        truth = {}
+        for user in users:
+            service = MatchingService(user)
+            service.MAX_CANDIDATES = count
+            scored = service.score_freelance_collab_candidates(min_score=0, approximate=False)
+            truth[user.id] = sorted(
+                (score_data['compatibility_score'] for other, score_data in scored), reverse=True
+            )[:10]
+        
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n{count} freelance listings, {len(users)} users'))
+        self.stdout.write(f'  {"retrieval":<22}{"candidates":>12}{"recall@10":>12}{"median ms":>12}')
+        modes = [('exact skill index', {'approximate': False})] + [
+            (f'lsh, {bands} bands', {'approximate': True, 'probe_bands': bands})
+            for bands in (4, 8, 16, BANDS) if bands <= BANDS
+        ]
+        for label, kwargs in modes:
+            recalls, candidates, timings = [], [], []
+            for user in users:
+                scored = MatchingService(user).score_freelance_collab_candidates(min_score=0, **kwargs)
+                candidates.append(len(scored))
+                top = sorted((score_data['compatibility_score'] for other, score_data in scored), reverse=True)[:10]
+                expected = truth[user.id]
+                if expected:
+                    hits = sum(1 for score in top if score >= expected[-1])
+                    recalls.append(min(hits, len(expected)) / len(expected))
+                timings.append(self._time(
+                    lambda: MatchingService(user).score_freelance_collab_candidates(min_score=0, **kwargs),
+                    repeat
+                ))
+            recall = statistics.mean(recalls) if recalls else 0
+            self.stdout.write(
+                f'  {label:<22}{statistics.mean(candidates):>12.0f}{recall:>12.3f}'
+                f'{statistics.median(timings):>12.2f}'
+            )
+    
+    def _time(self, fn, repeat):
+        """Median wall time in milliseconds (after one warm-up run)."""
+        fn()
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - started) * 1000)
+        return statistics.median(samples)
@@ -0,0 +1,357 @@
+"""
+Management command to compute match suggestions offline.
+
+The suggestions page only reads stored matches; this command runs the
+matching pipeline and saves each user's top matches. By default it works
+through the users whose recompute is queued (the Refresh Matches button,
+first visits, listing changes), re-scoring only the pairs each user's
+changes affect (MatchingService.score_affected_pairs); --all recomputes
+every user with an active listing, e.g. from a nightly cron job, scoring all
+skill swap pairs at once with sparse matrix products. --loop keeps polling
+the queue, for running it as a worker.
+
+--all --workers N shards the users by id range across N processes. The
+skill swap matrices are loaded once before the pool forks and shared by the
+workers; each worker opens its own database connection, scores its shards
+and saves them with bulk upserts. Completed shards are recorded
+(MatchComputeShard), so --resume picks up an interrupted run after the last
+completed shard.
+"""
+
+import bisect
+import multiprocessing
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.accounts.matching_matrix import SkillSwapFeatures
+from apps.accounts.matching_models import Match, MatchComputeRun, MatchComputeShard, MatchRefresh
+from apps.accounts.matching_service import MatchingService
+from apps.accounts.models import CustomUser
+
+
+# Skill swap features loaded by the parent for sharded runs; forked workers
+# inherit them instead of each loading their own copy
+_shared = {}
+
+
+def compute_batch(user_ids, options, match_types, started_at, incremental, stderr):
+    """
+    Score a batch of users and save their matches in one set of bulk upserts.
+    
+    Incremental batches (the queue) re-score only the pairs affected by
+    each user's changes and drop stale suggestions; others store each
+    user's top matches of match_types. Users that fail stay queued.
+    
+    Returns:
+        (matches saved, suggestions dropped, users done, users failed)
+    """
+    users = CustomUser.objects.filter(id__in=user_ids).select_related(
+        'skill_swap_listing', 'freelance_listing'
+    )
+    scored, stale, done = [], [], []
+    failed = 0
+    for user in users:
+        service = MatchingService(user)
+        try:
+            if incremental:
+                pairs, dropped = service.score_affected_pairs(
+                    limit=options['limit'], min_score=options['min_score']
+                )
+                scored.extend(pairs)
+                stale.extend(dropped)
+            else:
+                scored.extend(service.score_matches(
+                    limit=options['limit'], min_score=options['min_score'], match_types=match_types
+                ))
+        except Exception as e:
+            # Leave the user queued so the next run retries them
+            failed += 1
+            stderr.write(f'✗ Failed to compute matches for user {user.id}: {e}')
+            continue
+        done.append(user.id)
+    
+    dropped_matches = 0
+    with transaction.atomic():
+        saved = len(MatchingService.save_matches(scored))
+        if stale:
+            # Only rows still unacted on, in case a user acted since
+            dropped_matches = Match.objects.filter(
+                id__in=stale, status__in=MatchingService.SUGGESTION_STATUSES
+            ).delete()[1].get(Match._meta.label, 0)
+        MatchingService.complete_refresh(done, started_at)
+    return saved, dropped_matches, len(done), failed
+
+
+def _compute_shard(task):
+    """
+    Worker: recompute every user of one shard and record it as completed.
+    
+    Runs in a pool process, on its own database connection.
+    
+    Returns:
+        (first user id, last user id, users done, users failed, matches
+        saved, seconds)
+    """
+    run_id, user_ids, options, started_at = task
+    shard_started = time.perf_counter()
+    first_user_id, last_user_id = user_ids[0], user_ids[-1]
+    
+    matches = 0
+    for _, pairs in MatchingService.iter_all_skill_swap_matches(
+        limit=options['limit'], min_score=options['min_score'], block_size=options['block_size'],
+        features=_shared['features'], excluded=_shared['excluded'],
+        first_user_id=first_user_id, last_user_id=last_user_id,
+    ):
+        with transaction.atomic():
+            matches += len(MatchingService.save_matches(pairs))
+    
+    done = failed = 0
+    batch_size = options['batch_size']
+    for batch_start in range(0, len(user_ids), batch_size):
+        saved, _, batch_done, batch_failed = compute_batch(
+            user_ids[batch_start:batch_start + batch_size], options, ['freelance_collab'],
+            started_at, incremental=False, stderr=_shared['stderr']
+        )
+        matches += saved
+        done += batch_done
+        failed += batch_failed
+    
+    seconds = time.perf_counter() - shard_started
+    MatchComputeShard.objects.create(
+        run_id=run_id, first_user_id=first_user_id, last_user_id=last_user_id,
+        users=done, matches=matches, seconds=seconds,
+    )
+    return first_user_id, last_user_id, done, failed, matches, seconds
+
+
+class Command(BaseCommand):
+    help = 'Compute and store match suggestions for queued (or all) users'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Recompute every user with an active skill swap or freelance listing',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Users loaded and completed per batch (default: 100)',
+        )
+        parser.add_argument(
+            '--block-size',
+            type=int,
+            default=256,
+            help='Users per block of the all-pairs skill swap scoring with --all (default: 256)',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=MatchingService.MATCHES_PER_USER,
+            help=f'Matches of each type stored per user (default: {MatchingService.MATCHES_PER_USER})',
+        )
+        parser.add_argument(
+            '--min-score',
+            type=int,
+            default=30,
+            help='Minimum compatibility score to store (default: 30)',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep processing the queue, sleeping --interval seconds when it is empty',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=30,
+            help='Seconds between queue polls with --loop (default: 30)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='With --all, processes to shard the users across (default: 1, no sharding)',
+        )
+        parser.add_argument(
+            '--shard-size',
+            type=int,
+            default=5000,
+            help='Users per shard with --workers (default: 5000)',
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='With --all, continue the last unfinished sharded run, skipping its completed shards',
+        )
+    
+    def handle(self, *args, **options):
+        if options['workers'] > 1 or options['resume']:
+            if not options['all'] or options['loop']:
+                raise CommandError('--workers and --resume only apply to --all.')
+            self._run_sharded(options)
+            return
+        
+        if options['loop']:
+            self.stdout.write('Processing the match queue (Ctrl+C to stop)...')
+            try:
+                while True:
+                    if not self._run(options, all_users=False):
+                        time.sleep(options['interval'])
+            except KeyboardInterrupt:
+                self.stdout.write('\nStopped.')
+            return
+        
+        self._run(options, all_users=options['all'])
+    
+    def _all_user_ids(self):
+        """Ids of every user with an active skill swap or freelance listing, ascending."""
+        return list(
+            CustomUser.objects.filter(
+                Q(is_skill_swap_active=True, skill_swap_listing__is_active=True) |
+                Q(is_freelancer_active=True, freelance_listing__is_active=True)
+            ).order_by('id').values_list('id', flat=True).distinct()
+        )
+    
+    def _run(self, options, all_users):
+        """Compute matches for one pass over the queue (or all users); returns users completed."""
+        started_at = timezone.now()
+        if all_users:
+            user_ids = self._all_user_ids()
+        else:
+            user_ids = list(
+                MatchRefresh.objects.filter(
+                    requested_at__lte=started_at
+                ).order_by('requested_at').values_list('user_id', flat=True)
+            )
+        if not user_ids:
+            if not options['loop']:
+                self.stdout.write('No users to compute matches for.')
+            return 0
+        
+        self.stdout.write(f'Computing matches for {len(user_ids)} users...')
+        batch_size = options['batch_size']
+        total_matches = 0
+        dropped_matches = 0
+        failed = 0
+        match_types = MatchingService.MATCH_TYPES
+        if all_users:
+            # Everyone's skill swaps are scored at once; the per-user pass
+            # below then only computes freelance matches
+            total_matches += self._skill_swap_pass(options)
+            match_types = ['freelance_collab']
+        
+        for batch_start in range(0, len(user_ids), batch_size):
+            batch_started = time.perf_counter()
+            batch = user_ids[batch_start:batch_start + batch_size]
+            saved, dropped, done, batch_failed = compute_batch(
+                batch, options, match_types, started_at, incremental=not all_users, stderr=self.stderr
+            )
+            total_matches += saved
+            dropped_matches += dropped
+            failed += batch_failed
+            
+            elapsed = time.perf_counter() - batch_started
+            self.stdout.write(
+                f'  {batch_start + len(batch)}/{len(user_ids)} users '
+                f'({done / elapsed if elapsed else 0:.1f} users/s)'
+            )
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✓ Stored {total_matches} matches for {len(user_ids) - failed} users'
+            )
+        )
+        if dropped_matches:
+            self.stdout.write(f'Dropped {dropped_matches} stale suggestions')
+        if failed:
+            self.stdout.write(self.style.WARNING(f'{failed} users failed and stay queued'))
+        return len(user_ids) - failed
+    
+    def _skill_swap_pass(self, options):
+        """Score and save every user's skill swap matches with the all-pairs matrix; returns matches saved."""
+        self.stdout.write('Scoring all skill swap pairs...')
+        started = time.perf_counter()
+        total_matches = 0
+        users = 0
+        for user_ids, pairs in MatchingService.iter_all_skill_swap_matches(
+            limit=options['limit'], min_score=options['min_score'], block_size=options['block_size']
+        ):
+            with transaction.atomic():
+                total_matches += len(MatchingService.save_matches(pairs))
+            users += len(user_ids)
+        
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'  {total_matches} skill swap matches for {users} users '
+            f'({users / elapsed if elapsed else 0:.1f} users/s)'
+        )
+        return total_matches
+    
+    def _run_sharded(self, options):
+        """Recompute every user across a pool of worker processes, one id-range shard at a time."""
+        workers = max(options['workers'], 1)
+        started = time.perf_counter()
+        
+        if options['resume']:
+            run = MatchComputeRun.objects.filter(finished_at__isnull=True).first()
+            if run is None:
+                raise CommandError('There is no unfinished run to resume.')
+            self.stdout.write(f'Resuming run {run.pk} started {run.started_at:%Y-%m-%d %H:%M}...')
+        else:
+            run = MatchComputeRun.objects.create(workers=workers, shard_size=options['shard_size'])
+        
+        # Users of shards completed before a crash are skipped; the rest
+        # (including users added since) are re-sharded
+        completed = list(run.shards.order_by('first_user_id').values_list('first_user_id', 'last_user_id'))
+        firsts = [first for first, last in completed]
+        
+        def is_completed(user_id):
+            i = bisect.bisect_right(firsts, user_id) - 1
+            return i >= 0 and user_id <= completed[i][1]
+        
+        user_ids = [user_id for user_id in self._all_user_ids() if not is_completed(user_id)]
+        shards = [user_ids[i:i + run.shard_size] for i in range(0, len(user_ids), run.shard_size)]
+        self.stdout.write(
+            f'Computing matches for {len(user_ids)} users in {len(shards)} shards '
+            f'on {workers} workers ({len(completed)} shards already done)...'
+        )
+        
+        total_users = total_matches = failed = 0
+        if shards:
+            _shared['features'] = SkillSwapFeatures.load()
+            _shared['excluded'] = _shared['features'].excluded_pairs()
+            _shared['stderr'] = self.stderr
+            tasks = [(run.pk, shard, options, run.started_at) for shard in shards]
+            # Forked workers must open their own connections, not share the parent's
+            connections.close_all()
+            try:
+                with multiprocessing.get_context('fork').Pool(workers) as pool:
+                    for first, last, done, shard_failed, matches, seconds in pool.imap_unordered(_compute_shard, tasks):
+                        total_users += done
+                        total_matches += matches
+                        failed += shard_failed
+                        self.stdout.write(
+                            f'  shard {first}-{last}: {done} users, {matches} matches in {seconds:.1f} s '
+                            f'({done / seconds if seconds else 0:.1f} users/s)'
+                        )
+            finally:
+                _shared.clear()
+        
+        run.finished_at = timezone.now()
+        run.save(update_fields=['finished_at'])
+        
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✓ Stored {total_matches} matches for {total_users} users in {elapsed:.1f} s '
+                f'({total_users / elapsed if elapsed else 0:.1f} users/s)'
+            )
+        )
+        if failed:
+            self.stdout.write(self.style.WARNING(f'{failed} users failed'))
@@ -1,16 +1,30 @@
 """
 Management command to send weekly match notification emails.
+
+New-match counts for every active user come from one grouped query over
+Match (both the user_a and user_b sides), streamed in user id order, and the
+emails go out over a single reused connection in batches, with a progress
+and throughput line per batch. --dry-run builds and delivers every email
+through the console email backend (or, with --email-dir, the file backend)
+instead of the configured one.
 """
 
-from django.core.management.base import BaseCommand
-from django.core.mail import send_mail
+import time
+from datetime import timedelta
+
 from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F
 from django.urls import reverse
 from django.utils import timezone
-from datetime import timedelta
 
+from apps.accounts.matching_models import Match
 from apps.accounts.models import CustomUser
-from apps.accounts.matching_service import MatchingService
+
+
+# Fields of the user each count row carries, per side of the match
+USER_FIELDS = ['email', 'username', 'first_name', 'last_name']
 
 
 class Command(BaseCommand):
@@ -20,7 +34,11 @@ class Command(BaseCommand):
         parser.add_argument(
             '--dry-run',
             action='store_true',
-            help='Show what would be sent without actually sending emails',
+            help='Deliver the emails through the console (or --email-dir file) backend instead of sending them',
+        )
+        parser.add_argument(
+            '--email-dir',
+            help='With --dry-run, write the emails to files in this directory instead of the console',
         )
         parser.add_argument(
             '--days',
@@ -28,41 +46,141 @@ class Command(BaseCommand):
             default=7,
             help='Number of days to look back for new matches (default: 7)',
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Emails sent between progress reports (default: 1000)',
+        )
     
     def handle(self, *args, **options):
         dry_run = options['dry_run']
         days = options['days']
+        batch_size = options['batch_size']
         
         self.stdout.write(f'Finding users with new matches in the last {days} days...')
         
-        # Get all active users
-        users = CustomUser.objects.filter(is_active=True)
+        # Resolved once for every email
+        try:
+            from django.contrib.sites.models import Site
+            current_site = Site.objects.get_current()
+            site_url = f"http://{current_site.domain}"
+        except Exception:
+            site_url = getattr(settings, 'SITE_URL', 'http://localhost:8000')
+        matches_url = site_url + reverse('accounts:match_suggestions')
+        from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@findapro.com')
+        
+        if dry_run and options['email_dir']:
+            connection = get_connection(
+                'django.core.mail.backends.filebased.EmailBackend', file_path=options['email_dir']
+            )
+        elif dry_run:
+            connection = get_connection('django.core.mail.backends.console.EmailBackend', stream=self.stdout)
+        else:
+            connection = get_connection()
         
         emails_sent = 0
+        failed = 0
         total_matches = 0
+        batch = []
+        reconnect = False
+        started = time.perf_counter()
         
-        for user in users:
-            matching_service = MatchingService(user)
-            new_matches_count = matching_service.get_new_matches_count(days=days)
-            
-            if new_matches_count > 0:
-                total_matches += new_matches_count
-                
-                # Build email content
-                # Use request.build_absolute_uri if available, otherwise construct URL
+        def send_batch():
+            nonlocal emails_sent, failed, reconnect
+            for message in batch:
                 try:
-                    from django.contrib.sites.models import Site
-                    current_site = Site.objects.get_current()
-                    site_url = f"http://{current_site.domain}"
-                except:
-                    site_url = getattr(settings, 'SITE_URL', 'http://localhost:8000')
-                
-                matches_url = site_url + reverse('accounts:match_suggestions')
-                
-                subject = f'You have {new_matches_count} new potential match{"es" if new_matches_count > 1 else ""} on FindAPro!'
-                
-                message = f'''
-Hello {user.full_name},
+                    if reconnect:
+                        # The last send failed and may have dropped the connection; a
+                        # reconnect that fails too counts this message as failed
+                        connection.close()
+                        connection.open()
+                        reconnect = False
+                    connection.send_messages([message])
+                    emails_sent += 1
+                except Exception as e:
+                    failed += 1
+                    reconnect = True
+                    self.stderr.write(f'✗ Failed to send to {message.to[0]}: {e}')
+            batch.clear()
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'  {emails_sent + failed} emails processed '
+                f'({emails_sent / elapsed if elapsed else 0:.1f} emails/s)'
+            )
+        
+        connection.open()
+        try:
+            for user, new_matches_count in self._new_match_counts(days):
+                total_matches += new_matches_count
+                batch.append(self._build_message(user, new_matches_count, matches_url, from_email, connection))
+                if len(batch) >= batch_size:
+                    send_batch()
+            if batch:
+                send_batch()
+        finally:
+            connection.close()
+        
+        if failed:
+            self.stdout.write(self.style.ERROR(f'{failed} emails failed'))
+        if dry_run:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'\n[DRY RUN] Would send {emails_sent} emails about {total_matches} total matches'
+                )
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'\n✓ Sent {emails_sent} emails about {total_matches} total matches'
+                )
+            )
+    
+    def _new_match_counts(self, days):
+        """
+        New matches (pending or viewed, created in the last `days` days) per active user.
+        
+        One query: each side of Match is grouped by user and the two are
+        combined with UNION ALL, ordered by user so both rows of a user
+        arrive together and can be streamed.
+        
+        Yields:
+            (dict of the user's id and USER_FIELDS, new match count) for
+            every active user with an email and at least one new match
+        """
+        cutoff_date = timezone.now() - timedelta(days=days)
+        new_matches = Match.objects.filter(
+            created_at__gte=cutoff_date,
+            status__in=['pending', 'viewed']
+        ).order_by()
+        sides = [
+            new_matches.filter(**{f'{side}__is_active': True}).exclude(**{f'{side}__email': ''}).values(
+                user_id=F(f'{side}_id'),
+                **{field: F(f'{side}__{field}') for field in USER_FIELDS}
+            ).annotate(num=Count('id'))
+            for side in ('user_a', 'user_b')
+        ]
+        rows = sides[0].union(sides[1], all=True).order_by('user_id')
+        
+        user, count = None, 0
+        for row in rows.iterator(chunk_size=5000):
+            if user is not None and row['user_id'] != user['user_id']:
+                yield user, count
+                user, count = None, 0
+            if user is None:
+                user = row
+            count += row['num']
+        if user is not None:
+            yield user, count
+    
+    def _build_message(self, user, new_matches_count, matches_url, from_email, connection):
+        """The notification email for one user (a _new_match_counts row)."""
+        full_name = CustomUser(**{field: user[field] for field in USER_FIELDS}).full_name
+        
+        subject = f'You have {new_matches_count} new potential match{"es" if new_matches_count > 1 else ""} on FindAPro!'
+        
+        message = f'''
+Hello {full_name},
 
 Great news! We found {new_matches_count} new potential match{"es" if new_matches_count > 1 else ""} for you based on your skills and preferences.
 
@@ -78,46 +196,12 @@ Don't miss out on great collaboration opportunities!
 
 Best regards,
 FindAPro Team
-                '''.strip()
-                
-                if dry_run:
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f'[DRY RUN] Would send to {user.email}: {new_matches_count} matches'
-                        )
-                    )
-                else:
-                    try:
-                        from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@findapro.com')
-                        send_mail(
-                            subject=subject,
-                            message=message,
-                            from_email=from_email,
-                            recipient_list=[user.email],
-                            fail_silently=False,
-                        )
-                        emails_sent += 1
-                        self.stdout.write(
-                            self.style.SUCCESS(
-                                f'✓ Sent to {user.email}: {new_matches_count} matches'
-                            )
-                        )
-                    except Exception as e:
-                        self.stdout.write(
-                            self.style.ERROR(
-                                f'✗ Failed to send to {user.email}: {str(e)}'
-                            )
-                        )
+        '''.strip()
         
-        if dry_run:
-            self.stdout.write(
-                self.style.WARNING(
-                    f'\n[DRY RUN] Would send {emails_sent} emails about {total_matches} total matches'
-                )
-            )
-        else:
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f'\n✓ Sent {emails_sent} emails about {total_matches} total matches'
-                )
-            )
+        return EmailMessage(
+            subject=subject,
+            body=message,
+            from_email=from_email,
+            to=[user['email']],
+            connection=connection,
+        )
@@ -0,0 +1,70 @@
+"""
+Management command to expire and archive old matches.
+
+Pending and viewed matches nobody touched for MATCH_EXPIRE_AFTER_DAYS are
+marked expired, then expired and not-interested matches untouched for
+MATCH_ARCHIVE_AFTER_DAYS are moved (with their history) to the archive
+tables, keeping Match and MatchHistory down to live rows. Both passes work
+in bounded batches (see apps/accounts/matching_archive.py), so the command
+can run from cron at any time, e.g. nightly.
+"""
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.accounts.matching_archive import archive_matches, expire_matches
+
+
+class Command(BaseCommand):
+    help = 'Expire stale match suggestions and archive old expired / not-interested matches'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--expire-days',
+            type=int,
+            default=settings.MATCH_EXPIRE_AFTER_DAYS,
+            help=f'Expire pending/viewed matches untouched for this many days (default: {settings.MATCH_EXPIRE_AFTER_DAYS})',
+        )
+        parser.add_argument(
+            '--archive-days',
+            type=int,
+            default=settings.MATCH_ARCHIVE_AFTER_DAYS,
+            help=f'Archive expired/not-interested matches untouched for this many days (default: {settings.MATCH_ARCHIVE_AFTER_DAYS})',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Matches updated or moved per batch (default: 1000)',
+        )
+    
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        now = timezone.now()
+        
+        self.stdout.write(f"Expiring suggestions untouched for {options['expire_days']} days...")
+        started = time.perf_counter()
+        expired = 0
+        for count in expire_matches(now - timedelta(days=options['expire_days']), batch_size):
+            expired += count
+            self._progress(f'{expired} matches expired', expired, started)
+        self.stdout.write(self.style.SUCCESS(f'✓ Expired {expired} matches'))
+        
+        self.stdout.write(f"Archiving matches untouched for {options['archive_days']} days...")
+        started = time.perf_counter()
+        archived = history = 0
+        for matches, records in archive_matches(now - timedelta(days=options['archive_days']), batch_size):
+            archived += matches
+            history += records
+            self._progress(f'{archived} matches ({history} history records) archived', archived, started)
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ Archived {archived} matches and {history} history records')
+        )
+    
+    def _progress(self, message, rows, started):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'  {message} ({rows / elapsed if elapsed else 0:.0f} matches/s)')
@@ -3,7 +3,10 @@ Admin interface for matching system.
 """
 
 from django.contrib import admin
-from .matching_models import Match, MatchHistory
+from .matching_models import (
+    Match, MatchHistory, ListingSkill, MatchRefresh, FreelanceLSHBucket, UserReputation,
+    MatchComputeRun, MatchComputeShard, MatchArchive, MatchHistoryArchive
+)
 
 
 @admin.register(Match)
@@ -86,3 +89,126 @@ class MatchHistoryAdmin(admin.ModelAdmin):
     ]
     readonly_fields = ['created_at']
     ordering = ['-created_at']
+
+
+@admin.register(ListingSkill)
+class ListingSkillAdmin(admin.ModelAdmin):
+    """Read-only admin for the match candidate skill index."""
+    
+    list_display = ['user', 'match_type', 'direction', 'token', 'skill']
+    list_filter = ['match_type', 'direction']
+    search_fields = ['token', 'user__username', 'user__email']
+    raw_id_fields = ['user', 'skill']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(FreelanceLSHBucket)
+class FreelanceLSHBucketAdmin(admin.ModelAdmin):
+    """Read-only admin for the freelance MinHash/LSH buckets."""
+    
+    list_display = ['user', 'band', 'bucket']
+    list_filter = ['band']
+    search_fields = ['user__username', 'user__email']
+    raw_id_fields = ['user']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(UserReputation)
+class UserReputationAdmin(admin.ModelAdmin):
+    """Read-only admin for the materialized match reputation."""
+    
+    list_display = ['user', 'score', 'updated_at']
+    search_fields = ['user__username', 'user__email']
+    raw_id_fields = ['user']
+    ordering = ['-score']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(MatchRefresh)
+class MatchRefreshAdmin(admin.ModelAdmin):
+    """Admin for the offline match computation queue."""
+    
+    list_display = ['user', 'requested_at', 'computed_at']
+    list_filter = ['computed_at']
+    search_fields = ['user__username', 'user__email']
+    raw_id_fields = ['user']
+    readonly_fields = ['computed_at']
+    
+    actions = ['queue_recompute']
+    
+    def queue_recompute(self, request, queryset):
+        """Queue a recompute of the selected users' matches."""
+        from .matching_service import MatchingService
+        user_ids = list(queryset.values_list('user_id', flat=True))
+        MatchingService.request_refresh(user_ids)
+        self.message_user(request, f'{len(user_ids)} user(s) queued for match recompute.')
+    queue_recompute.short_description = 'Queue match recompute'
+
+
+class MatchComputeShardInline(admin.TabularInline):
+    model = MatchComputeShard
+    fields = ['first_user_id', 'last_user_id', 'users', 'matches', 'seconds', 'completed_at']
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+
+@admin.register(MatchComputeRun)
+class MatchComputeRunAdmin(admin.ModelAdmin):
+    """Read-only admin for sharded match recomputes and their completed shards."""
+    
+    list_display = ['id', 'started_at', 'finished_at', 'workers', 'shard_size']
+    inlines = [MatchComputeShardInline]
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(MatchArchive)
+class MatchArchiveAdmin(admin.ModelAdmin):
+    """Read-only admin for matches moved out by sweep_matches."""
+    
+    list_display = ['match_id', 'user_a', 'user_b', 'match_type', 'status', 'compatibility_score', 'archived_at']
+    list_filter = ['match_type', 'status', 'archived_at']
+    search_fields = ['user_a__username', 'user_b__username']
+    raw_id_fields = ['user_a', 'user_b']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(MatchHistoryArchive)
+class MatchHistoryArchiveAdmin(admin.ModelAdmin):
+    """Read-only admin for the history of archived matches."""
+    
+    list_display = ['user', 'matched_user', 'match_id', 'action', 'created_at', 'archived_at']
+    list_filter = ['action', 'archived_at']
+    search_fields = ['user__username', 'matched_user__username']
+    raw_id_fields = ['user', 'matched_user']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,119 @@
+"""
+Expiry and archival of old matches.
+
+Suggestions nobody acts on would otherwise stay pending forever, and Match
+and MatchHistory would grow without bound, so every per-user read (the
+suggestions page, the new-match counts) scans ever larger index ranges. The
+sweep_matches command runs two passes, each in bounded batches walked in id
+order:
+
+- expire_matches: pending and viewed matches untouched for
+  MATCH_EXPIRE_AFTER_DAYS become 'expired' (hidden from suggestions; a
+  later compute that scores the pair again turns them back to pending).
+- archive_matches: expired and not-interested matches untouched for
+  MATCH_ARCHIVE_AFTER_DAYS move, with their MatchHistory records, to
+  MatchArchive and MatchHistoryArchive and are deleted from the hot tables.
+  Archived not-interested pairs stay excluded from matching.
+
+Each batch is its own transaction and only touches rows that still match
+the condition, so the sweep can run alongside compute_matches and user
+actions; rows locked by another transaction are skipped until the next run.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from .matching_models import Match, MatchHistory, MatchArchive, MatchHistoryArchive
+
+
+# Statuses expired by age
+EXPIRABLE_STATUSES = ['pending', 'viewed']
+
+# Statuses archived by age
+ARCHIVABLE_STATUSES = ['expired', 'not_interested']
+
+# Match fields copied to MatchArchive as they are
+ARCHIVED_FIELDS = [
+    'user_a_id', 'user_b_id', 'match_type', 'status', 'compatibility_score',
+    'skill_overlap_percentage', 'matching_skills', 'geographic_proximity_score',
+    'reputation_score', 'availability_score', 'user_a_interested',
+    'user_b_interested', 'user_a_not_interested', 'user_b_not_interested',
+    'connected_at', 'created_at', 'updated_at',
+]
+
+
+def expire_matches(before, batch_size=1000):
+    """
+    Expire pending and viewed matches last updated before a cutoff.
+    
+    Args:
+        before: datetime; matches updated earlier are expired
+        batch_size: matches updated per query
+    
+    Yields:
+        number of matches expired by each batch
+    """
+    stale = Match.objects.filter(status__in=EXPIRABLE_STATUSES, updated_at__lt=before)
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            ids = list(
+                stale.filter(id__gt=last_id)
+                .select_for_update(skip_locked=True)
+                .order_by('id')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                return
+            last_id = ids[-1]
+            expired = Match.objects.filter(id__in=ids).update(status='expired', updated_at=timezone.now())
+        yield expired
+
+
+def archive_matches(before, batch_size=1000):
+    """
+    Move expired and not-interested matches last updated before a cutoff to the archive.
+    
+    Each batch copies the matches and their history records to
+    MatchArchive / MatchHistoryArchive and deletes them in one transaction.
+    
+    Args:
+        before: datetime; matches updated earlier are archived
+        batch_size: matches moved per transaction
+    
+    Yields:
+        (matches archived, history records archived) for each batch
+    """
+    old = Match.objects.filter(status__in=ARCHIVABLE_STATUSES, updated_at__lt=before)
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            matches = list(
+                old.filter(id__gt=last_id)
+                .select_for_update(skip_locked=True)
+                .order_by('id')[:batch_size]
+            )
+            if not matches:
+                return
+            last_id = matches[-1].id
+            ids = [match.id for match in matches]
+            
+            MatchArchive.objects.bulk_create(
+                [
+                    MatchArchive(
+                        match_id=match.id,
+                        **{field: getattr(match, field) for field in ARCHIVED_FIELDS}
+                    )
+                    for match in matches
+                ],
+                ignore_conflicts=True,
+            )
+            history = MatchHistory.objects.filter(match_id__in=ids).values(
+                'user_id', 'matched_user_id', 'match_id', 'action', 'notes', 'created_at'
+            )
+            archived_history = MatchHistoryArchive.objects.bulk_create(
+                [MatchHistoryArchive(**record) for record in history]
+            )
+            MatchHistory.objects.filter(match_id__in=ids).delete()
+            Match.objects.filter(id__in=ids).delete()
+        yield len(matches), len(archived_history)
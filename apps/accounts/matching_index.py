@@ -0,0 +1,144 @@
+"""
+Skill -> listing inverted index used for match candidate generation.
+
+ListingSkill rows mirror the skills on users' skill swap listings (offered and
+wanted, Skill picks plus the free-text additional skills) and freelance
+listings, normalized the way MatchingService compares them. Candidates for a
+user are found by looking up the rows for their skills instead of scanning
+every listing, and the skills of all candidates load in one query.
+
+Rows are kept in sync by the matching signals and backfilled by migration
+0007; the sync helpers take the model classes so the migration can pass its
+historical models.
+"""
+
+from collections import defaultdict
+
+
+# Matches ListingSkill.token
+MAX_TOKEN_LENGTH = 255
+
+
+def normalize_skill(skill):
+    """Lowercased, stripped name of a Skill instance or free-text skill."""
+    name = skill.name if hasattr(skill, 'name') else str(skill)
+    return name.lower().strip()[:MAX_TOKEN_LENGTH]
+
+
+def split_skills(text):
+    """Free-text skills from a comma-separated field."""
+    return [skill.strip() for skill in (text or '').split(',') if skill.strip()]
+
+
+def listing_skill_keys(user_ids, swap_model, freelance_model):
+    """
+    The index rows the given users' listings call for.
+    
+    Returns:
+        dict of (user_id, match_type, direction, token) -> Skill id (None
+        for free-text skills)
+    """
+    keys = {}
+    
+    def add(user_id, match_type, direction, name, skill_id=None):
+        token = normalize_skill(name)
+        key = (user_id, match_type, direction, token)
+        # A picked Skill wins over the same name typed as free text
+        if token and (skill_id or key not in keys):
+            keys[key] = skill_id
+    
+    swaps = swap_model.objects.filter(user_id__in=user_ids)
+    for direction, relation in (('offered', 'skills_offered'), ('wanted', 'skills_wanted')):
+        rows = swaps.filter(**{f'{relation}__isnull': False}).values_list(
+            'user_id', f'{relation}__id', f'{relation}__name'
+        )
+        for user_id, skill_id, name in rows:
+            add(user_id, 'skill_swap', direction, name, skill_id)
+    
+    for user_id, offered, wanted in swaps.values_list(
+        'user_id', 'additional_skills_offered', 'additional_skills_wanted'
+    ):
+        for name in split_skills(offered):
+            add(user_id, 'skill_swap', 'offered', name)
+        for name in split_skills(wanted):
+            add(user_id, 'skill_swap', 'wanted', name)
+    
+    rows = freelance_model.objects.filter(
+        user_id__in=user_ids, skills__isnull=False
+    ).values_list('user_id', 'skills__id', 'skills__name')
+    for user_id, skill_id, name in rows:
+        add(user_id, 'freelance_collab', 'offered', name, skill_id)
+    
+    return keys
+
+
+def sync_index_rows(user_ids, listing_skill_model, swap_model, freelance_model):
+    """
+    Bring the index rows of some users in line with their listings.
+    
+    Only differences are written: stale rows are deleted, missing ones
+    created and rows whose Skill link changed updated.
+    
+    Returns:
+        number of rows created, updated or deleted
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return 0
+    wanted = listing_skill_keys(user_ids, swap_model, freelance_model)
+    
+    stale, to_update = [], []
+    for row in listing_skill_model.objects.filter(user_id__in=user_ids):
+        key = (row.user_id, row.match_type, row.direction, row.token)
+        if key not in wanted:
+            stale.append(row.id)
+            continue
+        skill_id = wanted.pop(key)
+        if row.skill_id != skill_id:
+            row.skill_id = skill_id
+            to_update.append(row)
+    
+    if stale:
+        listing_skill_model.objects.filter(id__in=stale).delete()
+    if to_update:
+        listing_skill_model.objects.bulk_update(to_update, ['skill'])
+    if wanted:
+        listing_skill_model.objects.bulk_create([
+            listing_skill_model(
+                user_id=user_id, match_type=match_type, direction=direction,
+                token=token, skill_id=skill_id,
+            )
+            for (user_id, match_type, direction, token), skill_id in wanted.items()
+        ])
+    return len(stale) + len(to_update) + len(wanted)
+
+
+def sync_listing_skills(user_ids):
+    """Re-derive the index rows of the given users from their listings."""
+    from .matching_models import ListingSkill
+    from .modes_models import FreelanceListing, SkillSwapListing
+    
+    return sync_index_rows(user_ids, ListingSkill, SkillSwapListing, FreelanceListing)
+
+
+def load_listing_skills(user_ids, match_type):
+    """
+    Indexed skills of many users in one query.
+    
+    Returns:
+        dict of user id -> {'offered': set, 'wanted': set} of tokens, plus
+        'skills' ({Skill id: name} of the picked skills offered); users
+        without rows get empty entries
+    """
+    from .matching_models import ListingSkill
+    
+    skills = defaultdict(lambda: {'offered': set(), 'wanted': set(), 'skills': {}})
+    rows = ListingSkill.objects.filter(
+        user_id__in=list(user_ids), match_type=match_type
+    ).values_list('user_id', 'direction', 'token', 'skill_id', 'skill__name')
+    for user_id, direction, token, skill_id, name in rows:
+        entry = skills[user_id]
+        entry[direction].add(token)
+        if skill_id is not None and direction == 'offered':
+            entry['skills'][skill_id] = name
+    return skills
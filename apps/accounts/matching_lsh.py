@@ -0,0 +1,134 @@
+"""
+MinHash / LSH index for approximate freelance collaborator retrieval.
+
+The freelance skill score is the Jaccard similarity of two listings' skill
+sets. Each listing stores a MinHash signature of its skills
+(FreelanceListing.skill_signature): NUM_PERMUTATIONS minimum hash values,
+any one of which agrees between two listings with probability equal to their
+Jaccard similarity. The signature is cut into BANDS bands of ROWS_PER_BAND
+values, and every band is hashed into a FreelanceLSHBucket row. Listings
+landing in the same bucket of any band are likely to be similar, so
+collaborators are found by looking up the user's buckets instead of every
+listing sharing a skill; MatchingService then re-scores the retrieved
+candidates exactly.
+
+Probing fewer bands trades recall for speed (see the
+MATCHING_FREELANCE_LSH_PROBE_BANDS setting and benchmark_matching --mode lsh).
+
+Rows are kept in sync by the matching signals and backfilled by migration
+0009; the sync helper takes the model classes so the migration can pass its
+historical models.
+"""
+
+import hashlib
+
+import numpy as np
+
+
+NUM_PERMUTATIONS = 64
+BANDS = 32
+ROWS_PER_BAND = 2
+
+# Candidates scored exactly per search, most colliding bands first
+MAX_CANDIDATES = 100
+
+# Universal hash functions h(x) = (a * x + b) mod p, one per permutation,
+# fixed so signatures stay comparable across processes
+_PRIME = (1 << 31) - 1
+_random = np.random.RandomState(1009)
+_A = _random.randint(1, _PRIME, size=NUM_PERMUTATIONS).astype(np.int64)
+_B = _random.randint(0, _PRIME, size=NUM_PERMUTATIONS).astype(np.int64)
+
+
+def minhash_signature(skill_ids):
+    """
+    MinHash signature of a set of Skill ids.
+    
+    Returns:
+        list of NUM_PERMUTATIONS ints; empty for an empty set
+    """
+    ids = np.fromiter(set(skill_ids), dtype=np.int64)
+    if not len(ids):
+        return []
+    hashes = (_A[:, None] * (ids[None, :] % _PRIME) + _B[:, None]) % _PRIME
+    return hashes.min(axis=1).tolist()
+
+
+def band_buckets(signature, bands=BANDS):
+    """
+    LSH bucket of each of the first `bands` bands of a signature.
+    
+    Returns:
+        list of (band, bucket) with 64-bit signed bucket hashes
+    """
+    if not signature:
+        return []
+    buckets = []
+    for band in range(min(bands, BANDS)):
+        values = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(
+            np.asarray(values, dtype='<i8').tobytes(), digest_size=8
+        ).digest()
+        buckets.append((band, int.from_bytes(digest, 'little', signed=True)))
+    return buckets
+
+
+def sync_lsh_rows(user_ids, bucket_model, freelance_model):
+    """
+    Bring the signatures and LSH buckets of some users' freelance listings up to date.
+    
+    Only differences are written: changed signatures are saved with
+    bulk_update (no signals), stale bucket rows deleted and missing ones
+    created.
+    
+    Returns:
+        number of listings and bucket rows written
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return 0
+    
+    skills = {user_id: set() for user_id in user_ids}
+    listings = {}
+    for listing in freelance_model.objects.filter(user_id__in=user_ids).only('id', 'user_id', 'skill_signature'):
+        listings[listing.user_id] = listing
+    rows = freelance_model.objects.filter(
+        user_id__in=user_ids, skills__isnull=False
+    ).values_list('user_id', 'skills__id')
+    for user_id, skill_id in rows:
+        skills[user_id].add(skill_id)
+    
+    changed = []
+    wanted = {}
+    for user_id, listing in listings.items():
+        signature = minhash_signature(skills[user_id])
+        if listing.skill_signature != signature:
+            listing.skill_signature = signature
+            changed.append(listing)
+        for band, bucket in band_buckets(signature):
+            wanted[(user_id, band)] = bucket
+    if changed:
+        freelance_model.objects.bulk_update(changed, ['skill_signature'])
+    
+    stale = []
+    for row in bucket_model.objects.filter(user_id__in=user_ids):
+        if wanted.get((row.user_id, row.band)) == row.bucket:
+            del wanted[(row.user_id, row.band)]
+        else:
+            stale.append(row.id)
+    if stale:
+        bucket_model.objects.filter(id__in=stale).delete()
+    if wanted:
+        bucket_model.objects.bulk_create([
+            bucket_model(user_id=user_id, band=band, bucket=bucket)
+            for (user_id, band), bucket in wanted.items()
+        ])
+    return len(changed) + len(stale) + len(wanted)
+
+
+def sync_freelance_lsh(user_ids):
+    """Re-derive the signatures and LSH buckets of the given users' freelance listings."""
+    from .matching_models import FreelanceLSHBucket
+    from .modes_models import FreelanceListing
+    
+    return sync_lsh_rows(user_ids, FreelanceLSHBucket, FreelanceListing)
@@ -0,0 +1,289 @@
+"""
+All-pairs skill swap scoring with sparse matrices.
+
+Used by global recomputes (compute_matches --all) instead of calling
+MatchingService._calculate_skill_swap_score for every pair. The offered and
+wanted skills of every active skill swap user are encoded as sparse
+user x skill matrices; for a block of users, the reciprocal skill overlap
+with everyone is
+
+    offered_A . wanted_B^T + wanted_A . offered_B^T - both_A . both_B^T
+
+(the last product removes skills counted twice, which the user both offers
+and wants, so the result is the size of the set union the Python score
+uses). Proximity, reputation (the stored UserReputation scores) and
+availability are per-user columns gathered for the pairs that overlap, and
+the top-k pairs of every user in the block are picked in one vectorized
+pass.
+
+Only pairs sharing a skill interest are scored, as the skill index does for
+a single user. The arithmetic mirrors _calculate_skill_swap_score term by
+term, in the same order, so scores are bit-for-bit identical (checked by
+apps/accounts/tests/test_matching_matrix.py, and on real data by the
+benchmark_matching command's --mode all-pairs).
+"""
+
+from itertools import chain
+
+import numpy as np
+from scipy import sparse
+
+from .matching_reputation import NEUTRAL_SCORE
+
+
+USER_FIELDS = [
+    'id', 'city', 'state', 'zip_code',
+    'skill_swap_listing__accepts_remote', 'skill_swap_listing__location_preference',
+    'reputation__score',
+]
+
+
+def _codes(values, empty=-1):
+    """
+    Integer code per value (equal values, equal codes).
+    
+    Empty values get the code `empty`; pass None to code them like any other
+    value.
+    """
+    codes = {}
+    return np.array(
+        [
+            codes.setdefault(value, len(codes)) if value or empty is None else empty
+            for value in values
+        ],
+        dtype=np.int64,
+    )
+
+
+class SkillSwapFeatures:
+    """Skill matrices and per-user columns of every active skill swap user."""
+    
+    def __init__(self, user_ids, rows, tokens, offered, wanted):
+        self.user_ids = np.asarray(user_ids, dtype=np.int64)
+        self.tokens = tokens
+        self.index = {user_id: i for i, user_id in enumerate(user_ids)}
+        self.offered = offered
+        self.wanted = wanted
+        self.both = offered.multiply(wanted).tocsr()
+        self.offered_t = offered.T.tocsr()
+        self.wanted_t = wanted.T.tocsr()
+        self.both_t = self.both.T.tocsr()
+        self.skill_count = (
+            np.asarray(offered.sum(axis=1)).ravel() + np.asarray(wanted.sum(axis=1)).ravel()
+        )
+        
+        (ids, city, state, zip_code, accepts_remote, location,
+         reputation) = zip(*rows) if rows else ([],) * len(USER_FIELDS)
+        
+        # Proximity: the location fields compare case-insensitively
+        self.has_city = np.array([bool(value) for value in city], dtype=bool)
+        self.city_state = _codes([
+            (value.lower(), (state_value or '').lower())
+            for value, state_value in zip(city, state)
+        ])
+        # Two empty states compare equal, as in the Python score
+        self.state = _codes([(value or '').lower() for value in state], empty=None)
+        self.zip3 = _codes([(value or '')[:3] for value in zip_code])
+        
+        # Availability
+        self.accepts_remote = np.array(accepts_remote, dtype=bool)
+        self.location = _codes([(value or '').lower() for value in location])
+        self.has_location = self.location >= 0
+        self.remote_location = np.array(
+            ['remote' in (value or '').lower() for value in location], dtype=bool
+        )
+        
+        # Reputation (see matching_reputation.load_reputation)
+        self.reputation = np.array(
+            [NEUTRAL_SCORE if value is None else value for value in reputation], dtype=np.float64
+        )
+    
+    def __len__(self):
+        return len(self.user_ids)
+    
+    @classmethod
+    def load(cls):
+        """Load every user with an active skill swap listing, ordered by id."""
+        from .matching_models import ListingSkill
+        from .models import CustomUser
+        
+        rows = list(
+            CustomUser.objects.filter(
+                is_skill_swap_active=True,
+                skill_swap_listing__is_active=True
+            ).order_by('id').values_list(*USER_FIELDS)
+        )
+        user_ids = [row[0] for row in rows]
+        index = {user_id: i for i, user_id in enumerate(user_ids)}
+        
+        vocabulary = {}
+        entries = {'offered': ([], []), 'wanted': ([], [])}
+        skill_rows = ListingSkill.objects.filter(
+            match_type='skill_swap',
+            user__is_skill_swap_active=True,
+            user__skill_swap_listing__is_active=True
+        ).values_list('user_id', 'direction', 'token')
+        for user_id, direction, token in skill_rows.iterator(chunk_size=10000):
+            user_rows, columns = entries[direction]
+            user_rows.append(index[user_id])
+            columns.append(vocabulary.setdefault(token, len(vocabulary)))
+        
+        shape = (len(user_ids), len(vocabulary))
+        matrices = {
+            direction: sparse.csr_matrix(
+                (np.ones(len(user_rows), dtype=np.int32), (user_rows, columns)), shape=shape
+            )
+            for direction, (user_rows, columns) in entries.items()
+        }
+        return cls(user_ids, rows, list(vocabulary), matrices['offered'], matrices['wanted'])
+    
+    def skills(self, position):
+        """A user's {'offered': set, 'wanted': set} of tokens."""
+        return {
+            direction: {
+                self.tokens[column]
+                for column in matrix.indices[matrix.indptr[position]:matrix.indptr[position + 1]]
+            }
+            for direction, matrix in (('offered', self.offered), ('wanted', self.wanted))
+        }
+    
+    def excluded_pairs(self):
+        """Sorted pair keys (row * n + column) of users who must not be matched."""
+        from .matching_models import Match, MatchArchive
+        
+        n = len(self)
+        keys = []
+        closed = Match.objects.filter(
+            match_type='skill_swap',
+            status__in=['not_interested', 'connected']
+        ).values_list('user_a_id', 'user_b_id')
+        archived = MatchArchive.objects.filter(
+            match_type='skill_swap',
+            status='not_interested'
+        ).values_list('user_a_id', 'user_b_id')
+        for user_a_id, user_b_id in chain(closed.iterator(chunk_size=10000), archived.iterator(chunk_size=10000)):
+            a, b = self.index.get(user_a_id), self.index.get(user_b_id)
+            if a is not None and b is not None:
+                keys.extend((a * n + b, b * n + a))
+        return np.unique(np.array(keys, dtype=np.int64))
+
+
+def score_block(features, start, stop):
+    """
+    Score every pair of a block of users (rows start:stop) with all users.
+    
+    Only pairs sharing a skill interest are returned; self pairs are left out.
+    
+    Returns:
+        dict of equal-length arrays: row, col (user positions), and the score
+        terms (skill_overlap_percentage, geographic_proximity_score,
+        reputation_score, availability_score, compatibility_score)
+    """
+    union = (
+        features.offered[start:stop] @ features.wanted_t +
+        features.wanted[start:stop] @ features.offered_t -
+        features.both[start:stop] @ features.both_t
+    ).tocoo()
+    pairs = union.data > 0
+    row = union.row[pairs].astype(np.int64) + start
+    col = union.col[pairs].astype(np.int64)
+    matches = union.data[pairs]
+    not_self = row != col
+    row, col, matches = row[not_self], col[not_self], matches[not_self]
+    
+    # 1. Skill overlap (40% weight)
+    total_skills = features.skill_count[row] + features.skill_count[col]
+    overlap = (matches / total_skills) * 100
+    skill_score = np.minimum(overlap * 2, 40)
+    
+    # 2. Geographic proximity (20% weight)
+    same_zip3 = (features.zip3[row] >= 0) & (features.zip3[row] == features.zip3[col])
+    proximity = np.where(
+        ~(features.has_city[row] & features.has_city[col]), 0.5,
+        np.where(features.city_state[row] == features.city_state[col], 1.0,
+        np.where(features.state[row] == features.state[col], 0.7,
+        np.where(same_zip3, 0.8, 0.3)))
+    )
+    geographic = proximity * 20
+    
+    # 3. Reputation (20% weight)
+    # matching_reputation.pair_reputation
+    reputation = features.reputation[row] + features.reputation[col] - NEUTRAL_SCORE
+    reputation = np.minimum(reputation, 1.0) * 20
+    
+    # 4. Availability (20% weight)
+    both_located = features.has_location[row] & features.has_location[col]
+    availability = np.where(
+        features.accepts_remote[row] & features.accepts_remote[col], 20,
+        np.where(~both_located, 10,
+        np.where(features.location[row] == features.location[col], 20,
+        np.where(features.remote_location[row] | features.remote_location[col], 15, 0)))
+    )
+    
+    total = skill_score + geographic + reputation + availability
+    return {
+        'row': row,
+        'col': col,
+        'skill_overlap_percentage': overlap,
+        'geographic_proximity_score': geographic,
+        'reputation_score': reputation,
+        'availability_score': availability,
+        'compatibility_score': np.minimum(total, 100),
+    }
+
+
+def top_k_pairs(scored, k, min_score=0, excluded=None, n=None):
+    """
+    Keep each user's k best pairs, best first; ties keep user id order.
+    
+    Args:
+        scored: score_block output
+        k: pairs kept per user
+        min_score: lowest compatibility score kept
+        excluded: sorted pair keys (see SkillSwapFeatures.excluded_pairs)
+        n: number of users (needed with excluded)
+    
+    Returns:
+        score_block-style dict holding only the kept pairs, grouped by row
+    """
+    keep = scored['compatibility_score'] >= min_score
+    if excluded is not None and len(excluded):
+        keep &= ~np.isin(scored['row'] * n + scored['col'], excluded, assume_unique=False)
+    kept = {name: values[keep] for name, values in scored.items()}
+    
+    # Sort by row, then best score, then candidate position (= user id order)
+    order = np.lexsort((kept['col'], -kept['compatibility_score'], kept['row']))
+    row = kept['row'][order]
+    # Rank of each pair within its row
+    starts = np.flatnonzero(np.r_[True, row[1:] != row[:-1]]) if len(row) else np.empty(0, dtype=np.int64)
+    rank = np.arange(len(row)) - np.repeat(starts, np.diff(np.r_[starts, len(row)]))
+    top = order[rank < k]
+    return {name: values[top] for name, values in kept.items()}
+
+
+def iter_skill_swap_top_matches(limit, min_score=30, block_size=256, features=None, excluded=None,
+                                first_user_id=None, last_user_id=None):
+    """
+    Top skill swap matches of every active skill swap user, a block at a time.
+    
+    Args:
+        features, excluded: SkillSwapFeatures and its excluded_pairs(),
+            loaded when not given (pass them to share one load across calls)
+        first_user_id, last_user_id: only score the users in this id range
+    
+    Yields:
+        (features, start, stop, top) per block of users start:stop, where
+        top is the block's top_k_pairs output
+    """
+    if features is None:
+        features = SkillSwapFeatures.load()
+    if excluded is None:
+        excluded = features.excluded_pairs()
+    first = 0 if first_user_id is None else int(np.searchsorted(features.user_ids, first_user_id))
+    last = len(features) if last_user_id is None else int(
+        np.searchsorted(features.user_ids, last_user_id, side='right')
+    )
+    for start in range(first, last, block_size):
+        stop = min(start + block_size, last)
+        scored = score_block(features, start, stop)
+        yield features, start, stop, top_k_pairs(scored, limit, min_score, excluded, len(features))
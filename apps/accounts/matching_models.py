@@ -221,3 +221,277 @@ class MatchHistory(models.Model):
     
     def __str__(self):
         return f"{self.user.full_name} - {self.action} - {self.matched_user.full_name}"
+
+
+class ListingSkill(models.Model):
+    """
+    Inverted skill index used to generate match candidates.
+    
+    One row per skill a user's skill swap listing offers or wants, or their
+    freelance listing lists, keyed by the normalized skill name. Derived from
+    the listings by apps/accounts/matching_index.py; do not edit directly.
+    """
+    
+    MATCH_TYPE_CHOICES = [
+        ('skill_swap', 'Skill Swap'),
+        ('freelance_collab', 'Freelance Collaboration'),
+    ]
+    DIRECTION_CHOICES = [
+        ('offered', 'Offered'),
+        ('wanted', 'Wanted'),
+    ]
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='listing_skills'
+    )
+    match_type = models.CharField(max_length=20, choices=MATCH_TYPE_CHOICES)
+    direction = models.CharField(max_length=10, choices=DIRECTION_CHOICES)
+    token = models.CharField(max_length=255, help_text='Lowercased skill name')
+    skill = models.ForeignKey(
+        'accounts.Skill',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='listing_entries',
+        help_text='Set for skills picked from the Skill table, empty for free-text skills'
+    )
+    
+    class Meta:
+        app_label = 'accounts'
+        verbose_name = 'Listing Skill'
+        verbose_name_plural = 'Listing Skills'
+        unique_together = ['user', 'match_type', 'direction', 'token']
+        indexes = [
+            models.Index(
+                fields=['match_type', 'direction', 'token', 'user'],
+                name='accounts_listing_skill_idx',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} {self.match_type} {self.direction}: {self.token}"
+
+
+class MatchRefresh(models.Model):
+    """
+    Per-user state of the offline match computation.
+    
+    Matches are computed by the compute_matches command, not on page loads.
+    requested_at is set while a recompute of the user's matches is queued
+    and cleared once the command has run it; computed_at records the last
+    run.
+    """
+    
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='match_refresh'
+    )
+    requested_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+        help_text='Set while a recompute is queued'
+    )
+    computed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        app_label = 'accounts'
+        verbose_name = 'Match Refresh'
+        verbose_name_plural = 'Match Refreshes'
+    
+    def __str__(self):
+        state = 'queued' if self.requested_at else 'idle'
+        return f"{self.user_id} matches ({state})"
+    
+    @property
+    def is_pending(self):
+        """Whether a recompute is queued."""
+        return self.requested_at is not None
+
+
+class FreelanceLSHBucket(models.Model):
+    """
+    LSH bucket of one band of a freelance listing's MinHash signature.
+    
+    Users whose listings share a bucket in any band are approximate
+    collaborator candidates. Derived from FreelanceListing.skill_signature
+    by apps/accounts/matching_lsh.py; do not edit directly.
+    """
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='freelance_lsh_buckets'
+    )
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField(help_text='Hash of the band\'s signature values')
+    
+    class Meta:
+        app_label = 'accounts'
+        verbose_name = 'Freelance LSH Bucket'
+        verbose_name_plural = 'Freelance LSH Buckets'
+        unique_together = ['user', 'band']
+        indexes = [
+            models.Index(fields=['band', 'bucket', 'user'], name='accounts_freelance_lsh_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} band {self.band}: {self.bucket}"
+
+
+class UserReputation(models.Model):
+    """
+    A user's materialized reputation, as used by match scoring.
+    
+    score is the user's 0-1 reputation: a neutral 0.5 plus the terms their
+    provider profile (rating, review count, verification) and verified
+    listings earn. A pair's reputation score combines both users' rows.
+    Derived by apps/accounts/matching_reputation.py; do not edit directly.
+    """
+    
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='reputation'
+    )
+    score = models.FloatField(default=0.5)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        app_label = 'accounts'
+        verbose_name = 'User Reputation'
+        verbose_name_plural = 'User Reputations'
+    
+    def __str__(self):
+        return f"{self.user_id} reputation {self.score:.2f}"
+
+
+class MatchComputeRun(models.Model):
+    """
+    A sharded full recompute of matches (compute_matches --all --workers N).
+    
+    Completed shards are recorded as MatchComputeShard rows, so a run that
+    crashed can be resumed (--resume) without redoing them.
+    """
+    
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    workers = models.PositiveSmallIntegerField()
+    shard_size = models.PositiveIntegerField(help_text='Users per shard')
+    
+    class Meta:
+        app_label = 'accounts'
+        verbose_name = 'Match Compute Run'
+        verbose_name_plural = 'Match Compute Runs'
+        ordering = ['-started_at']
+    
+    def __str__(self):
+        state = 'finished' if self.finished_at else 'unfinished'
+        return f"Match compute run {self.pk} ({state})"
+
+
+class MatchComputeShard(models.Model):
+    """A completed shard of a MatchComputeRun: the users with ids first_user_id..last_user_id."""
+    
+    run = models.ForeignKey(
+        MatchComputeRun,
+        on_delete=models.CASCADE,
+        related_name='shards'
+    )
+    first_user_id = models.BigIntegerField()
+    last_user_id = models.BigIntegerField()
+    users = models.PositiveIntegerField(default=0)
+    matches = models.PositiveIntegerField(default=0)
+    seconds = models.FloatField(default=0)
+    completed_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        app_label = 'accounts'
+        verbose_name = 'Match Compute Shard'
+        verbose_name_plural = 'Match Compute Shards'
+        ordering = ['run', 'first_user_id']
+    
+    def __str__(self):
+        return f"Run {self.run_id} users {self.first_user_id}-{self.last_user_id}"
+
+
+class MatchArchive(models.Model):
+    """
+    A match moved out of Match by the sweep_matches command.
+    
+    Holds expired and not-interested matches that have not changed for
+    MATCH_ARCHIVE_AFTER_DAYS, so the Match table (and its indexes) only
+    keeps live rows. Not-interested pairs here are still excluded from
+    suggestions. Written by apps/accounts/matching_archive.py.
+    """
+    
+    match_id = models.BigIntegerField(unique=True, help_text='Id the match had in Match')
+    user_a = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_matches_as_a'
+    )
+    user_b = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_matches_as_b'
+    )
+    match_type = models.CharField(max_length=20, choices=Match.MATCH_TYPE_CHOICES)
+    status = models.CharField(max_length=20, choices=Match.STATUS_CHOICES)
+    compatibility_score = models.DecimalField(max_digits=5, decimal_places=2)
+    skill_overlap_percentage = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    matching_skills = models.JSONField(default=list)
+    geographic_proximity_score = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    reputation_score = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    availability_score = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    user_a_interested = models.BooleanField(default=False)
+    user_b_interested = models.BooleanField(default=False)
+    user_a_not_interested = models.BooleanField(default=False)
+    user_b_not_interested = models.BooleanField(default=False)
+    connected_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        app_label = 'accounts'
+        verbose_name = 'Archived Match'
+        verbose_name_plural = 'Archived Matches'
+        indexes = [
+            models.Index(fields=['user_a', 'match_type', 'status']),
+            models.Index(fields=['user_b', 'match_type', 'status']),
+        ]
+    
+    def __str__(self):
+        return f"Archived match {self.match_id} ({self.status})"
+
+
+class MatchHistoryArchive(models.Model):
+    """A MatchHistory record of an archived match, moved along with it."""
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_match_history'
+    )
+    matched_user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_matched_by_history'
+    )
+    match_id = models.BigIntegerField(db_index=True, help_text='Id the match had in Match')
+    action = models.CharField(max_length=20)
+    notes = models.TextField(blank=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        app_label = 'accounts'
+        verbose_name = 'Archived Match History'
+        verbose_name_plural = 'Archived Match Histories'
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.action} - {self.matched_user_id} (archived)"
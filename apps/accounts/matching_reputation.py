@@ -0,0 +1,111 @@
+"""
+Materialized user reputation for match scoring.
+
+A pair's reputation score starts at a neutral 0.5 and adds, for each side,
+the terms earned by an active provider profile (rating above or below 3,
+10+ reviews, verification) and by verified freelance and skill swap
+listings. Those terms only depend on one user, so each user's share is
+stored in a UserReputation row as
+
+    score = 0.5 + the user's terms
+
+(always within 0-1) and a pair combines two rows with pair_reputation.
+Scoring then reads one row per candidate, loaded in bulk, instead of
+walking both users' provider profiles and listings for every pair.
+
+Rows are kept in sync by the matching signals (providers, listings) and
+ServiceProvider.refresh_rating_aggregates (reviews), and backfilled by
+migration 0010; the sync helper takes the model classes so the migration
+can pass its historical models.
+"""
+
+
+NEUTRAL_SCORE = 0.5
+
+USER_FIELDS = [
+    'id',
+    'provider_profile__is_active', 'provider_profile__rating_avg',
+    'provider_profile__rating_count', 'provider_profile__is_verified',
+    'freelance_listing__is_verified', 'skill_swap_listing__is_verified',
+]
+
+
+def user_reputation(provider_active, rating_avg, rating_count, provider_verified,
+                    freelance_verified, swap_verified):
+    """A user's 0-1 reputation from their provider profile and listing flags."""
+    score = NEUTRAL_SCORE
+    if provider_active:
+        # ServiceProvider.average_rating
+        rating = round(rating_avg, 1) if rating_avg else 0
+        if rating:
+            score += (rating - 3) * 0.1  # Boost for ratings above 3
+        if (rating_count or 0) >= 10:
+            score += 0.1
+        if provider_verified:
+            score += 0.1
+    if freelance_verified:
+        score += 0.05
+    if swap_verified:
+        score += 0.05
+    return score
+
+
+def pair_reputation(score_a, score_b):
+    """Combined reputation (0-1) of two users from their reputation scores."""
+    return min(score_a + score_b - NEUTRAL_SCORE, 1.0)
+
+
+def sync_reputation_rows(user_ids, reputation_model, user_model):
+    """
+    Bring some users' UserReputation rows up to date.
+    
+    Only rows whose score changed (or is missing) are written, in one bulk
+    upsert.
+    
+    Returns:
+        number of rows written
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return 0
+    
+    stored = dict(
+        reputation_model.objects.filter(user_id__in=user_ids).values_list('user_id', 'score')
+    )
+    changed = []
+    for user_id, *fields in user_model.objects.filter(id__in=user_ids).values_list(*USER_FIELDS):
+        score = user_reputation(*fields)
+        if stored.get(user_id) != score:
+            changed.append(reputation_model(user_id=user_id, score=score))
+    if changed:
+        reputation_model.objects.bulk_create(
+            changed,
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=['score', 'updated_at'],
+        )
+    return len(changed)
+
+
+def sync_user_reputation(user_ids):
+    """Re-derive the given users' reputation rows."""
+    from .matching_models import UserReputation
+    from .models import CustomUser
+    
+    return sync_reputation_rows([user_id for user_id in user_ids if user_id], UserReputation, CustomUser)
+
+
+def load_reputation(user_ids):
+    """
+    Reputation scores of some users in one query.
+    
+    Returns:
+        dict of user id -> score; users without a row get NEUTRAL_SCORE
+    """
+    from .matching_models import UserReputation
+    
+    scores = dict.fromkeys(user_ids, NEUTRAL_SCORE)
+    scores.update(
+        UserReputation.objects.filter(user_id__in=scores).values_list('user_id', 'score')
+    )
+    return scores
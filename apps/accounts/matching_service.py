@@ -2,13 +2,25 @@
 Smart matching algorithm service for skill swaps and collaborations.
 """
 
-from django.db.models import Q, Count, Avg
+from itertools import chain
+
+import numpy as np
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Count, Avg, Case, F, Value, When
 from django.utils import timezone
 from datetime import timedelta
 
 from .models import CustomUser
 from .modes_models import SkillSwapListing, FreelanceListing, Skill
-from .matching_models import Match, MatchHistory
+from .matching_models import (
+    Match, MatchHistory, ListingSkill, MatchRefresh, FreelanceLSHBucket, MatchArchive
+)
+from .matching_index import load_listing_skills, normalize_skill
+from .matching_lsh import MAX_CANDIDATES as LSH_MAX_CANDIDATES, band_buckets, minhash_signature
+from .matching_matrix import iter_skill_swap_top_matches
+from .matching_reputation import load_reputation, pair_reputation
 
 
 class MatchingService:
@@ -16,87 +28,209 @@ class MatchingService:
     
     def __init__(self, user):
         self.user = user
+        # user id -> UserReputation score, loaded with the candidates
+        self._reputation = {}
+    
+    # Most candidates scored per search: the ones sharing the most skills
+    # with the user, so the cost is bounded however many listings exist
+    MAX_CANDIDATES = 500
+    
+    # Matches of each type saved per user by the offline computation
+    MATCHES_PER_USER = 20
+    
+    # Statuses never shown as suggestions
+    HIDDEN_STATUSES = ['not_interested', 'connected', 'expired']
+    
+    # Statuses of suggestions nobody has acted on yet, which incremental
+    # updates may drop
+    SUGGESTION_STATUSES = ['pending', 'viewed']
+    
+    MATCH_TYPES = ('skill_swap', 'freelance_collab')
+    
+    # Numeric terms of a score dict
+    SCORE_TERMS = [
+        'compatibility_score', 'skill_overlap_percentage',
+        'geographic_proximity_score', 'reputation_score', 'availability_score',
+    ]
+    
+    # Match fields refreshed from the score dict when a pair is re-scored
+    SCORE_FIELDS = SCORE_TERMS + ['matching_skills']
+    
+    # Rows per INSERT when saving matches
+    SAVE_BATCH_SIZE = 1000
     
     def find_skill_swap_matches(self, limit=10, min_score=30):
         """
-        Find skill swap matches for the user.
+        Find and save the user's best skill swap matches.
+        
+        Runs the full scoring pipeline and writes Match rows; pages read the
+        stored matches with get_suggested_matches instead.
         
         Returns list of Match objects sorted by compatibility score.
         """
-        if not hasattr(self.user, 'skill_swap_listing') or not self.user.skill_swap_listing.is_active:
-            return []
+        return self.save_matches(self.get_top_matches('skill_swap', limit, min_score))
+    
+    def find_freelance_collab_matches(self, limit=10, min_score=30):
+        """
+        Find and save the user's best freelance collaboration matches.
         
-        user_listing = self.user.skill_swap_listing
+        Returns list of Match objects sorted by compatibility score.
+        """
+        return self.save_matches(self.get_top_matches('freelance_collab', limit, min_score))
+    
+    def get_top_matches(self, match_type, limit=10, min_score=30):
+        """
+        The user's best-scoring candidates of one type, without saving anything.
         
-        # Get users with active skill swap listings (excluding self)
-        potential_matches = CustomUser.objects.filter(
-            is_skill_swap_active=True,
-            skill_swap_listing__is_active=True
-        ).exclude(id=self.user.id).select_related('skill_swap_listing')
+        Returns:
+            list of (user, candidate user, match_type, score dict), best
+            first, in the form save_matches takes
+        """
+        if match_type == 'skill_swap':
+            scored = self.score_skill_swap_candidates(min_score)
+        else:
+            scored = self.score_freelance_collab_candidates(min_score)
+        scored.sort(key=lambda pair: pair[1]['compatibility_score'], reverse=True)
+        return [
+            (self.user, other_user, match_type, match_score)
+            for other_user, match_score in scored[:limit]
+        ]
+    
+    def score_skill_swap_candidates(self, min_score=30):
+        """
+        Score the user's skill swap candidates without saving anything.
         
-        # Exclude users already matched or marked as not interested
-        excluded_users = self._get_excluded_users('skill_swap')
-        potential_matches = potential_matches.exclude(id__in=excluded_users)
+        Candidates come from the skill index: active listings offering a
+        skill the user wants or wanting one the user offers.
         
-        matches = []
-        for other_user in potential_matches:
-            match_score = self._calculate_skill_swap_score(user_listing, other_user.skill_swap_listing)
-            
-            if match_score['compatibility_score'] >= min_score:
-                match = self._create_or_update_match(
-                    user_a=self.user,
-                    user_b=other_user,
-                    match_type='skill_swap',
-                    score_data=match_score
-                )
-                matches.append(match)
+        Returns:
+            list of (candidate user, score dict) scoring at least min_score
+        """
+        if not hasattr(self.user, 'skill_swap_listing') or not self.user.skill_swap_listing.is_active:
+            return []
         
-        # Sort by compatibility score
-        matches.sort(key=lambda x: x.compatibility_score, reverse=True)
-        return matches[:limit]
+        user_listing = self.user.skill_swap_listing
+        user_skills = load_listing_skills([self.user.id], 'skill_swap')[self.user.id]
+        
+        hits = ListingSkill.objects.filter(match_type='skill_swap').filter(
+            Q(direction='offered', token__in=user_skills['wanted']) |
+            Q(direction='wanted', token__in=user_skills['offered'])
+        ).filter(
+            user__is_skill_swap_active=True,
+            user__skill_swap_listing__is_active=True
+        )
+        candidates = self._get_candidates(hits, 'skill_swap')
+        candidate_skills = load_listing_skills([user.id for user in candidates], 'skill_swap')
+        
+        scored = []
+        for other_user in candidates:
+            match_score = self._calculate_skill_swap_score(
+                user_listing, other_user.skill_swap_listing,
+                user_skills, candidate_skills[other_user.id]
+            )
+            if match_score['compatibility_score'] >= min_score:
+                scored.append((other_user, match_score))
+        return scored
     
-    def find_freelance_collab_matches(self, limit=10, min_score=30):
+    def score_freelance_collab_candidates(self, min_score=30, approximate=None, probe_bands=None):
         """
-        Find freelance collaboration matches for the user.
-        
-        Returns list of Match objects sorted by compatibility score.
+        Score the user's freelance collaboration candidates without saving anything.
+        
+        Candidates come from the skill index: active freelance listings
+        sharing at least one skill with the user's. In approximate mode
+        (the MATCHING_FREELANCE_LSH setting, unless approximate is given)
+        they come from the MinHash/LSH buckets instead: listings likely to
+        have a high skill Jaccard similarity, ranked by how many of the
+        probe_bands bands they collide in. Candidates are scored exactly
+        either way.
+        
+        Returns:
+            list of (candidate user, score dict) scoring at least min_score
         """
         if not hasattr(self.user, 'freelance_listing') or not self.user.freelance_listing.is_active:
             return []
         
-        user_listing = self.user.freelance_listing
+        if approximate is None:
+            approximate = settings.MATCHING_FREELANCE_LSH
         
-        # Get users with active freelance listings (excluding self)
-        potential_matches = CustomUser.objects.filter(
-            is_freelancer_active=True,
-            freelance_listing__is_active=True
-        ).exclude(id=self.user.id).select_related('freelance_listing')
-        
-        # Exclude users already matched or marked as not interested
-        excluded_users = self._get_excluded_users('freelance_collab')
-        potential_matches = potential_matches.exclude(id__in=excluded_users)
+        user_listing = self.user.freelance_listing
+        user_skills = load_listing_skills([self.user.id], 'freelance_collab')[self.user.id]
         
-        matches = []
-        for other_user in potential_matches:
-            match_score = self._calculate_freelance_score(user_listing, other_user.freelance_listing)
-            
+        if approximate:
+            # Collisions rank candidates by estimated similarity, so fewer
+            # of them need scoring
+            hits = self._get_lsh_hits(user_skills['skills'], probe_bands)
+            limit = LSH_MAX_CANDIDATES
+        else:
+            hits = ListingSkill.objects.filter(
+                match_type='freelance_collab',
+                skill__in=list(user_skills['skills']),
+            )
+            limit = self.MAX_CANDIDATES
+        hits = hits.filter(
+            user__is_freelancer_active=True,
+            user__freelance_listing__is_active=True
+        )
+        candidates = self._get_candidates(hits, 'freelance_collab', limit)
+        candidate_skills = load_listing_skills([user.id for user in candidates], 'freelance_collab')
+        
+        scored = []
+        for other_user in candidates:
+            match_score = self._calculate_freelance_score(
+                user_listing, other_user.freelance_listing,
+                user_skills['skills'], candidate_skills[other_user.id]['skills']
+            )
             if match_score['compatibility_score'] >= min_score:
-                match = self._create_or_update_match(
-                    user_a=self.user,
-                    user_b=other_user,
-                    match_type='freelance_collab',
-                    score_data=match_score
-                )
-                matches.append(match)
+                scored.append((other_user, match_score))
+        return scored
+    
+    def _get_lsh_hits(self, skill_ids, probe_bands=None):
+        """LSH bucket rows colliding with the user's skill signature in the first probe_bands bands."""
+        if probe_bands is None:
+            probe_bands = settings.MATCHING_FREELANCE_LSH_PROBE_BANDS
+        buckets = band_buckets(minhash_signature(skill_ids), probe_bands)
+        if not buckets:
+            return FreelanceLSHBucket.objects.none()
+        
+        lookup = Q()
+        for band, bucket in buckets:
+            lookup |= Q(band=band, bucket=bucket)
+        return FreelanceLSHBucket.objects.filter(lookup)
+    
+    def _get_candidates(self, hits, match_type, limit=None):
+        """
+        Load the users behind matching index rows, most rows (shared skills
+        or colliding bands) first.
         
-        # Sort by compatibility score
-        matches.sort(key=lambda x: x.compatibility_score, reverse=True)
-        return matches[:limit]
+        Excludes the user, users already connected or marked not interested,
+        and keeps at most limit (default MAX_CANDIDATES). Everything scoring
+        reads from the candidates is loaded up front: their listings in the
+        same query, their reputation rows (and the user's) in one more.
+        """
+        if limit is None:
+            limit = self.MAX_CANDIDATES
+        excluded = self._get_excluded_users(match_type)
+        excluded.add(self.user.id)
+        
+        candidate_ids = list(
+            hits.exclude(user_id__in=excluded).values('user_id').annotate(
+                shared=Count('id')
+            ).order_by('-shared', 'user_id').values_list('user_id', flat=True)[:limit]
+        )
+        candidates = CustomUser.objects.filter(id__in=candidate_ids).select_related(
+            'skill_swap_listing', 'freelance_listing'
+        )
+        self._reputation.update(load_reputation([self.user.id, *candidate_ids]))
+        return sorted(candidates, key=lambda user: user.id)
     
-    def _calculate_skill_swap_score(self, listing_a, listing_b):
+    def _calculate_skill_swap_score(self, listing_a, listing_b, skills_a=None, skills_b=None):
         """
         Calculate compatibility score for skill swap match.
         
+        skills_a / skills_b are the listings' indexed skills (see
+        matching_index.load_listing_skills); they are read from the listings
+        when not given.
+        
         Returns dict with score breakdown.
         """
         score_data = {
@@ -109,18 +243,17 @@ class MatchingService:
         }
         
         # 1. Skill Overlap (40% weight)
-        # Convert to sets of strings for comparison (handles both Skill objects and strings)
-        def normalize_skill(skill):
-            """Convert skill to string, handling both Skill objects and strings."""
-            if hasattr(skill, 'name'):
-                return skill.name.lower().strip()
-            return str(skill).lower().strip()
+        # Compared as normalized names (handles both Skill objects and strings)
+        if skills_a is None:
+            skills_a = self._swap_listing_skills(listing_a)
+        if skills_b is None:
+            skills_b = self._swap_listing_skills(listing_b)
         
-        skills_a_offered = set(normalize_skill(s) for s in listing_a.skills_offered_list)
-        skills_b_wanted = set(normalize_skill(s) for s in listing_b.skills_wanted_list)
+        skills_a_offered = skills_a['offered']
+        skills_b_wanted = skills_b['wanted']
         
-        skills_b_offered = set(normalize_skill(s) for s in listing_b.skills_offered_list)
-        skills_a_wanted = set(normalize_skill(s) for s in listing_a.skills_wanted_list)
+        skills_b_offered = skills_b['offered']
+        skills_a_wanted = skills_a['wanted']
         
         # Find matching skills (A offers what B wants, B offers what A wants)
         matches_ab = skills_a_offered.intersection(skills_b_wanted)
@@ -168,10 +301,20 @@ class MatchingService:
         
         return score_data
     
-    def _calculate_freelance_score(self, listing_a, listing_b):
+    def _swap_listing_skills(self, listing):
+        """A skill swap listing's normalized skill names, read from the listing."""
+        return {
+            'offered': set(normalize_skill(s) for s in listing.skills_offered_list),
+            'wanted': set(normalize_skill(s) for s in listing.skills_wanted_list),
+        }
+    
+    def _calculate_freelance_score(self, listing_a, listing_b, skills_a=None, skills_b=None):
         """
         Calculate compatibility score for freelance collaboration match.
         
+        skills_a / skills_b map each listing's Skill ids to names; they are
+        read from the listings when not given.
+        
         Returns dict with score breakdown.
         """
         score_data = {
@@ -184,18 +327,20 @@ class MatchingService:
         }
         
         # 1. Skill Overlap (50% weight)
-        skills_a = set(listing_a.skills.all())
-        skills_b = set(listing_b.skills.all())
+        if skills_a is None:
+            skills_a = {skill.id: skill.name for skill in listing_a.skills.all()}
+        if skills_b is None:
+            skills_b = {skill.id: skill.name for skill in listing_b.skills.all()}
         
-        matching_skills = skills_a.intersection(skills_b)
-        total_unique_skills = len(skills_a.union(skills_b))
+        matching_skills = skills_a.keys() & skills_b.keys()
+        total_unique_skills = len(skills_a.keys() | skills_b.keys())
         
         if total_unique_skills > 0:
             score_data['skill_overlap_percentage'] = (len(matching_skills) / total_unique_skills) * 100
         else:
             score_data['skill_overlap_percentage'] = 0
         
-        score_data['matching_skills'] = [str(skill.name) for skill in matching_skills[:10]]
+        score_data['matching_skills'] = sorted(str(skills_a[skill_id]) for skill_id in matching_skills)[:10]
         
         skill_score = min(score_data['skill_overlap_percentage'] * 0.5, 50)  # Max 50 points
         
@@ -255,113 +400,302 @@ class MatchingService:
         """
         Calculate combined reputation score (0-1).
         
-        Based on ratings, reviews, verification status.
-        """
-        score = 0.5  # Base score
-        
-        # Check provider profiles for ratings
-        if hasattr(user_a, 'provider_profile') and user_a.provider_profile.is_active:
-            rating_a = user_a.provider_profile.average_rating
-            reviews_a = user_a.provider_profile.review_count
-            if rating_a:
-                score += (rating_a - 3) * 0.1  # Boost for ratings above 3
-            if reviews_a >= 10:
-                score += 0.1
-            if user_a.provider_profile.is_verified:
-                score += 0.1
-        
-        if hasattr(user_b, 'provider_profile') and user_b.provider_profile.is_active:
-            rating_b = user_b.provider_profile.average_rating
-            reviews_b = user_b.provider_profile.review_count
-            if rating_b:
-                score += (rating_b - 3) * 0.1
-            if reviews_b >= 10:
-                score += 0.1
-            if user_b.provider_profile.is_verified:
-                score += 0.1
-        
-        # Check freelance/swap verification
-        if hasattr(user_a, 'freelance_listing') and user_a.freelance_listing.is_verified:
-            score += 0.05
-        if hasattr(user_b, 'freelance_listing') and user_b.freelance_listing.is_verified:
-            score += 0.05
-        if hasattr(user_a, 'skill_swap_listing') and user_a.skill_swap_listing.is_verified:
-            score += 0.05
-        if hasattr(user_b, 'skill_swap_listing') and user_b.skill_swap_listing.is_verified:
-            score += 0.05
-        
-        return min(score, 1.0)  # Cap at 1.0
+        Based on ratings, reviews, verification status, as stored in both
+        users' UserReputation rows (see matching_reputation). Candidates'
+        rows are loaded in bulk by _get_candidates; others are read here.
+        """
+        missing = {user_a.id, user_b.id} - self._reputation.keys()
+        if missing:
+            self._reputation.update(load_reputation(missing))
+        return pair_reputation(self._reputation[user_a.id], self._reputation[user_b.id])
     
     def _get_excluded_users(self, match_type):
         """Get list of user IDs to exclude from matching."""
         excluded = set()
         
-        # Users marked as not interested
-        not_interested_matches = Match.objects.filter(
+        # Users marked as not interested (including archived matches) or
+        # already connected
+        closed_matches = Match.objects.filter(
             Q(user_a=self.user) | Q(user_b=self.user),
             match_type=match_type,
-            status='not_interested'
-        )
-        for match in not_interested_matches:
-            if match.user_a == self.user:
-                excluded.add(match.user_b.id)
-            else:
-                excluded.add(match.user_a.id)
-        
-        # Users already connected
-        connected_matches = Match.objects.filter(
+            status__in=['not_interested', 'connected']
+        ).values_list('user_a_id', 'user_b_id')
+        archived_matches = MatchArchive.objects.filter(
             Q(user_a=self.user) | Q(user_b=self.user),
             match_type=match_type,
-            status='connected'
+            status='not_interested'
+        ).values_list('user_a_id', 'user_b_id')
+        for user_a_id, user_b_id in chain(closed_matches, archived_matches):
+            excluded.add(user_b_id if user_a_id == self.user.id else user_a_id)
+        
+        return excluded
+    
+    @classmethod
+    def save_matches(cls, scored_pairs):
+        """
+        Upsert scored pairs as Match rows, each with a 'suggested' history record.
+        
+        A whole batch (one user's matches or those of many users) is written
+        in a few queries: Match rows are upserted on (user_a, user_b,
+        match_type), refreshing their scores, and history rows that already
+        exist are kept. Pairs marked not interested are left untouched, and
+        expired ones are suggested again (back to pending).
+        
+        Args:
+            scored_pairs: iterable of (user, other_user, match_type, score
+                dict), where user is the one the match was computed for
+        
+        Returns:
+            list of Match objects, one per distinct pair, in input order
+        """
+        matches = {}
+        suggested = {}
+        for user, other_user, match_type, score_data in scored_pairs:
+            # Ensure consistent ordering (lower ID first)
+            user_a_id, user_b_id = sorted((user.id, other_user.id))
+            key = (user_a_id, user_b_id, match_type)
+            if key not in matches:
+                matches[key] = Match(
+                    user_a_id=user_a_id,
+                    user_b_id=user_b_id,
+                    match_type=match_type,
+                    status='pending',
+                    **{field: score_data[field] for field in cls.SCORE_FIELDS}
+                )
+            suggested.setdefault((user.id, other_user.id), key)
+        if not matches:
+            return []
+        
+        # Rows marked not interested keep their old scores; an upsert would
+        # overwrite them (though never the status)
+        not_interested = Match.objects.filter(
+            status='not_interested',
+            user_a_id__in={key[0] for key in matches},
+            user_b_id__in={key[1] for key in matches},
+        )
+        for match in not_interested:
+            key = (match.user_a_id, match.user_b_id, match.match_type)
+            if key in matches:
+                matches[key] = match
+        
+        # Rows are written in key order so concurrent writers (sharded
+        # compute_matches workers) lock them in the same order
+        Match.objects.bulk_create(
+            [matches[key] for key in sorted(matches) if matches[key].pk is None],
+            update_conflicts=True,
+            unique_fields=['user_a', 'user_b', 'match_type'],
+            update_fields=cls.SCORE_FIELDS + ['updated_at'],
+            batch_size=cls.SAVE_BATCH_SIZE,
         )
-        for match in connected_matches:
-            if match.user_a == self.user:
-                excluded.add(match.user_b.id)
+        Match.objects.filter(
+            pk__in=[match.pk for match in matches.values()], status='expired'
+        ).update(status='pending', updated_at=timezone.now())
+        MatchHistory.objects.bulk_create(
+            [
+                MatchHistory(
+                    user_id=user_id,
+                    matched_user_id=matched_user_id,
+                    match=matches[key],
+                    action='suggested',
+                )
+                for (user_id, matched_user_id), key in sorted(suggested.items())
+            ],
+            ignore_conflicts=True,
+            batch_size=cls.SAVE_BATCH_SIZE,
+        )
+        return list(matches.values())
+    
+    def score_matches(self, limit=MATCHES_PER_USER, min_score=30, match_types=MATCH_TYPES):
+        """The user's top matches of each type, unsaved (see get_top_matches)."""
+        pairs = []
+        for match_type in match_types:
+            pairs.extend(self.get_top_matches(match_type, limit, min_score))
+        return pairs
+    
+    def score_affected_pairs(self, limit=MATCHES_PER_USER, min_score=30, match_types=MATCH_TYPES):
+        """
+        Re-score the pairs a change to the user's listings affects, without saving.
+        
+        Used by the compute_matches queue instead of a full recompute: the
+        user is scored against their candidates (users sharing at least one
+        skill) once, and since a pair's score is symmetric the results also
+        update the candidates' side. Besides the user's own top matches,
+        the pairs kept are those already stored (with fresh scores) and
+        those that now reach (or tie) a candidate's top `limit`. Stored
+        suggestions nobody acted on whose other user is no longer a
+        candidate or scores below min_score are dropped - all of them when
+        the user's listing went inactive or was deleted.
+        
+        Returns:
+            (scored pairs in the form save_matches takes, ids of Match rows
+            to delete)
+        """
+        pairs, stale = [], []
+        for match_type in match_types:
+            stored = {}
+            for match in Match.objects.filter(
+                Q(user_a=self.user) | Q(user_b=self.user), match_type=match_type
+            ).only('id', 'user_a_id', 'user_b_id', 'status'):
+                other_id = match.user_b_id if match.user_a_id == self.user.id else match.user_a_id
+                stored[other_id] = match
+            
+            if match_type == 'skill_swap':
+                scored = self.score_skill_swap_candidates(min_score)
             else:
-                excluded.add(match.user_a.id)
+                scored = self.score_freelance_collab_candidates(min_score)
+            scored.sort(key=lambda pair: pair[1]['compatibility_score'], reverse=True)
+            
+            pairs.extend(
+                (self.user, other_user, match_type, match_score)
+                for other_user, match_score in scored[:limit]
+            )
+            rest = scored[limit:]
+            cutoffs = self._get_top_cutoffs(
+                [other_user.id for other_user, match_score in rest if other_user.id not in stored],
+                match_type, limit
+            )
+            for other_user, match_score in rest:
+                cutoff = cutoffs.get(other_user.id)
+                if other_user.id in stored or cutoff is None or match_score['compatibility_score'] >= cutoff:
+                    pairs.append((other_user, self.user, match_type, match_score))
+            
+            candidate_ids = {other_user.id for other_user, match_score in scored}
+            stale.extend(
+                match.id for other_id, match in stored.items()
+                if other_id not in candidate_ids and match.status in self.SUGGESTION_STATUSES
+            )
+        return pairs, stale
+    
+    def _get_top_cutoffs(self, user_ids, match_type, limit):
+        """
+        Score of each user's limit-th best visible stored match, ignoring
+        matches with this user; users with fewer than limit are left out.
+        """
+        user_ids = set(user_ids)
+        if not user_ids:
+            return {}
+        scores = {user_id: [] for user_id in user_ids}
+        rows = Match.objects.filter(
+            Q(user_a_id__in=user_ids) | Q(user_b_id__in=user_ids), match_type=match_type
+        ).exclude(
+            Q(user_a=self.user) | Q(user_b=self.user) | Q(status__in=self.HIDDEN_STATUSES)
+        ).values_list('user_a_id', 'user_b_id', 'compatibility_score')
+        for user_a_id, user_b_id, score in rows:
+            for user_id in (user_a_id, user_b_id):
+                if user_id in scores:
+                    scores[user_id].append(float(score))
+        return {
+            user_id: sorted(values, reverse=True)[limit - 1]
+            for user_id, values in scores.items() if len(values) >= limit
+        }
+    
+    @classmethod
+    def iter_all_skill_swap_matches(cls, limit=MATCHES_PER_USER, min_score=30, block_size=256, **kwargs):
+        """
+        Top skill swap matches of every active skill swap user, scored in bulk.
         
-        return excluded
+        Scores all pairs with sparse matrix products (see matching_matrix)
+        instead of calling _calculate_skill_swap_score per pair; the scores
+        are identical. Unlike the per-user path, candidates are not capped
+        at MAX_CANDIDATES. Keyword arguments (preloaded features, a user id
+        range) are passed to matching_matrix.iter_skill_swap_top_matches.
+        
+        Yields:
+            (user ids of a block of users, their pairs in the form
+            save_matches takes)
+        """
+        for features, start, stop, top in iter_skill_swap_top_matches(limit, min_score, block_size, **kwargs):
+            user_ids = features.user_ids
+            positions = np.unique(np.concatenate([top['row'], top['col']]))
+            users = CustomUser.objects.only('id').in_bulk(user_ids[positions].tolist())
+            
+            pairs = []
+            for i, (row, col) in enumerate(zip(top['row'].tolist(), top['col'].tolist())):
+                score_data = {field: top[field][i].item() for field in cls.SCORE_TERMS}
+                skills_a, skills_b = features.skills(row), features.skills(col)
+                all_matches = (
+                    skills_a['offered'].intersection(skills_b['wanted']) |
+                    skills_b['offered'].intersection(skills_a['wanted'])
+                )
+                score_data['matching_skills'] = [s.capitalize() for s in list(all_matches)[:10]]
+                pairs.append((users[user_ids[row]], users[user_ids[col]], 'skill_swap', score_data))
+            yield user_ids[start:stop].tolist(), pairs
     
-    def _create_or_update_match(self, user_a, user_b, match_type, score_data):
-        """Create or update a Match record."""
-        # Ensure consistent ordering (lower ID first)
-        if user_a.id > user_b.id:
-            user_a, user_b = user_b, user_a
+    def compute_matches(self, limit=MATCHES_PER_USER, min_score=30):
+        """
+        Recompute and save the user's top matches of each type.
         
-        match, created = Match.objects.get_or_create(
-            user_a=user_a,
-            user_b=user_b,
-            match_type=match_type,
-            defaults={
-                'compatibility_score': score_data['compatibility_score'],
-                'skill_overlap_percentage': score_data['skill_overlap_percentage'],
-                'matching_skills': score_data['matching_skills'],
-                'geographic_proximity_score': score_data['geographic_proximity_score'],
-                'reputation_score': score_data['reputation_score'],
-                'availability_score': score_data['availability_score'],
-                'status': 'pending',
-            }
+        Returns:
+            number of matches saved
+        """
+        with transaction.atomic():
+            return len(self.save_matches(self.score_matches(limit, min_score)))
+    
+    def get_suggested_matches(self, match_type, limit=10):
+        """
+        Stored suggestions of one type for the user, best first.
+        
+        Read-only: matches are computed offline by the compute_matches
+        command. Each match gets an `other_user` attribute holding the
+        user it was suggested with.
+        """
+        matches = list(
+            Match.objects.filter(
+                Q(user_a=self.user) | Q(user_b=self.user),
+                match_type=match_type
+            ).exclude(
+                status__in=self.HIDDEN_STATUSES
+            ).select_related('user_a', 'user_b').order_by('-compatibility_score', 'id')[:limit]
         )
+        for match in matches:
+            match.other_user = match.user_b if match.user_a_id == self.user.id else match.user_a
+        return matches
+    
+    def get_refresh_state(self):
+        """The user's MatchRefresh, or None if their matches were never queued."""
+        return MatchRefresh.objects.filter(user=self.user).first()
+    
+    @staticmethod
+    def request_refresh(user_ids):
+        """
+        Queue a recompute of some users' matches for the compute_matches command.
         
-        if not created and match.status != 'not_interested':
-            # Update existing match with new scores (unless marked as not interested)
-            match.compatibility_score = score_data['compatibility_score']
-            match.skill_overlap_percentage = score_data['skill_overlap_percentage']
-            match.matching_skills = score_data['matching_skills']
-            match.geographic_proximity_score = score_data['geographic_proximity_score']
-            match.reputation_score = score_data['reputation_score']
-            match.availability_score = score_data['availability_score']
-            match.save()
-        
-        # Record in history
-        MatchHistory.objects.get_or_create(
-            user=self.user,
-            matched_user=user_b if self.user == user_a else user_a,
-            action='suggested',
-            defaults={'match': match}
+        Users already queued keep their place.
+        """
+        user_ids = set(user_ids)
+        if not user_ids:
+            return
+        now = timezone.now()
+        MatchRefresh.objects.bulk_create(
+            [MatchRefresh(user_id=user_id, requested_at=now) for user_id in user_ids],
+            ignore_conflicts=True
         )
+        MatchRefresh.objects.filter(
+            user_id__in=user_ids, requested_at__isnull=True
+        ).update(requested_at=now)
+    
+    @staticmethod
+    def complete_refresh(user_ids, started_at):
+        """
+        Record that some users' matches were recomputed by a run started at started_at.
         
-        return match
+        Requests made after the run started stay queued.
+        """
+        user_ids = set(user_ids)
+        if not user_ids:
+            return
+        now = timezone.now()
+        MatchRefresh.objects.bulk_create(
+            [MatchRefresh(user_id=user_id) for user_id in user_ids],
+            ignore_conflicts=True
+        )
+        MatchRefresh.objects.filter(user_id__in=user_ids).update(
+            computed_at=now,
+            requested_at=Case(
+                When(requested_at__lte=started_at, then=Value(None)),
+                default=F('requested_at'),
+            )
+        )
     
     def get_all_matches(self, match_type=None, limit=10):
         """Get all matches for the user, optionally filtered by type."""
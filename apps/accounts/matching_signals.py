@@ -0,0 +1,177 @@
+"""
+Signals keeping the match indexes in sync with listings, skills and provider
+profiles: the ListingSkill skill index, the freelance MinHash/LSH buckets
+and the UserReputation rows. Review changes reach UserReputation through
+ServiceProvider.refresh_rating_aggregates.
+
+Listing changes that affect scores (skills, location, availability, active
+flag) also queue the user for an incremental recompute of their pairs by
+the compute_matches command.
+"""
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from apps.providers.models import ServiceProvider
+
+from .matching_index import sync_listing_skills
+from .matching_lsh import sync_freelance_lsh
+from .matching_models import ListingSkill
+from .matching_reputation import sync_user_reputation
+from .matching_service import MatchingService
+from .models import CustomUser
+from .modes_models import FreelanceListing, Skill, SkillSwapListing
+
+# ServiceProvider fields the reputation score reads
+REPUTATION_PROVIDER_FIELDS = {'user', 'is_active', 'is_verified', 'rating_avg', 'rating_count'}
+
+# Listing fields match scores read (skill picks are M2M, handled separately)
+SCORED_LISTING_FIELDS = {
+    SkillSwapListing: [
+        'is_active', 'is_verified', 'accepts_remote', 'location_preference',
+        'additional_skills_offered', 'additional_skills_wanted',
+    ],
+    FreelanceListing: ['is_active', 'is_verified', 'availability_status'],
+}
+
+
+@receiver(post_save, sender=SkillSwapListing)
+@receiver(post_delete, sender=SkillSwapListing)
+@receiver(post_save, sender=FreelanceListing)
+@receiver(post_delete, sender=FreelanceListing)
+def update_listing_skills(sender, instance, **kwargs):
+    """Re-index a listing's free-text skills (or drop a deleted listing)."""
+    if kwargs.get('raw'):
+        return
+    sync_listing_skills([instance.user_id])
+    if sender is FreelanceListing:
+        sync_freelance_lsh([instance.user_id])
+    if 'created' in kwargs:
+        # Listing verification flags count towards reputation (a deleted
+        # listing's user is handled by update_deleted_listing_user)
+        sync_user_reputation([instance.user_id])
+
+
+@receiver(pre_save, sender=SkillSwapListing)
+@receiver(pre_save, sender=FreelanceListing)
+def remember_scored_listing_fields(sender, instance, **kwargs):
+    """Remember the stored values of the scored fields, to tell whether a save changes them."""
+    instance._scored_fields = None
+    if instance.pk and not kwargs.get('raw'):
+        instance._scored_fields = sender.objects.filter(
+            pk=instance.pk
+        ).values_list(*SCORED_LISTING_FIELDS[sender]).first()
+
+
+@receiver(post_save, sender=SkillSwapListing)
+@receiver(post_save, sender=FreelanceListing)
+def queue_listing_rematch(sender, instance, created, **kwargs):
+    """Queue the user's pairs for re-scoring when a listing is created or a scored field changed."""
+    if kwargs.get('raw'):
+        return
+    previous = getattr(instance, '_scored_fields', None)
+    if not created and previous is not None:
+        current = tuple(getattr(instance, field) for field in SCORED_LISTING_FIELDS[sender])
+        if current == previous:
+            return
+    MatchingService.request_refresh([instance.user_id])
+
+
+@receiver(post_delete, sender=SkillSwapListing)
+@receiver(post_delete, sender=FreelanceListing)
+def update_deleted_listing_user(sender, instance, **kwargs):
+    """
+    Re-derive the reputation of a deleted listing's user and queue their
+    pairs, so they are dropped from other users' suggestions.
+    
+    Listings are also deleted when their user is, so this waits for the
+    deletion to commit and skips users that are gone.
+    """
+    user_id = instance.user_id
+    
+    def update():
+        if CustomUser.objects.filter(id=user_id).exists():
+            sync_user_reputation([user_id])
+            MatchingService.request_refresh([user_id])
+    
+    transaction.on_commit(update)
+
+
+@receiver(m2m_changed, sender=SkillSwapListing.skills_offered.through)
+@receiver(m2m_changed, sender=SkillSwapListing.skills_wanted.through)
+@receiver(m2m_changed, sender=FreelanceListing.skills.through)
+def update_listing_skill_picks(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """Re-index the listings whose picked skills changed (from either side)."""
+    def sync(user_ids):
+        user_ids = set(user_ids)
+        sync_listing_skills(user_ids)
+        if sender is FreelanceListing.skills.through:
+            sync_freelance_lsh(user_ids)
+        MatchingService.request_refresh(user_ids)
+    
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            sync([instance.user_id])
+        return
+    
+    # Changed from the Skill side: pk_set holds listing ids, except for a
+    # clear, where the affected listings have to be read before it happens
+    if action == 'pre_clear':
+        instance._cleared_listing_users = list(sender.objects.filter(skill=instance).values_list(
+            f'{model._meta.model_name}__user_id', flat=True
+        ))
+    elif action == 'post_clear':
+        sync(getattr(instance, '_cleared_listing_users', []))
+    elif action in ('post_add', 'post_remove'):
+        sync(model.objects.filter(pk__in=pk_set).values_list('user_id', flat=True))
+
+
+@receiver(post_save, sender=Skill)
+def update_renamed_skill(sender, instance, created, **kwargs):
+    """Re-index the listings using a skill, whose token follows its name."""
+    if kwargs.get('raw') or created:
+        return
+    user_ids = set(ListingSkill.objects.filter(skill=instance).values_list('user_id', flat=True))
+    if sync_listing_skills(user_ids):
+        # Renamed: matching skill names shown with the matches changed
+        MatchingService.request_refresh(user_ids)
+
+
+@receiver(pre_delete, sender=Skill)
+def remember_deleted_skill_listings(sender, instance, **kwargs):
+    """Note the listings of a skill being deleted (its M2M rows go silently)."""
+    instance._freelance_users = list(
+        FreelanceListing.objects.filter(skills=instance).values_list('user_id', flat=True)
+    )
+    instance._listing_users = set(
+        ListingSkill.objects.filter(skill=instance).values_list('user_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Skill)
+def update_deleted_skill_listings(sender, instance, **kwargs):
+    """Re-sign the freelance listings that lost a deleted skill and queue their users' pairs."""
+    sync_freelance_lsh(getattr(instance, '_freelance_users', []))
+    MatchingService.request_refresh(getattr(instance, '_listing_users', []))
+
+
+@receiver(pre_save, sender=ServiceProvider)
+def remember_previous_provider_user(sender, instance, **kwargs):
+    """Remember the stored owner so a profile moved between users updates both."""
+    instance._previous_user_id = None
+    if instance.pk and not kwargs.get('raw'):
+        instance._previous_user_id = ServiceProvider.objects.filter(
+            pk=instance.pk
+        ).values_list('user_id', flat=True).first()
+
+
+@receiver(post_save, sender=ServiceProvider)
+@receiver(post_delete, sender=ServiceProvider)
+def update_provider_reputation(sender, instance, update_fields=None, **kwargs):
+    """Re-derive the reputation of the user(s) owning a changed provider profile."""
+    if kwargs.get('raw'):
+        return
+    if update_fields is not None and not REPUTATION_PROVIDER_FIELDS & set(update_fields):
+        return
+    sync_user_reputation({instance.user_id, getattr(instance, '_previous_user_id', None)})
@@ -31,21 +31,25 @@ class MatchSuggestionsView(LoginRequiredMixin, TemplateView):
         # Get filter type
         match_type = self.request.GET.get('type', 'all')
         
-        # Get matches based on type
+        # Read the stored matches; they are computed offline by the
+        # compute_matches command, never during the request
         skill_swap_matches = []
         freelance_matches = []
         
         if match_type in ['all', 'skill_swap']:
-            try:
-                skill_swap_matches = matching_service.find_skill_swap_matches(limit=10, min_score=30)
-            except Exception:
-                skill_swap_matches = []
+            skill_swap_matches = matching_service.get_suggested_matches('skill_swap', limit=10)
         
         if match_type in ['all', 'freelance']:
-            try:
-                freelance_matches = matching_service.find_freelance_collab_matches(limit=10, min_score=30)
-            except Exception:
-                freelance_matches = []
+            freelance_matches = matching_service.get_suggested_matches('freelance_collab', limit=10)
+        
+        # Queue a first computation for users who have a listing but have
+        # never had matches computed
+        refresh = matching_service.get_refresh_state()
+        if refresh is None and {'skill_swap', 'freelance'} & set(user.active_modes):
+            MatchingService.request_refresh([user.id])
+            refresh_pending = True
+        else:
+            refresh_pending = refresh is not None and refresh.is_pending
         
         # Combine and sort all matches
         all_matches = list(skill_swap_matches) + list(freelance_matches)
@@ -56,6 +60,7 @@ class MatchSuggestionsView(LoginRequiredMixin, TemplateView):
         context['all_matches'] = all_matches[:10]
         context['match_type'] = match_type
         context['new_matches_count'] = matching_service.get_new_matches_count(days=7)
+        context['refresh_pending'] = refresh_pending
         
         return context
 
@@ -192,14 +197,8 @@ def mark_match_not_interested(request, pk):
 
 @login_required
 def refresh_matches(request):
-    """Refresh/regenerate matches for the user."""
-    matching_service = MatchingService(request.user)
-    
-    # Generate new matches
-    skill_swap_matches = matching_service.find_skill_swap_matches(limit=20, min_score=30)
-    freelance_matches = matching_service.find_freelance_collab_matches(limit=20, min_score=30)
-    
-    total_new = len(skill_swap_matches) + len(freelance_matches)
+    """Queue a recompute of the user's matches."""
+    MatchingService.request_refresh([request.user.id])
     
-    messages.success(request, f'Found {total_new} new potential matches!')
+    messages.success(request, 'Your matches are being refreshed. Check back in a few minutes!')
     return redirect('accounts:match_suggestions')
@@ -0,0 +1,49 @@
+# Generated by Django 5.0.1 on 2026-10-17 02:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from apps.accounts.matching_index import sync_index_rows
+
+
+def backfill_listing_skills(apps, schema_editor):
+    """Index the skills of every existing skill swap and freelance listing."""
+    ListingSkill = apps.get_model('accounts', 'ListingSkill')
+    SkillSwapListing = apps.get_model('accounts', 'SkillSwapListing')
+    FreelanceListing = apps.get_model('accounts', 'FreelanceListing')
+    
+    user_ids = sorted(
+        set(SkillSwapListing.objects.values_list('user_id', flat=True))
+        | set(FreelanceListing.objects.values_list('user_id', flat=True))
+    )
+    for start in range(0, len(user_ids), 1000):
+        sync_index_rows(user_ids[start:start + 1000], ListingSkill, SkillSwapListing, FreelanceListing)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_rename_accounts_sk_to_user_idx_accounts_sk_to_user_5f2d3b_idx_and_more'),
+    ]
+    
+    operations = [
+        migrations.CreateModel(
+            name='ListingSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('match_type', models.CharField(choices=[('skill_swap', 'Skill Swap'), ('freelance_collab', 'Freelance Collaboration')], max_length=20)),
+                ('direction', models.CharField(choices=[('offered', 'Offered'), ('wanted', 'Wanted')], max_length=10)),
+                ('token', models.CharField(help_text='Lowercased skill name', max_length=255)),
+                ('skill', models.ForeignKey(blank=True, help_text='Set for skills picked from the Skill table, empty for free-text skills', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='listing_entries', to='accounts.skill')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='listing_skills', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Listing Skill',
+                'verbose_name_plural': 'Listing Skills',
+                'indexes': [models.Index(fields=['match_type', 'direction', 'token', 'user'], name='accounts_listing_skill_idx')],
+                'unique_together': {('user', 'match_type', 'direction', 'token')},
+            },
+        ),
+        migrations.RunPython(backfill_listing_skills, migrations.RunPython.noop),
+    ]
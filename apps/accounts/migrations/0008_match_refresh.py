@@ -0,0 +1,28 @@
+# Generated by Django 5.0.1 on 2026-10-17 02:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_listing_skill_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchRefresh',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('requested_at', models.DateTimeField(blank=True, db_index=True, help_text='Set while a recompute is queued', null=True)),
+                ('computed_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='match_refresh', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Match Refresh',
+                'verbose_name_plural': 'Match Refreshes',
+            },
+        ),
+    ]
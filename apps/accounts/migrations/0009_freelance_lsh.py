@@ -0,0 +1,48 @@
+# Generated by Django 5.0.1 on 2026-10-17 02:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from apps.accounts.matching_lsh import sync_lsh_rows
+
+
+def backfill_freelance_lsh(apps, schema_editor):
+    """Sign every existing freelance listing and file it into its LSH buckets."""
+    FreelanceLSHBucket = apps.get_model('accounts', 'FreelanceLSHBucket')
+    FreelanceListing = apps.get_model('accounts', 'FreelanceListing')
+    
+    user_ids = sorted(FreelanceListing.objects.values_list('user_id', flat=True))
+    for start in range(0, len(user_ids), 1000):
+        sync_lsh_rows(user_ids[start:start + 1000], FreelanceLSHBucket, FreelanceListing)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_match_refresh'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='freelancelisting',
+            name='skill_signature',
+            field=models.JSONField(blank=True, default=list, editable=False, help_text='MinHash signature of the skills (see apps/accounts/matching_lsh.py)'),
+        ),
+        migrations.CreateModel(
+            name='FreelanceLSHBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField()),
+                ('bucket', models.BigIntegerField(help_text="Hash of the band's signature values")),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='freelance_lsh_buckets', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Freelance LSH Bucket',
+                'verbose_name_plural': 'Freelance LSH Buckets',
+                'indexes': [models.Index(fields=['band', 'bucket', 'user'], name='accounts_freelance_lsh_idx')],
+                'unique_together': {('user', 'band')},
+            },
+        ),
+        migrations.RunPython(backfill_freelance_lsh, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.0.1 on 2026-10-17 02:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from apps.accounts.matching_reputation import sync_reputation_rows
+
+
+def backfill_user_reputation(apps, schema_editor):
+    """Materialize the reputation of every existing user."""
+    UserReputation = apps.get_model('accounts', 'UserReputation')
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+    
+    user_ids = sorted(CustomUser.objects.values_list('id', flat=True))
+    for start in range(0, len(user_ids), 1000):
+        sync_reputation_rows(user_ids[start:start + 1000], UserReputation, CustomUser)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_freelance_lsh'),
+        ('providers', '0013_provider_rating_aggregates'),
+    ]
+    
+    operations = [
+        migrations.CreateModel(
+            name='UserReputation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(default=0.5)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='reputation', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'User Reputation',
+                'verbose_name_plural': 'User Reputations',
+            },
+        ),
+        migrations.RunPython(backfill_user_reputation, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.0.1 on 2026-10-17 03:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_user_reputation'),
+    ]
+    
+    operations = [
+        migrations.CreateModel(
+            name='MatchComputeRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('workers', models.PositiveSmallIntegerField()),
+                ('shard_size', models.PositiveIntegerField(help_text='Users per shard')),
+            ],
+            options={
+                'verbose_name': 'Match Compute Run',
+                'verbose_name_plural': 'Match Compute Runs',
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MatchComputeShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_user_id', models.BigIntegerField()),
+                ('last_user_id', models.BigIntegerField()),
+                ('users', models.PositiveIntegerField(default=0)),
+                ('matches', models.PositiveIntegerField(default=0)),
+                ('seconds', models.FloatField(default=0)),
+                ('completed_at', models.DateTimeField(auto_now_add=True)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shards', to='accounts.matchcomputerun')),
+            ],
+            options={
+                'verbose_name': 'Match Compute Shard',
+                'verbose_name_plural': 'Match Compute Shards',
+                'ordering': ['run', 'first_user_id'],
+            },
+        ),
+    ]
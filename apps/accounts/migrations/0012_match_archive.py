@@ -0,0 +1,62 @@
+# Generated by Django 5.0.1 on 2026-10-17 03:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_match_compute_shards'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchHistoryArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('match_id', models.BigIntegerField(db_index=True, help_text='Id the match had in Match')),
+                ('action', models.CharField(max_length=20)),
+                ('notes', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('matched_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_matched_by_history', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_match_history', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Archived Match History',
+                'verbose_name_plural': 'Archived Match Histories',
+            },
+        ),
+        migrations.CreateModel(
+            name='MatchArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('match_id', models.BigIntegerField(help_text='Id the match had in Match', unique=True)),
+                ('match_type', models.CharField(choices=[('skill_swap', 'Skill Swap'), ('freelance_collab', 'Freelance Collaboration'), ('both', 'Both')], max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('viewed', 'Viewed'), ('interested', 'Interested'), ('connected', 'Connected'), ('not_interested', 'Not Interested'), ('expired', 'Expired')], max_length=20)),
+                ('compatibility_score', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('skill_overlap_percentage', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('matching_skills', models.JSONField(default=list)),
+                ('geographic_proximity_score', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('reputation_score', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('availability_score', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('user_a_interested', models.BooleanField(default=False)),
+                ('user_b_interested', models.BooleanField(default=False)),
+                ('user_a_not_interested', models.BooleanField(default=False)),
+                ('user_b_not_interested', models.BooleanField(default=False)),
+                ('connected_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('user_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_matches_as_a', to=settings.AUTH_USER_MODEL)),
+                ('user_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_matches_as_b', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Archived Match',
+                'verbose_name_plural': 'Archived Matches',
+                'indexes': [models.Index(fields=['user_a', 'match_type', 'status'], name='accounts_ma_user_a__3ad175_idx'), models.Index(fields=['user_b', 'match_type', 'status'], name='accounts_ma_user_b__af5090_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.1 on 2026-10-17 03:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_match_archive'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['updated_at'], name='accounts_cu_updated_d0d038_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='freelancelisting',
+            index=models.Index(fields=['updated_at'], name='accounts_fr_updated_c68ed7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='skillswaplisting',
+            index=models.Index(fields=['updated_at'], name='accounts_sk_updated_75e1a6_idx'),
+        ),
+    ]
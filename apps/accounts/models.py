@@ -61,6 +61,10 @@ class CustomUser(AbstractUser):
         verbose_name = 'User'
         verbose_name_plural = 'Users'
         ordering = ['-created_at']
+        indexes = [
+            # Watermark scans of incremental skill analytics runs
+            models.Index(fields=['updated_at']),
+        ]
     
     def __str__(self):
         return self.email or self.username
@@ -124,7 +128,10 @@ from .modes_models import (
 )
 
 # Import matching models so Django discovers them
-from .matching_models import Match, MatchHistory
+from .matching_models import (
+    Match, MatchHistory, ListingSkill, MatchRefresh, FreelanceLSHBucket, UserReputation,
+    MatchComputeRun, MatchComputeShard, MatchArchive, MatchHistoryArchive
+)
 
 # Import credit system models so Django discovers them
 from .modes_models import SkillSwapJob
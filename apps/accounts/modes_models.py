@@ -83,6 +83,12 @@ class FreelanceListing(models.Model):
         blank=True,
         help_text='Comma-separated additional tags'
     )
+    skill_signature = models.JSONField(
+        default=list,
+        blank=True,
+        editable=False,
+        help_text='MinHash signature of the skills (see apps/accounts/matching_lsh.py)'
+    )
     
     # Pricing
     pricing_type = models.CharField(
@@ -148,6 +154,10 @@ class FreelanceListing(models.Model):
         verbose_name = 'Freelance Listing'
         verbose_name_plural = 'Freelance Listings'
         ordering = ['-is_featured', '-created_at']
+        indexes = [
+            # Watermark scans of incremental skill analytics runs
+            models.Index(fields=['updated_at']),
+        ]
     
     def __str__(self):
         return f"{self.user.full_name} - {self.title}"
@@ -300,6 +310,10 @@ class SkillSwapListing(models.Model):
         verbose_name = 'Skill Swap Listing'
         verbose_name_plural = 'Skill Swap Listings'
         ordering = ['-is_verified', '-created_at']
+        indexes = [
+            # Watermark scans of incremental skill analytics runs
+            models.Index(fields=['updated_at']),
+        ]
     
     def __str__(self):
         return f"{self.user.full_name} - Skill Swap"
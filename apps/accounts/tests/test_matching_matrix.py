@@ -0,0 +1,185 @@
+"""
+Parity of the all-pairs skill swap scoring with _calculate_skill_swap_score.
+
+matching_matrix promises bit-for-bit identical scores and the same top-k
+lists as scoring every pair in Python; these tests check both on synthetic
+users built straight into SkillSwapFeatures, without the database.
+"""
+
+import random
+
+import numpy as np
+from django.test import SimpleTestCase
+from scipy import sparse
+
+from apps.accounts.matching_matrix import SkillSwapFeatures, score_block, top_k_pairs
+from apps.accounts.matching_reputation import NEUTRAL_SCORE
+from apps.accounts.matching_service import MatchingService
+from apps.accounts.models import CustomUser
+from apps.accounts.modes_models import SkillSwapListing
+
+
+TOKENS = [
+    'cooking', 'guitar', 'yoga', 'chess', 'gardening', 'tutoring', 'photography',
+    'knitting', 'baking', 'spanish', 'french', 'piano',
+]
+# Case variants and empty values exercise the case-insensitive comparisons
+PLACES = [
+    ('Austin', 'TX', '78701'), ('austin', 'tx', '78702'), ('Dallas', 'TX', '75201'),
+    ('Denver', 'CO', '80202'), ('Boulder', 'CO', '80302'), ('Austin', '', ''),
+    ('', 'TX', '78701'), ('', '', ''), ('Springfield', 'IL', '62701'), ('Springfield', 'MO', '65801'),
+    ('Kansas City', 'MO', '64101'), ('Kansas City', 'KS', '64105'),
+]
+LOCATIONS = ['', 'Austin', 'austin', 'Denver', 'Remote only', 'Austin or remote']
+REPUTATIONS = [None, 0.0, 0.2, NEUTRAL_SCORE, 0.73, 0.9, 1.0]
+
+
+def make_users(count, seed=3):
+    """
+    Synthetic skill swap users.
+    
+    Returns:
+        (rows, skills): matching_matrix.USER_FIELDS rows ordered by id, and
+        user id -> {'offered': set, 'wanted': set} of tokens
+    """
+    rng = random.Random(seed)
+    rows = []
+    skills = {}
+    for user_id in range(1, count + 1):
+        city, state, zip_code = rng.choice(PLACES)
+        rows.append((
+            user_id, city, state, zip_code,
+            rng.random() < 0.4, rng.choice(LOCATIONS), rng.choice(REPUTATIONS),
+        ))
+        skills[user_id] = {
+            'offered': set(rng.sample(TOKENS, rng.randint(0, 3))),
+            'wanted': set(rng.sample(TOKENS, rng.randint(0, 3))),
+        }
+    return rows, skills
+
+
+def build_features(rows, skills):
+    """SkillSwapFeatures of synthetic users, as SkillSwapFeatures.load() builds them."""
+    user_ids = [row[0] for row in rows]
+    vocabulary = {}
+    entries = {'offered': ([], []), 'wanted': ([], [])}
+    for position, user_id in enumerate(user_ids):
+        for direction, (user_rows, columns) in entries.items():
+            for token in sorted(skills[user_id][direction]):
+                user_rows.append(position)
+                columns.append(vocabulary.setdefault(token, len(vocabulary)))
+    shape = (len(user_ids), len(vocabulary))
+    matrices = {
+        direction: sparse.csr_matrix(
+            (np.ones(len(user_rows), dtype=np.int32), (user_rows, columns)), shape=shape
+        )
+        for direction, (user_rows, columns) in entries.items()
+    }
+    return SkillSwapFeatures(user_ids, rows, list(vocabulary), matrices['offered'], matrices['wanted'])
+
+
+class SkillSwapMatrixTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        rows, cls.skills = make_users(200)
+        cls.features = build_features(rows, cls.skills)
+        cls.listings = {}
+        reputation = {}
+        for user_id, city, state, zip_code, accepts_remote, location, score in rows:
+            user = CustomUser(id=user_id, city=city, state=state, zip_code=zip_code)
+            cls.listings[user_id] = SkillSwapListing(
+                user=user, accepts_remote=accepts_remote, location_preference=location
+            )
+            reputation[user_id] = NEUTRAL_SCORE if score is None else score
+        cls.reputation = reputation
+    
+    def python_scores(self, user_id):
+        """_calculate_skill_swap_score for every user sharing a skill interest, in id order."""
+        service = MatchingService(self.listings[user_id].user)
+        service._reputation.update(self.reputation)
+        own = self.skills[user_id]
+        scores = {}
+        for other_id, other in self.skills.items():
+            if other_id == user_id:
+                continue
+            if not (own['offered'] & other['wanted'] or own['wanted'] & other['offered']):
+                continue
+            scores[other_id] = service._calculate_skill_swap_score(
+                self.listings[user_id], self.listings[other_id], own, other
+            )
+        return scores
+    
+    def matrix_scores(self, scored, position):
+        """user id -> score terms of one row of score_block output."""
+        in_row = scored['row'] == position
+        return {
+            self.features.user_ids[col].item(): {
+                term: scored[term][in_row][i].item() for term in MatchingService.SCORE_TERMS
+            }
+            for i, col in enumerate(scored['col'][in_row])
+        }
+    
+    def test_score_block_matches_python_score(self):
+        scored = score_block(self.features, 0, len(self.features))
+        for position, user_id in enumerate(self.features.user_ids.tolist()):
+            with self.subTest(user_id=user_id):
+                expected = self.python_scores(user_id)
+                actual = self.matrix_scores(scored, position)
+                self.assertEqual(set(actual), set(expected))
+                for other_id, score_data in expected.items():
+                    self.assertEqual(
+                        actual[other_id],
+                        {term: score_data[term] for term in MatchingService.SCORE_TERMS},
+                        f'pair {user_id} / {other_id}',
+                    )
+    
+    def test_blocks_score_like_one_pass(self):
+        def by_pair(parts):
+            return {
+                (row, col): [part[term][i].item() for term in MatchingService.SCORE_TERMS]
+                for part in parts
+                for i, (row, col) in enumerate(zip(part['row'].tolist(), part['col'].tolist()))
+            }
+        
+        n = len(self.features)
+        whole = by_pair([score_block(self.features, 0, n)])
+        for block_size in (1, 7, 64):
+            with self.subTest(block_size=block_size):
+                parts = [
+                    score_block(self.features, start, min(start + block_size, n))
+                    for start in range(0, n, block_size)
+                ]
+                self.assertEqual(by_pair(parts), whole)
+    
+    def test_top_k_pairs_matches_python_ranking(self):
+        scored = score_block(self.features, 0, len(self.features))
+        for k, min_score in ((1, 0), (5, 30), (20, 30), (500, 60)):
+            kept = top_k_pairs(scored, k, min_score=min_score)
+            for position, user_id in enumerate(self.features.user_ids.tolist()):
+                with self.subTest(k=k, min_score=min_score, user_id=user_id):
+                    reference = self.python_scores(user_id)
+                    expected = sorted(
+                        (other_id for other_id, score_data in reference.items()
+                         if score_data['compatibility_score'] >= min_score),
+                        key=lambda other_id: -reference[other_id]['compatibility_score']
+                    )[:k]
+                    actual = self.features.user_ids[kept['col'][kept['row'] == position]].tolist()
+                    self.assertEqual(actual, expected)
+    
+    def test_top_k_pairs_skips_excluded_pairs(self):
+        n = len(self.features)
+        scored = score_block(self.features, 0, n)
+        keys = (scored['row'] * n + scored['col']).tolist()
+        # Every fifth pair, in both directions, as excluded_pairs() lists them
+        excluded = np.unique(np.array(
+            [key for row, col in zip(scored['row'][::5].tolist(), scored['col'][::5].tolist())
+             for key in (row * n + col, col * n + row)],
+            dtype=np.int64,
+        ))
+        kept = top_k_pairs(scored, n, excluded=excluded, n=n)
+        self.assertEqual(
+            sorted((kept['row'] * n + kept['col']).tolist()),
+            sorted(set(keys) - set(excluded.tolist())),
+        )
@@ -4,7 +4,7 @@ Views for core app - Homepage and utilities.
 
 from django.shortcuts import render
 from django.views.generic import TemplateView
-from django.db.models import Avg, Count
+from django.db.models import Count, Sum
 
 from apps.providers.models import ServiceCategory, ServiceProvider
 
@@ -28,24 +28,21 @@ class HomeView(TemplateView):
         context['featured_providers'] = ServiceProvider.objects.filter(
             is_active=True,
             is_featured=True
-        ).select_related('category').annotate(
-            avg_rating=Avg('reviews__rating'),
-            num_reviews=Count('reviews')
-        ).order_by('-avg_rating', '-num_reviews')[:6]
+        ).select_related('category').order_by('-rank_score', '-id')[:6]
         
         # Get top rated providers
         context['top_providers'] = ServiceProvider.objects.filter(
-            is_active=True
-        ).select_related('category').annotate(
-            avg_rating=Avg('reviews__rating'),
-            num_reviews=Count('reviews')
-        ).filter(num_reviews__gte=1).order_by('-avg_rating')[:4]
+            is_active=True,
+            rating_count__gte=1
+        ).select_related('category').order_by('-rank_score', '-id')[:4]
         
         # Stats for hero section
         context['stats'] = {
             'providers': ServiceProvider.objects.filter(is_active=True).count(),
             'categories': ServiceCategory.objects.filter(is_active=True).count(),
-            'reviews': sum(p.review_count for p in ServiceProvider.objects.all()),
+            'reviews': ServiceProvider.objects.aggregate(
+                total=Sum('rating_count')
+            )['total'] or 0,
         }
         
         return context
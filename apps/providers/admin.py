@@ -5,9 +5,15 @@ Admin configuration for providers app.
 from django.contrib import admin
 from django.utils.html import format_html
 from django.utils import timezone
-from .models import ServiceCategory, ServiceProvider, FavoriteProvider, ProviderImage, QuoteRequest
+from .models import (
+    ServiceCategory, ServiceProvider, FavoriteProvider, ProviderImage, ProviderSkill, QuoteRequest,
+    QuoteRequestSkill, UnifiedJobSkill
+)
 from .unified_jobs import UnifiedJob, JobProposal, JobMessage
-from .skill_analytics import SkillDemand, SkillSupply, SkillMarketOpportunity
+from .skill_analytics import (
+    SkillDemand, SkillSupply, SkillMarketOpportunity, SkillAnalyticsRun, SkillAnalyticsStalePlace,
+    SkillDailySignal
+)
 from .community_projects import (
     CommunityProject, ProjectRole, ProjectApplication,
     ProjectMember, ProjectMilestone, ProjectFile, ProjectMessage
@@ -33,6 +39,37 @@ class ProviderImageInline(admin.TabularInline):
     fields = ['image', 'caption', 'is_featured', 'order']
 
 
+class ProviderSkillInline(admin.TabularInline):
+    """Read-only inline showing how a provider's skills text was normalized."""
+    model = ProviderSkill
+    extra = 0
+    can_delete = False
+    fields = ['name', 'token', 'skill']
+    readonly_fields = ['name', 'token', 'skill']
+    
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+class SkillMentionInline(admin.TabularInline):
+    """Read-only inline listing the skills a job's text mentions."""
+    extra = 0
+    can_delete = False
+    fields = ['skill']
+    readonly_fields = ['skill']
+    
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+class UnifiedJobSkillInline(SkillMentionInline):
+    model = UnifiedJobSkill
+
+
+class QuoteRequestSkillInline(SkillMentionInline):
+    model = QuoteRequestSkill
+
+
 @admin.register(ServiceProvider)
 class ServiceProviderAdmin(admin.ModelAdmin):
     """Admin for ServiceProvider model."""
@@ -45,8 +82,8 @@ class ServiceProviderAdmin(admin.ModelAdmin):
     search_fields = ['name', 'description', 'skills', 'email', 'city']
     prepopulated_fields = {'slug': ('name',)}
     ordering = ['-created_at']
-    readonly_fields = ['average_rating', 'review_count', 'created_at', 'updated_at']
-    inlines = [ProviderImageInline]
+    readonly_fields = ['average_rating', 'review_count', 'rank_score', 'latitude', 'longitude', 'availability_heartbeat_at', 'created_at', 'updated_at']
+    inlines = [ProviderImageInline, ProviderSkillInline]
     
     fieldsets = (
         ('Basic Information', {
@@ -59,7 +96,7 @@ class ServiceProviderAdmin(admin.ModelAdmin):
             'fields': ('email', 'phone', 'website')
         }),
         ('Location', {
-            'fields': ('address', 'city', 'state', 'zip_code')
+            'fields': ('address', 'city', 'state', 'zip_code', 'latitude', 'longitude')
         }),
         ('Business Details', {
             'fields': ('pricing_range', 'years_experience')
@@ -68,10 +105,13 @@ class ServiceProviderAdmin(admin.ModelAdmin):
             'fields': ('image', 'logo')
         }),
         ('Status', {
-            'fields': ('is_verified', 'is_active', 'is_featured')
+            'fields': ('is_verified', 'is_active', 'is_featured', 'rank_score')
         }),
         ('Emergency & Availability', {
-            'fields': ('is_available_now', 'accepts_emergency', 'emergency_rate_info')
+            'fields': (
+                'is_available_now', 'availability_window_minutes', 'availability_heartbeat_at',
+                'accepts_emergency', 'emergency_rate_info'
+            )
         }),
         ('Job Acceptance Preferences', {
             'fields': ('accepts_paid_jobs', 'accepts_credit_jobs', 'accepts_barter')
@@ -121,6 +161,7 @@ class QuoteRequestAdmin(admin.ModelAdmin):
     ordering = ['-created_at']
     raw_id_fields = ['user', 'provider']
     readonly_fields = ['created_at', 'updated_at', 'quoted_at']
+    inlines = [QuoteRequestSkillInline]
     
     fieldsets = (
         ('Request Info', {
@@ -178,7 +219,7 @@ class UnifiedJobAdmin(admin.ModelAdmin):
         'payment_processed_at', 'dispute_resolved_at'
     ]
     raw_id_fields = ['requester', 'provider', 'related_quote_request', 'related_skill_swap_job']
-    inlines = [JobProposalInline, JobMessageInline]
+    inlines = [JobProposalInline, JobMessageInline, UnifiedJobSkillInline]
     
     fieldsets = (
         ('Job Details', {
@@ -325,9 +366,9 @@ class SkillDemandAdmin(admin.ModelAdmin):
     """Admin for SkillDemand model."""
     
     list_display = ['skill', 'city', 'state', 'demand_score', 'demand_change_percent', 'calculated_at']
-    list_filter = ['city', 'state', 'calculated_at']
+    list_filter = ['is_current', 'city', 'state', 'calculated_at']
     search_fields = ['skill__name', 'city', 'state']
-    readonly_fields = ['calculated_at']
+    readonly_fields = ['calculated_at', 'is_current']
     raw_id_fields = ['skill']
     
     fieldsets = (
@@ -341,7 +382,7 @@ class SkillDemandAdmin(admin.ModelAdmin):
             'fields': ('previous_demand_score', 'demand_change_percent')
         }),
         ('Time Period', {
-            'fields': ('period_start', 'period_end', 'calculated_at')
+            'fields': ('period_start', 'period_end', 'calculated_at', 'is_current')
         }),
     )
 
@@ -351,9 +392,9 @@ class SkillSupplyAdmin(admin.ModelAdmin):
     """Admin for SkillSupply model."""
     
     list_display = ['skill', 'city', 'state', 'supply_score', 'supply_change_percent', 'calculated_at']
-    list_filter = ['city', 'state', 'calculated_at']
+    list_filter = ['is_current', 'city', 'state', 'calculated_at']
     search_fields = ['skill__name', 'city', 'state']
-    readonly_fields = ['calculated_at']
+    readonly_fields = ['calculated_at', 'is_current']
     raw_id_fields = ['skill']
     
     fieldsets = (
@@ -367,7 +408,7 @@ class SkillSupplyAdmin(admin.ModelAdmin):
             'fields': ('previous_supply_score', 'supply_change_percent')
         }),
         ('Time Period', {
-            'fields': ('period_start', 'period_end', 'calculated_at')
+            'fields': ('period_start', 'period_end', 'calculated_at', 'is_current')
         }),
     )
 
@@ -377,9 +418,9 @@ class SkillMarketOpportunityAdmin(admin.ModelAdmin):
     """Admin for SkillMarketOpportunity model."""
     
     list_display = ['skill', 'city', 'state', 'opportunity_score', 'market_status', 'calculated_at']
-    list_filter = ['market_status', 'city', 'state', 'calculated_at']
+    list_filter = ['is_current', 'market_status', 'city', 'state', 'calculated_at']
     search_fields = ['skill__name', 'city', 'state']
-    readonly_fields = ['calculated_at']
+    readonly_fields = ['calculated_at', 'is_current']
     raw_id_fields = ['skill']
     
     fieldsets = (
@@ -390,11 +431,58 @@ class SkillMarketOpportunityAdmin(admin.ModelAdmin):
             'fields': ('demand_score', 'supply_score', 'opportunity_score', 'market_status')
         }),
         ('Time Period', {
-            'fields': ('period_start', 'period_end', 'calculated_at')
+            'fields': ('period_start', 'period_end', 'calculated_at', 'is_current')
         }),
     )
 
 
+@admin.register(SkillAnalyticsRun)
+class SkillAnalyticsRunAdmin(admin.ModelAdmin):
+    """Read-only admin for update_skill_analytics runs (the incremental watermarks)."""
+    
+    list_display = ['started_at', 'finished_at', 'days_back', 'incremental', 'areas', 'records']
+    list_filter = ['incremental']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(SkillAnalyticsStalePlace)
+class SkillAnalyticsStalePlaceAdmin(admin.ModelAdmin):
+    """Read-only admin for places queued for the next incremental analytics run."""
+    
+    list_display = ['city', 'state', 'listing', 'created_at']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(SkillDailySignal)
+class SkillDailySignalAdmin(admin.ModelAdmin):
+    """Read-only admin for the daily skill signal rollup."""
+    
+    list_display = [
+        'skill', 'city', 'state', 'zip_code', 'day', 'job_requests_count', 'skill_swap_wants_count',
+        'provider_count', 'skill_swap_offers_count', 'freelance_listings_count',
+    ]
+    list_filter = ['state']
+    search_fields = ['skill__name', 'city']
+    date_hierarchy = 'day'
+    raw_id_fields = ['skill']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 class ProjectRoleInline(admin.TabularInline):
     """Inline admin for project roles."""
     model = ProjectRole
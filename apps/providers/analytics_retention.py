@@ -0,0 +1,109 @@
+"""
+Retention of skill analytics history.
+
+The analysis period is part of the SkillDemand / SkillSupply /
+SkillMarketOpportunity key, so every update_skill_analytics run adds a
+record per skill and area instead of updating one. The latest record of
+each skill and area is flagged is_current (one per skill and area, enforced
+by a partial unique index that also serves the live reads). The
+compact_skill_analytics command thins out the history behind it:
+
+- history younger than the first DOWNSAMPLE_TIERS age is kept as it is,
+- older history keeps only the latest record per skill, area and week, and
+  past the next age per month,
+- history older than SKILL_ANALYTICS_RETENTION_DAYS is deleted.
+
+Current records are never deleted. Each pass walks ids in bounded batches,
+one delete per batch, so compaction can run alongside the analytics update.
+Helpers take the model class so the migration adding is_current can pass
+its historical models.
+"""
+
+from datetime import timedelta
+
+from django.db.models import Exists, OuterRef
+from django.db.models.functions import Trunc
+
+
+# (age in days, bucket): history older than the age keeps its latest record
+# per skill, area and bucket
+DOWNSAMPLE_TIERS = [(30, 'week'), (180, 'month')]
+
+
+def mark_current_records(model, batch_size=1000):
+    """
+    Flag the latest record of each skill and area as current (and only it).
+    
+    Returns:
+        number of current records
+    """
+    model.objects.filter(is_current=True).update(is_current=False)
+    latest_ids = list(
+        model.objects.order_by(
+            'skill_id', 'city', 'state', 'zip_code', '-calculated_at', '-id'
+        ).distinct(
+            'skill_id', 'city', 'state', 'zip_code'
+        ).values_list('id', flat=True)
+    )
+    for start in range(0, len(latest_ids), batch_size):
+        model.objects.filter(id__in=latest_ids[start:start + batch_size]).update(is_current=True)
+    return len(latest_ids)
+
+
+def _delete_in_batches(rows, batch_size):
+    """Delete rows in id order, batch_size at a time, yielding each batch's count."""
+    model = rows.model
+    last_id = 0
+    while True:
+        ids = list(rows.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return
+        last_id = ids[-1]
+        deleted, _ = model.objects.filter(id__in=ids, is_current=False).delete()
+        yield deleted
+
+
+def compact_records(model, now, retention_days, batch_size=1000):
+    """
+    Downsample and expire the history of one analytics model.
+    
+    Args:
+        model: SkillDemand, SkillSupply or SkillMarketOpportunity model class
+        now: datetime ages are measured from
+        retention_days: history whose period ended earlier is deleted
+        batch_size: records deleted per query
+    
+    Yields:
+        number of records deleted by each batch
+    """
+    history = model.objects.filter(is_current=False)
+    cutoff = now - timedelta(days=retention_days)
+    yield from _delete_in_batches(history.filter(period_end__lt=cutoff), batch_size)
+    
+    for index, (age, kind) in enumerate(DOWNSAMPLE_TIERS):
+        newest = now - timedelta(days=age)
+        if index + 1 < len(DOWNSAMPLE_TIERS):
+            oldest = max(now - timedelta(days=DOWNSAMPLE_TIERS[index + 1][0]), cutoff)
+        else:
+            oldest = cutoff
+        if oldest >= newest:
+            continue
+        # A later record of the same skill and area in the same bucket
+        superseded = Exists(
+            model.objects.annotate(
+                bucket=Trunc('period_end', kind)
+            ).filter(
+                skill=OuterRef('skill'),
+                city=OuterRef('city'),
+                state=OuterRef('state'),
+                zip_code=OuterRef('zip_code'),
+                bucket=OuterRef('bucket'),
+                period_end__gt=OuterRef('period_end'),
+            )
+        )
+        rows = history.filter(
+            period_end__lt=newest, period_end__gte=oldest
+        ).annotate(
+            bucket=Trunc('period_end', kind)
+        ).filter(superseded)
+        yield from _delete_in_batches(rows, batch_size)
@@ -2,18 +2,153 @@
 Service for calculating skill supply and demand analytics.
 """
 
-from django.db.models import Q, Count, Sum
+from django.db import transaction
+from django.db.models import CharField, Q, Count, Sum
+from django.db.models.functions import Upper
+from django.db.models.lookups import In
 from django.utils import timezone
 from datetime import timedelta
 from decimal import Decimal
-from collections import defaultdict
+from collections import Counter, defaultdict
 
-from .skill_analytics import SkillDemand, SkillSupply, SkillMarketOpportunity
-from .models import ServiceProvider
+from .skill_analytics import SkillDemand, SkillSupply, SkillMarketOpportunity, SkillAnalyticsStalePlace
+from .models import ProviderSkill, UnifiedJobSkill
 from .unified_jobs import UnifiedJob
 from apps.accounts.modes_models import SkillSwapListing, FreelanceListing, Skill
 
 
+# Unique key of the analytics records, upserted in bulk
+RECORD_KEY_FIELDS = ['skill', 'city', 'state', 'zip_code', 'period_start', 'period_end']
+
+# Change percents from this on (after rounding to 2 decimals) do not fit
+# the *_change_percent columns (5 digits)
+CHANGE_PERCENT_LIMIT = Decimal('1000')
+
+# Stale place standing for every area (queued when a skill changed)
+EVERY_PLACE = ('', '')
+
+# Rows updated this long before the previous run started are read again
+# by an incremental run, in case their transaction committed after it read
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+_EMPTY_COUNTS = Counter()
+
+
+def in_areas(locations, city_field, state_field, either_place=False):
+    """
+    Q narrowing signal rows to those that can count in some of the areas.
+    
+    Args:
+        locations: (city, state, zip_code) areas
+        city_field, state_field: lookup paths of the row's city and state
+        either_place: the rows count in their city *or* state (listings)
+    """
+    in_cities = In(Upper(city_field, output_field=CharField()), {city.upper() for city, _, _ in locations})
+    in_states = In(Upper(state_field, output_field=CharField()), {state.upper() for _, state, _ in locations})
+    if either_place:
+        return Q(in_cities) | Q(in_states)
+    return Q(in_cities) & Q(in_states)
+
+
+def touched_locations(locations, places, listing_places):
+    """
+    The areas whose signals changed places may have changed.
+    
+    Args:
+        locations: (city, state, zip_code) areas
+        places: (CITY, STATE) of changed jobs and providers, which count in
+            areas with both their city and state
+        listing_places: (CITY, STATE) of changed listings, which count in
+            every area in their city or state; EVERY_PLACE touches them all
+    
+    Returns:
+        list of the touched locations
+    """
+    if EVERY_PLACE in listing_places:
+        return list(locations)
+    cities = {city for city, _ in listing_places}
+    states = {state for _, state in listing_places}
+    return [
+        location for location in locations
+        if (location[0].upper(), location[1].upper()) in places
+        or location[0].upper() in cities or location[1].upper() in states
+    ]
+
+
+def mark_places_stale(places, listing=False):
+    """
+    Queue places for the next incremental update_skill_analytics run.
+    
+    Places that cannot be in any area (a job or provider without both a
+    city and a state, a listing owner without either) are dropped.
+    
+    Args:
+        places: (city, state) pairs
+        listing: the places are listing owners', which count in their city
+            or state
+    """
+    places = {(city or '', state or '') for city, state in places}
+    SkillAnalyticsStalePlace.objects.bulk_create([
+        SkillAnalyticsStalePlace(city=city, state=state, listing=listing)
+        for city, state in places
+        if (city or state if listing else city and state)
+    ])
+
+
+def mark_every_place_stale():
+    """Have the next incremental run recompute every area (after a skill changed)."""
+    SkillAnalyticsStalePlace.objects.create(city=EVERY_PLACE[0], state=EVERY_PLACE[1], listing=True)
+
+
+def count_by_area(rows, locations, either_place=False):
+    """
+    Count signals per skill in every area, matching them as the per-area queries do.
+    
+    City and state match case-insensitively (iexact); an area with a ZIP
+    code only takes rows whose ZIP starts with its first five characters.
+    Rows are tallied once per distinct ZIP prefix instead of being
+    filtered again for each area.
+    
+    Args:
+        rows: iterable of (city, state, zip_code, skill id), one per signal
+        locations: (city, state, zip_code) areas
+        either_place: match rows in the area's city *or* state (listings)
+            instead of both (jobs, providers)
+    
+    Returns:
+        dict of location -> Counter of skill id -> count
+    """
+    prefixes = {zip_code[:5] for _, _, zip_code in locations if zip_code}
+    lengths = {len(prefix) for prefix in prefixes} | {0}
+    
+    # prefix -> (by city and state, by city, by state) tallies
+    tallies = defaultdict(lambda: (defaultdict(Counter), defaultdict(Counter), defaultdict(Counter)))
+    for city, state, zip_code, skill_id in rows:
+        city, state, zip_code = (city or '').upper(), (state or '').upper(), zip_code or ''
+        for length in lengths:
+            prefix = zip_code[:length]
+            if length and (len(prefix) < length or prefix not in prefixes):
+                continue
+            by_place, by_city, by_state = tallies[prefix]
+            by_place[(city, state)][skill_id] += 1
+            if either_place:
+                by_city[city][skill_id] += 1
+                by_state[state][skill_id] += 1
+    
+    counts = {}
+    for location in locations:
+        city, state, zip_code = location
+        city, state = city.upper(), state.upper()
+        by_place, by_city, by_state = tallies[zip_code[:5] if zip_code else '']
+        in_place = by_place.get((city, state), _EMPTY_COUNTS)
+        if either_place:
+            # City or state: both tallies count the rows in the city and state
+            counts[location] = by_city.get(city, _EMPTY_COUNTS) + by_state.get(state, _EMPTY_COUNTS) - in_place
+        else:
+            counts[location] = in_place
+    return counts
+
+
 class SkillAnalyticsService:
     """Service for calculating and updating skill analytics."""
     
@@ -40,9 +175,10 @@ class SkillAnalyticsService:
         job_requests_count = 0
         skill_swap_wants_count = 0
         
-        # Count from unified job requests
-        # Look for jobs mentioning this skill or in related categories
+        # Count from unified job requests mentioning the skill (see
+        # apps/providers/skill_mentions.py)
         job_requests = UnifiedJob.objects.filter(
+            skill_mentions__skill=skill,
             created_at__gte=period_start,
             created_at__lte=period_end,
             service_city__iexact=city,
@@ -52,12 +188,7 @@ class SkillAnalyticsService:
         if zip_code:
             job_requests = job_requests.filter(service_zip__startswith=zip_code[:5])
         
-        # Check if skill name appears in job descriptions or titles
-        skill_name_lower = skill.name.lower()
-        for job in job_requests:
-            if (skill_name_lower in job.title.lower() or 
-                skill_name_lower in job.description.lower()):
-                job_requests_count += 1
+        job_requests_count = job_requests.count()
         
         # Count from skill swap listings (skills_wanted)
         skill_swap_wants = SkillSwapListing.objects.filter(
@@ -89,7 +220,43 @@ class SkillAnalyticsService:
         }
     
     @staticmethod
-    def calculate_supply_score(skill, city, state, zip_code=None, radius_miles=25, days_back=30):
+    def provider_supply_counts(city, state, zip_code=None, skills=None):
+        """
+        Count active providers offering each canonical skill in an area.
+        
+        One grouped query over the indexed ProviderSkill rows.
+        
+        Args:
+            city: City name
+            state: State name
+            zip_code: Optional ZIP code
+            skills: Optional Skill instances/ids to restrict the counts to
+        
+        Returns:
+            dict of skill id -> provider count (skills with none are absent)
+        """
+        entries = ProviderSkill.objects.filter(
+            skill__isnull=False,
+            provider__is_active=True,
+            provider__city__iexact=city,
+            provider__state__iexact=state,
+        )
+        
+        if zip_code:
+            entries = entries.filter(provider__zip_code__startswith=zip_code[:5])
+        if skills is not None:
+            entries = entries.filter(skill__in=skills)
+        
+        # Distinct: two spellings of a skill can link one provider twice
+        return dict(
+            entries.values('skill_id').annotate(
+                count=Count('provider_id', distinct=True)
+            ).order_by().values_list('skill_id', 'count')
+        )
+    
+    @staticmethod
+    def calculate_supply_score(skill, city, state, zip_code=None, radius_miles=25, days_back=30,
+                               provider_counts=None):
         """
         Calculate supply score for a skill in a geographic area.
         
@@ -100,6 +267,8 @@ class SkillAnalyticsService:
             zip_code: Optional ZIP code
             radius_miles: Radius in miles (default 25)
             days_back: Number of days to look back (default 30)
+            provider_counts: Optional provider_supply_counts() result for the
+                same area, to share one query across skills
         
         Returns:
             dict with supply metrics
@@ -107,23 +276,12 @@ class SkillAnalyticsService:
         period_end = timezone.now()
         period_start = period_end - timedelta(days=days_back)
         
-        # Count from service providers
-        # Check if skill appears in provider skills or description
-        providers = ServiceProvider.objects.filter(
-            is_active=True,
-            city__iexact=city,
-            state__iexact=state,
-        )
-        
-        if zip_code:
-            providers = providers.filter(zip_code__startswith=zip_code[:5])
-        
-        skill_name_lower = skill.name.lower()
-        provider_count = 0
-        for provider in providers:
-            if (skill_name_lower in provider.skills.lower() or
-                skill_name_lower in provider.description.lower()):
-                provider_count += 1
+        # Count from service providers offering the skill
+        if provider_counts is None:
+            provider_counts = SkillAnalyticsService.provider_supply_counts(
+                city, state, zip_code, skills=[skill]
+            )
+        provider_count = provider_counts.get(skill.id, 0)
         
         # Count from skill swap listings (skills_offered)
         skill_swap_offers = SkillSwapListing.objects.filter(
@@ -171,10 +329,314 @@ class SkillAnalyticsService:
         }
     
     @staticmethod
-    def update_skill_analytics(skill, city, state, zip_code=None, radius_miles=25, days_back=30):
+    def demand_signal_counts(skills, locations, period_start, period_end):
+        """
+        Demand signals of every skill in every area, for update_all_skill_analytics.
+        
+        Two queries: the skills the job requests of the period mention
+        (UnifiedJobSkill) and the active skill swap listings' wanted skills.
+        
+        Returns:
+            dict of SkillDemand count field -> count_by_area() result
+        """
+        skill_ids = [skill.id for skill in skills]
+        jobs = UnifiedJobSkill.objects.filter(
+            job__created_at__gte=period_start,
+            job__created_at__lte=period_end,
+            skill__in=skill_ids,
+        ).filter(
+            in_areas(locations, 'job__service_city', 'job__service_state')
+        ).values_list('job__service_city', 'job__service_state', 'job__service_zip', 'skill_id')
+        
+        wants = SkillSwapListing.skills_wanted.through.objects.filter(
+            skillswaplisting__is_active=True,
+            skill__in=skill_ids,
+        ).filter(
+            in_areas(locations, 'skillswaplisting__user__city', 'skillswaplisting__user__state', either_place=True)
+        ).values_list(
+            'skillswaplisting__user__city', 'skillswaplisting__user__state',
+            'skillswaplisting__user__zip_code', 'skill_id'
+        )
+        
+        return {
+            'job_requests_count': count_by_area(jobs.iterator(chunk_size=5000), locations),
+            'skill_swap_wants_count': count_by_area(wants.iterator(chunk_size=5000), locations, either_place=True),
+        }
+    
+    @staticmethod
+    def supply_signal_counts(skills, locations):
+        """
+        Supply signals of every skill in every area, for update_all_skill_analytics.
+        
+        Three queries: providers offering the skill (distinct per provider,
+        see provider_supply_counts), active skill swap listings' offered
+        skills and active freelance listings' skills.
+        
+        Returns:
+            dict of SkillSupply count field -> count_by_area() result
+        """
+        skill_ids = [skill.id for skill in skills]
+        providers = ProviderSkill.objects.filter(
+            skill__in=skill_ids,
+            provider__is_active=True,
+        ).filter(
+            in_areas(locations, 'provider__city', 'provider__state')
+        ).values_list(
+            'provider_id', 'skill_id', 'provider__city', 'provider__state', 'provider__zip_code'
+        ).distinct().order_by()
+        offers = SkillSwapListing.skills_offered.through.objects.filter(
+            skillswaplisting__is_active=True,
+            skill__in=skill_ids,
+        ).filter(
+            in_areas(locations, 'skillswaplisting__user__city', 'skillswaplisting__user__state', either_place=True)
+        ).values_list(
+            'skillswaplisting__user__city', 'skillswaplisting__user__state',
+            'skillswaplisting__user__zip_code', 'skill_id'
+        )
+        freelance = FreelanceListing.skills.through.objects.filter(
+            freelancelisting__is_active=True,
+            skill__in=skill_ids,
+        ).filter(
+            in_areas(locations, 'freelancelisting__user__city', 'freelancelisting__user__state', either_place=True)
+        ).values_list(
+            'freelancelisting__user__city', 'freelancelisting__user__state',
+            'freelancelisting__user__zip_code', 'skill_id'
+        )
+        
+        return {
+            'provider_count': count_by_area(
+                (
+                    (city, state, zip_code, skill_id)
+                    for _, skill_id, city, state, zip_code in providers.iterator(chunk_size=5000)
+                ),
+                locations,
+            ),
+            'skill_swap_offers_count': count_by_area(offers.iterator(chunk_size=5000), locations, either_place=True),
+            'freelance_listings_count': count_by_area(freelance.iterator(chunk_size=5000), locations, either_place=True),
+        }
+    
+    @staticmethod
+    def changed_places(since, previous_period_start, period_start, stale_places=()):
+        """
+        Places whose demand or supply signals may have changed since a watermark.
+        
+        Read from updated_at / created_at (indexed scans of the rows changed
+        since the previous run, not of all data): jobs, providers, listings
+        and listing owners updated since `since`, jobs that left the
+        analysis window between the two period starts, and users updated
+        since (a new user can add a new area). Changes updated_at cannot
+        show (deletions, moves, listing skill edits, skill changes) come in
+        as stale places.
+        
+        Args:
+            since: watermark; rows updated from then on are changed
+            previous_period_start: start of the previous run's period
+            period_start: start of this run's period
+            stale_places: SkillAnalyticsStalePlace rows
+        
+        Returns:
+            tuple: (places, listing_places) as touched_locations() takes them
+        """
+        from apps.accounts.models import CustomUser
+        from .models import ServiceProvider
+        
+        def upper(rows):
+            return {((city or '').upper(), (state or '').upper()) for city, state in rows}
+        
+        places = upper(
+            UnifiedJob.objects.filter(
+                Q(updated_at__gte=since) | Q(created_at__gte=previous_period_start, created_at__lt=period_start)
+            ).values_list('service_city', 'service_state').distinct()
+        )
+        places |= upper(
+            ServiceProvider.objects.filter(updated_at__gte=since).values_list('city', 'state').distinct()
+        )
+        places |= upper(
+            CustomUser.objects.filter(updated_at__gte=since).values_list('city', 'state').distinct()
+        )
+        listing_places = set()
+        for listing_model in (SkillSwapListing, FreelanceListing):
+            listing_places |= upper(
+                listing_model.objects.filter(updated_at__gte=since).values_list('user__city', 'user__state').distinct()
+            )
+        listing_places |= upper(
+            CustomUser.objects.filter(
+                Q(skill_swap_listing__isnull=False) | Q(freelance_listing__isnull=False),
+                updated_at__gte=since,
+            ).values_list('city', 'state').distinct()
+        )
+        for place in stale_places:
+            (listing_places if place.listing else places).add((place.city.upper(), place.state.upper()))
+        return places, listing_places
+    
+    @staticmethod
+    def latest_scores(model, score_field, skills, locations):
+        """
+        Score of the current record of each skill and area, for trends.
+        
+        One query over the current records only.
+        
+        Returns:
+            dict of (skill id, city, state, zip code) -> score
+        """
+        rows = model.objects.filter(
+            skill__in=[skill.id for skill in skills],
+            city__in={city for city, _, _ in locations},
+            is_current=True,
+        ).values_list('skill_id', 'city', 'state', 'zip_code', score_field)
+        return {tuple(key): score for *key, score in rows.iterator(chunk_size=5000)}
+    
+    @staticmethod
+    def change_percent(score, previous_score):
+        """Percent change of a score from the previous record's, None without one."""
+        if previous_score is None or previous_score <= 0:
+            return None
+        return ((score - previous_score) / previous_score) * 100
+    
+    @staticmethod
+    def change_percent_fits(percent):
+        """Whether a change percent can be saved (None always can)."""
+        return percent is None or abs(percent.quantize(Decimal('0.01'))) < CHANGE_PERCENT_LIMIT
+    
+    @staticmethod
+    def market_opportunity(demand_score, supply_score):
+        """
+        Opportunity score and market status of a demand and supply score.
+        
+        Returns:
+            tuple: (opportunity_score, market_status)
+        """
+        # High opportunity = high demand, low supply
+        opportunity_score = Decimal('0')
+        if supply_score > 0:
+            opportunity_score = demand_score / supply_score
+        elif demand_score > 0:
+            opportunity_score = demand_score * 10  # High opportunity if no supply
+        
+        # Determine market status
+        if demand_score > supply_score * Decimal('1.5'):
+            market_status = 'high_opportunity'
+        elif supply_score > demand_score * Decimal('1.5'):
+            market_status = 'oversupplied'
+        elif demand_score == 0 and supply_score == 0:
+            market_status = 'emerging'
+        else:
+            market_status = 'balanced'
+        return opportunity_score, market_status
+    
+    @staticmethod
+    def build_analytics_records(skill, location, demand_counts, supply_counts, previous_demand,
+                                previous_supply, radius_miles, period_start, period_end):
+        """
+        Unsaved demand, supply and opportunity records of one skill in one area.
+        
+        Same numbers as update_skill_analytics, from the
+        demand_signal_counts / supply_signal_counts / latest_scores results.
+        A change percent too large for its column fails the pair there, as
+        a per-pair save would: the records before it are still returned.
+        
+        Returns:
+            tuple: (list of records, error message or None)
+        """
+        city, state, zip_code = location
+        area = {'skill': skill, 'city': city, 'state': state, 'zip_code': zip_code or ''}
+        key = (skill.id, city, state, zip_code or '')
+        
+        counts = {field: by_area[location].get(skill.id, 0) for field, by_area in demand_counts.items()}
+        demand_score = Decimal(str(counts['job_requests_count'] * 2 + counts['skill_swap_wants_count']))
+        previous_score = previous_demand.get(key)
+        demand_change_percent = SkillAnalyticsService.change_percent(demand_score, previous_score)
+        if not SkillAnalyticsService.change_percent_fits(demand_change_percent):
+            return [], f'demand change of {demand_change_percent:.2f}% is out of range'
+        demand = SkillDemand(
+            **area,
+            period_start=period_start,
+            period_end=period_end,
+            radius_miles=radius_miles,
+            demand_score=demand_score,
+            total_demand_signals=sum(counts.values()),
+            previous_demand_score=previous_score,
+            demand_change_percent=demand_change_percent,
+            **counts
+        )
+        
+        counts = {field: by_area[location].get(skill.id, 0) for field, by_area in supply_counts.items()}
+        supply_score = Decimal(str(
+            counts['provider_count'] * 3 + counts['skill_swap_offers_count'] + counts['freelance_listings_count'] * 2
+        ))
+        previous_score = previous_supply.get(key)
+        supply_change_percent = SkillAnalyticsService.change_percent(supply_score, previous_score)
+        if not SkillAnalyticsService.change_percent_fits(supply_change_percent):
+            return [demand], f'supply change of {supply_change_percent:.2f}% is out of range'
+        supply = SkillSupply(
+            **area,
+            period_start=period_start,
+            period_end=period_end,
+            radius_miles=radius_miles,
+            supply_score=supply_score,
+            total_supply_signals=sum(counts.values()),
+            previous_supply_score=previous_score,
+            supply_change_percent=supply_change_percent,
+            **counts
+        )
+        
+        opportunity_score, market_status = SkillAnalyticsService.market_opportunity(demand_score, supply_score)
+        opportunity = SkillMarketOpportunity(
+            **area,
+            period_start=period_start,
+            period_end=period_end,
+            demand_score=demand_score,
+            supply_score=supply_score,
+            opportunity_score=opportunity_score,
+            market_status=market_status,
+        )
+        return [demand, supply, opportunity], None
+    
+    @staticmethod
+    def save_analytics_records(records, batch_size=1000):
+        """
+        Upsert analytics records (any mix of the three models) in bulk.
+        
+        The records become the current ones of their skill and area: the
+        records they supersede are unflagged in the same transaction.
+        
+        Returns:
+            number of records written
+        """
+        by_model = defaultdict(list)
+        for record in records:
+            record.is_current = True
+            by_model[type(record)].append(record)
+        for model, rows in by_model.items():
+            skills_by_area = defaultdict(set)
+            for row in rows:
+                skills_by_area[(row.city, row.state, row.zip_code)].add(row.skill_id)
+            superseded = Q()
+            for (city, state, zip_code), skill_ids in skills_by_area.items():
+                superseded |= Q(city=city, state=state, zip_code=zip_code, skill_id__in=skill_ids)
+            with transaction.atomic():
+                model.objects.filter(superseded, is_current=True).update(is_current=False)
+                model.objects.bulk_create(
+                    rows,
+                    update_conflicts=True,
+                    unique_fields=RECORD_KEY_FIELDS,
+                    update_fields=[
+                        field.name for field in model._meta.concrete_fields
+                        if not field.primary_key and field.name not in RECORD_KEY_FIELDS
+                        and field.name != 'calculated_at'
+                    ],
+                    batch_size=batch_size,
+                )
+        return len(records)
+    
+    @staticmethod
+    def update_skill_analytics(skill, city, state, zip_code=None, radius_miles=25, days_back=30,
+                               provider_counts=None):
         """
         Update analytics for a specific skill in a geographic area.
         
+        provider_counts is passed on to calculate_supply_score().
+        
         Returns:
             tuple: (demand_record, supply_record, opportunity_record)
         """
@@ -189,22 +651,17 @@ class SkillAnalyticsService:
             city=city,
             state=state,
             zip_code=zip_code or '',
-        ).order_by('-calculated_at').first()
+            is_current=True,
+        ).first()
         
-        demand_change_percent = None
-        if previous_demand and previous_demand.demand_score > 0:
-            change = demand_data['demand_score'] - previous_demand.demand_score
-            demand_change_percent = (change / previous_demand.demand_score) * 100
+        demand_change_percent = SkillAnalyticsService.change_percent(
+            demand_data['demand_score'], previous_demand.demand_score if previous_demand else None
+        )
         
         # Create or update demand record
-        demand_record, _ = SkillDemand.objects.update_or_create(
-            skill=skill,
-            city=city,
-            state=state,
-            zip_code=zip_code or '',
-            period_start=demand_data['period_start'],
-            period_end=demand_data['period_end'],
-            defaults={
+        demand_record = SkillAnalyticsService._save_current(
+            SkillDemand, skill, city, state, zip_code, demand_data['period_start'], demand_data['period_end'],
+            {
                 'radius_miles': radius_miles,
                 'demand_score': demand_data['demand_score'],
                 'job_requests_count': demand_data['job_requests_count'],
@@ -217,7 +674,7 @@ class SkillAnalyticsService:
         
         # Calculate supply
         supply_data = SkillAnalyticsService.calculate_supply_score(
-            skill, city, state, zip_code, radius_miles, days_back
+            skill, city, state, zip_code, radius_miles, days_back, provider_counts
         )
         
         # Get previous period for trend calculation
@@ -226,22 +683,17 @@ class SkillAnalyticsService:
             city=city,
             state=state,
             zip_code=zip_code or '',
-        ).order_by('-calculated_at').first()
+            is_current=True,
+        ).first()
         
-        supply_change_percent = None
-        if previous_supply and previous_supply.supply_score > 0:
-            change = supply_data['supply_score'] - previous_supply.supply_score
-            supply_change_percent = (change / previous_supply.supply_score) * 100
+        supply_change_percent = SkillAnalyticsService.change_percent(
+            supply_data['supply_score'], previous_supply.supply_score if previous_supply else None
+        )
         
         # Create or update supply record
-        supply_record, _ = SkillSupply.objects.update_or_create(
-            skill=skill,
-            city=city,
-            state=state,
-            zip_code=zip_code or '',
-            period_start=supply_data['period_start'],
-            period_end=supply_data['period_end'],
-            defaults={
+        supply_record = SkillAnalyticsService._save_current(
+            SkillSupply, skill, city, state, zip_code, supply_data['period_start'], supply_data['period_end'],
+            {
                 'radius_miles': radius_miles,
                 'supply_score': supply_data['supply_score'],
                 'provider_count': supply_data['provider_count'],
@@ -254,32 +706,14 @@ class SkillAnalyticsService:
         )
         
         # Calculate opportunity score
-        # High opportunity = high demand, low supply
-        opportunity_score = Decimal('0')
-        if supply_record.supply_score > 0:
-            opportunity_score = demand_record.demand_score / supply_record.supply_score
-        elif demand_record.demand_score > 0:
-            opportunity_score = demand_record.demand_score * 10  # High opportunity if no supply
-        
-        # Determine market status
-        if demand_record.demand_score > supply_record.supply_score * 1.5:
-            market_status = 'high_opportunity'
-        elif supply_record.supply_score > demand_record.demand_score * 1.5:
-            market_status = 'oversupplied'
-        elif demand_record.demand_score == 0 and supply_record.supply_score == 0:
-            market_status = 'emerging'
-        else:
-            market_status = 'balanced'
+        opportunity_score, market_status = SkillAnalyticsService.market_opportunity(
+            demand_record.demand_score, supply_record.supply_score
+        )
         
         # Create or update opportunity record
-        opportunity_record, _ = SkillMarketOpportunity.objects.update_or_create(
-            skill=skill,
-            city=city,
-            state=state,
-            zip_code=zip_code or '',
-            period_start=demand_data['period_start'],
-            period_end=demand_data['period_end'],
-            defaults={
+        opportunity_record = SkillAnalyticsService._save_current(
+            SkillMarketOpportunity, skill, city, state, zip_code, demand_data['period_start'], demand_data['period_end'],
+            {
                 'demand_score': demand_record.demand_score,
                 'supply_score': supply_record.supply_score,
                 'opportunity_score': opportunity_score,
@@ -290,55 +724,79 @@ class SkillAnalyticsService:
         return demand_record, supply_record, opportunity_record
     
     @staticmethod
-    def get_top_opportunities(city, state, zip_code=None, limit=10):
-        """Get top skill opportunities in an area."""
-        opportunities = SkillMarketOpportunity.objects.filter(
-            city__iexact=city,
-            state__iexact=state,
-        )
+    def _save_current(model, skill, city, state, zip_code, period_start, period_end, values):
+        """
+        Save a record of a skill and area as its current one.
         
-        if zip_code:
-            opportunities = opportunities.filter(zip_code__startswith=zip_code[:5])
+        The previous current record is unflagged in the same transaction,
+        so it stays current if the save fails.
+        """
+        with transaction.atomic():
+            model.objects.filter(
+                skill=skill, city=city, state=state, zip_code=zip_code or '', is_current=True
+            ).update(is_current=False)
+            record, _ = model.objects.update_or_create(
+                skill=skill,
+                city=city,
+                state=state,
+                zip_code=zip_code or '',
+                period_start=period_start,
+                period_end=period_end,
+                defaults={'is_current': True, **values},
+            )
+        return record
+    
+    @staticmethod
+    def get_top_opportunities(city, state, zip_code=None, limit=10, days_back=30, signals=None):
+        """
+        Get top skill opportunities in an area, from the daily rollup.
         
-        return opportunities.filter(
-            market_status='high_opportunity'
-        ).order_by('-opportunity_score')[:limit]
+        signals: the area's get_area_signals() result, if already read
+        """
+        from .skill_rollup import get_area_signals
+        
+        if signals is None:
+            signals = get_area_signals(city, state, zip_code, days_back)
+        opportunities = [window for window in signals if window.market_status == 'high_opportunity']
+        opportunities.sort(key=lambda window: window.opportunity_score, reverse=True)
+        return opportunities[:limit]
     
     @staticmethod
-    def get_trending_skills(city, state, zip_code=None, limit=10):
-        """Get trending skills (demand increasing)."""
-        demands = SkillDemand.objects.filter(
-            city__iexact=city,
-            state__iexact=state,
-            demand_change_percent__gt=10,  # >10% increase
-        )
+    def get_trending_skills(city, state, zip_code=None, limit=10, days_back=30, signals=None):
+        """
+        Get trending skills (demand increasing), from the daily rollup.
         
-        if zip_code:
-            demands = demands.filter(zip_code__startswith=zip_code[:5])
+        Demand over the last days_back days is compared with the window
+        before it.
         
-        return demands.order_by('-demand_change_percent')[:limit]
+        signals: the area's get_area_signals() result, if already read
+        """
+        from .skill_rollup import get_area_signals
+        
+        if signals is None:
+            signals = get_area_signals(city, state, zip_code, days_back)
+        trending = [
+            window for window in signals
+            if window.demand_change_percent is not None and window.demand_change_percent > 10  # >10% increase
+        ]
+        trending.sort(key=lambda window: window.demand_change_percent, reverse=True)
+        return trending[:limit]
     
     @staticmethod
-    def get_user_skill_opportunities(user, limit=10):
-        """Get opportunities for skills the user offers."""
+    def get_user_skill_opportunities(user, limit=10, days_back=30):
+        """Get opportunities for skills the user offers, from the daily rollup."""
+        from .skill_rollup import get_area_signals
+        
         if not hasattr(user, 'skill_swap_listing') or not user.skill_swap_listing.is_active:
             return []
         
-        user_skills = user.skill_swap_listing.skills_offered.all()
-        city = user.city or ''
-        state = user.state or ''
-        zip_code = user.zip_code or ''
-        
-        opportunities = []
-        for skill in user_skills:
-            opp = SkillMarketOpportunity.objects.filter(
-                skill=skill,
-                city__iexact=city,
-                state__iexact=state,
-            ).order_by('-calculated_at').first()
-            
-            if opp:
-                opportunities.append(opp)
+        user_skill_ids = set(user.skill_swap_listing.skills_offered.values_list('id', flat=True))
+        if not user_skill_ids:
+            return []
+        opportunities = [
+            window for window in get_area_signals(user.city or '', user.state or '', user.zip_code, days_back)
+            if window.skill.id in user_skill_ids
+        ]
         
         # Sort by opportunity score
         opportunities.sort(key=lambda x: x.opportunity_score, reverse=True)
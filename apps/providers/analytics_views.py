@@ -1,5 +1,8 @@
 """
 Views for skill analytics dashboard.
+
+The dashboard reads the daily rollup (apps/providers/skill_rollup.py), so any
+lookback window is a few index reads rather than a pipeline run.
 """
 
 from django.shortcuts import render, redirect
@@ -11,7 +14,7 @@ from django.utils import timezone
 from datetime import timedelta
 
 from .analytics_service import SkillAnalyticsService
-from .skill_analytics import SkillDemand, SkillSupply, SkillMarketOpportunity
+from .skill_rollup import MAX_LOOKBACK_DAYS, get_area_signals
 from apps.accounts.modes_models import Skill
 
 
@@ -29,7 +32,7 @@ class SkillAnalyticsDashboardView(LoginRequiredMixin, TemplateView):
         state = self.request.GET.get('state', user.state or '')
         zip_code = self.request.GET.get('zip_code', user.zip_code or '')
         radius = int(self.request.GET.get('radius', 25))
-        days_back = int(self.request.GET.get('days_back', 30))
+        days_back = min(max(int(self.request.GET.get('days_back', 30)), 1), MAX_LOOKBACK_DAYS)
         
         if not city or not state:
             # Default to a common location if user hasn't set one
@@ -42,30 +45,28 @@ class SkillAnalyticsDashboardView(LoginRequiredMixin, TemplateView):
         context['radius'] = radius
         context['days_back'] = days_back
         
+        # Every skill's signals in the area over the window, read once
+        signals = get_area_signals(city, state, zip_code, days_back)
+        
         # Get top opportunities (high demand, low supply)
         top_opportunities = SkillAnalyticsService.get_top_opportunities(
-            city, state, zip_code, limit=10
+            city, state, zip_code, limit=10, signals=signals
         )
         context['top_opportunities'] = top_opportunities
         
         # Get trending skills (demand increasing)
         trending_skills = SkillAnalyticsService.get_trending_skills(
-            city, state, zip_code, limit=10
+            city, state, zip_code, limit=10, signals=signals
         )
         context['trending_skills'] = trending_skills
         
         # Get oversupplied skills
-        oversupplied = SkillMarketOpportunity.objects.filter(
-            city__iexact=city,
-            state__iexact=state,
-            market_status='oversupplied',
-        )
-        if zip_code:
-            oversupplied = oversupplied.filter(zip_code__startswith=zip_code[:5])
-        context['oversupplied_skills'] = oversupplied.order_by('-supply_score')[:10]
+        oversupplied = [window for window in signals if window.market_status == 'oversupplied']
+        oversupplied.sort(key=lambda window: window.supply_score, reverse=True)
+        context['oversupplied_skills'] = oversupplied[:10]
         
         # Get user's skill opportunities
-        user_opportunities = SkillAnalyticsService.get_user_skill_opportunities(user, limit=10)
+        user_opportunities = SkillAnalyticsService.get_user_skill_opportunities(user, limit=10, days_back=days_back)
         context['user_opportunities'] = user_opportunities
         
         # Get user's skills
@@ -83,12 +84,10 @@ class SkillAnalyticsDashboardView(LoginRequiredMixin, TemplateView):
         )
         
         # Get personalized insights
-        context['insights'] = self._generate_insights(user, city, state, zip_code, user_opportunities)
+        context['insights'] = self._generate_insights(user, signals, user_opportunities)
         
         # Get skill recommendations
-        context['recommendations'] = self._get_recommendations(
-            user, city, state, zip_code, user_skills
-        )
+        context['recommendations'] = self._get_recommendations(user, signals, user_skills)
         
         return context
     
@@ -114,7 +113,7 @@ class SkillAnalyticsDashboardView(LoginRequiredMixin, TemplateView):
         }
         return chart_data
     
-    def _generate_insights(self, user, city, state, zip_code, user_opportunities):
+    def _generate_insights(self, user, signals, user_opportunities):
         """Generate personalized insights for the user."""
         insights = []
         
@@ -136,13 +135,10 @@ class SkillAnalyticsDashboardView(LoginRequiredMixin, TemplateView):
             })
         
         # Trending insight
-        trending_demands = SkillDemand.objects.filter(
-            city__iexact=city,
-            state__iexact=state,
-            demand_change_percent__gt=20,
-        )
-        if zip_code:
-            trending_demands = trending_demands.filter(zip_code__startswith=zip_code[:5])
+        trending_demands = [
+            window for window in signals
+            if window.demand_change_percent is not None and window.demand_change_percent > 20
+        ]
         
         user_skill_names = {opp.skill.name for opp in user_opportunities}
         for trend in trending_demands[:3]:
@@ -171,7 +167,7 @@ class SkillAnalyticsDashboardView(LoginRequiredMixin, TemplateView):
         
         return insights
     
-    def _get_recommendations(self, user, city, state, zip_code, user_skills):
+    def _get_recommendations(self, user, signals, user_skills):
         """Get skill recommendations for the user."""
         recommendations = []
         
@@ -179,13 +175,13 @@ class SkillAnalyticsDashboardView(LoginRequiredMixin, TemplateView):
         user_skill_ids = {skill.id for skill in user_skills}
         
         # Get high opportunity skills that user doesn't have
-        opportunities = SkillMarketOpportunity.objects.filter(
-            city__iexact=city,
-            state__iexact=state,
-            market_status='high_opportunity',
-        ).exclude(skill_id__in=user_skill_ids).order_by('-opportunity_score')[:5]
+        opportunities = [
+            window for window in signals
+            if window.market_status == 'high_opportunity' and window.skill.id not in user_skill_ids
+        ]
+        opportunities.sort(key=lambda window: window.opportunity_score, reverse=True)
         
-        for opp in opportunities:
+        for opp in opportunities[:5]:
             # Check if there are skill swap opportunities to learn
             from apps.accounts.modes_models import SkillSwapListing
             swap_opportunities = SkillSwapListing.objects.filter(
@@ -2,13 +2,15 @@
 API Views for providers.
 """
 
-from rest_framework import viewsets, filters
+from rest_framework import viewsets, filters, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Avg
 
+from . import result_cache
 from .models import ServiceCategory, ServiceProvider
+from .pagination import ProviderSearchPagination
+from .search import ProviderSearchService
 from .serializers import (
     ServiceCategorySerializer,
     ServiceProviderListSerializer,
@@ -41,17 +43,27 @@ class ServiceProviderViewSet(viewsets.ReadOnlyModelViewSet):
     - city: Filter by city name
     - state: Filter by state
     - zip: Filter by zip code prefix
+    - radius: With zip, return providers serving within this many miles,
+      annotated with `distance`
     - verified: Filter verified only (true/false)
     - pricing: Filter by pricing range ($, $$, $$$, $$$$)
-    - search: Search in name, description, skills
-    - ordering: Sort by field (-average_rating, name, -created_at)
+    - accepts_credits / accepts_barter: Filter by job acceptance (true/false)
+    - search: Full-text search over name, tagline, skills, description
+    - sort: relevance, distance, rating, reviews, newest, name (relevance
+      is the default when searching, distance for radius searches)
+    - ordering: Sort by field (name, created_at, pricing_range)
+    - cursor: Keyset pagination; pass an empty cursor for the first page and
+      follow `next`/`previous` (page numbers via `page` still work)
+    - count: exact, capped or estimate total in cursor mode
+    
+    List responses include `facets`: result counts per category, pricing,
+    state and flag value, each honouring all the other active filters.
     """
     
     queryset = ServiceProvider.objects.filter(is_active=True).select_related('category')
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['name', 'description', 'skills', 'tagline']
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     ordering_fields = ['name', 'created_at', 'pricing_range']
-    ordering = ['-is_featured', '-created_at']
+    pagination_class = ProviderSearchPagination
     
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -59,42 +71,19 @@ class ServiceProviderViewSet(viewsets.ReadOnlyModelViewSet):
         return ServiceProviderListSerializer
     
     def get_queryset(self):
-        queryset = super().get_queryset()
-        
-        # Filter by category
-        category = self.request.query_params.get('category')
-        if category:
-            queryset = queryset.filter(category__slug=category)
-        
-        # Filter by city
-        city = self.request.query_params.get('city')
-        if city:
-            queryset = queryset.filter(city__icontains=city)
-        
-        # Filter by state
-        state = self.request.query_params.get('state')
-        if state:
-            queryset = queryset.filter(state__icontains=state)
-        
-        # Filter by zip code
-        zip_code = self.request.query_params.get('zip')
-        if zip_code:
-            queryset = queryset.filter(zip_code__startswith=zip_code)
-        
-        # Filter verified only
-        verified = self.request.query_params.get('verified')
-        if verified and verified.lower() == 'true':
-            queryset = queryset.filter(is_verified=True)
-        
-        # Filter by pricing
-        pricing = self.request.query_params.get('pricing')
-        if pricing:
-            queryset = queryset.filter(pricing_range=pricing)
-        
-        # Annotate with average rating for ordering
-        queryset = queryset.annotate(avg_rating=Avg('reviews__rating'))
-        
-        return queryset
+        # Full-text search, filters and sort shared with the HTML search page
+        return ProviderSearchService.search(
+            self.request.query_params, query_param='search', default_sort=''
+        )
+    
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if isinstance(response.data, dict):
+            # Counts per category/pricing/state/flag value for filter UIs
+            response.data['facets'] = result_cache.cached_facet_counts(
+                request.query_params, query_param='search'
+            )
+        return response
     
     @action(detail=False, methods=['get'])
     def featured(self, request):
@@ -106,10 +95,17 @@ class ServiceProviderViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=False, methods=['get'])
     def top_rated(self, request):
         """Get top rated providers."""
-        top_rated = self.get_queryset().order_by('-avg_rating')[:6]
+        top_rated = self.get_queryset().order_by('-rank_score', '-id')[:6]
         serializer = ServiceProviderListSerializer(top_rated, many=True)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get', 'delete'], permission_classes=[permissions.IsAdminUser])
+    def cache_stats(self, request):
+        """Hit/miss counters of the listing result cache (DELETE resets them)."""
+        if request.method == 'DELETE':
+            result_cache.reset_stats()
+        return Response(result_cache.get_stats())
+    
     @action(detail=True, methods=['get'])
     def reviews(self, request, pk=None):
         """Get reviews for a specific provider."""
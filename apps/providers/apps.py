@@ -9,4 +9,7 @@ class ProvidersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.providers'
     verbose_name = 'Service Providers'
-
+    
+    def ready(self):
+        """Import signals when app is ready."""
+        import apps.providers.signals  # noqa
@@ -0,0 +1,222 @@
+"""
+In-memory "available now" index for emergency mode.
+
+Keeps every active, emergency-ready provider in per-category, per-city
+buckets, each sorted the way emergency mode lists providers (best rated,
+then verified). A lookup merges the matching buckets and splits them into
+available-now and available-soon using each provider's heartbeat expiry, so
+the view needs no scoring or sorting query of its own - only one query to
+hydrate the providers it shows.
+
+The index lives in process memory. Changes made in this process are applied
+in place and, when they actually change an entry, published: a version
+number in the Django cache is bumped and the changed provider ids are stored
+under that version, so other processes re-read just those providers. A
+process that cannot replay every version since its own (entries expired or
+evicted, or too many of them) rebuilds its copy (one query over
+emergency-ready providers), and so does one whose copy is older than
+AVAILABILITY_INDEX_MAX_AGE seconds, which bounds staleness when the cache is
+not shared between processes (LocMemCache).
+"""
+
+import heapq
+import threading
+import time
+from bisect import insort
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import ServiceProvider
+
+
+VERSION_KEY = 'providers:availability:version'
+CHANGES_KEY = 'providers:availability:changes:{version}'
+
+# Seconds the changed ids of a version are kept for other processes to replay
+CHANGES_TIMEOUT = 3600
+
+# Most versions replayed from their changes; a process further behind rebuilds
+MAX_REPLAYED_VERSIONS = 500
+
+INDEX_FIELDS = [
+    'id', 'category_id', 'city', 'rating_avg', 'is_verified',
+    'is_available_now', 'availability_heartbeat_at', 'availability_window_minutes',
+]
+
+# Provider fields a save must change for the index to be refreshed
+INDEXED_PROVIDER_FIELDS = INDEX_FIELDS[1:] + ['is_active', 'accepts_emergency']
+
+AvailabilityEntry = namedtuple('AvailabilityEntry', ['sort_key', 'provider_id', 'available_until'])
+
+
+def normalize_city(city):
+    return ' '.join((city or '').lower().split())
+
+
+def available_until_timestamp(is_available_now, heartbeat_at, window_minutes):
+    """Epoch seconds when availability lapses (inf: never, 0: not available)."""
+    if not is_available_now:
+        return 0.0
+    if not window_minutes:
+        return float('inf')
+    if heartbeat_at is None:
+        return 0.0
+    return heartbeat_at.timestamp() + window_minutes * 60
+
+
+class AvailabilityIndex:
+    """Emergency-ready providers bucketed by category id and normalized city."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._locations = {}
+        self._version = None
+        self._built_at = None
+    
+    def _shared_version(self):
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            cache.add(VERSION_KEY, 1, timeout=None)
+            version = cache.get(VERSION_KEY, 1)
+        return version
+    
+    def _ensure_current(self):
+        version = self._shared_version()
+        max_age = getattr(settings, 'AVAILABILITY_INDEX_MAX_AGE', 300)
+        if self._version is None or time.monotonic() - self._built_at > max_age:
+            self._rebuild(version)
+        elif version != self._version and not self._replay(version):
+            self._rebuild(version)
+    
+    def _replay(self, version):
+        """Re-read the providers changed by versions after ours; False if they cannot all be."""
+        missed = range(self._version + 1, version + 1)
+        if not 0 < len(missed) <= MAX_REPLAYED_VERSIONS:
+            return False
+        keys = [CHANGES_KEY.format(version=missed_version) for missed_version in missed]
+        changes = cache.get_many(keys)
+        if len(changes) < len(keys):
+            return False
+        self._reindex(set().union(*changes.values()))
+        self._version = version
+        return True
+    
+    def _rebuild(self, version):
+        rows = ServiceProvider.objects.filter(
+            is_active=True, accepts_emergency=True
+        ).values_list(*INDEX_FIELDS)
+        self._buckets = {}
+        self._locations = {}
+        for row in rows.iterator(chunk_size=2000):
+            self._insert(*row)
+        self._version = version
+        self._built_at = time.monotonic()
+    
+    def _insert(self, provider_id, category_id, city, rating_avg, is_verified,
+                is_available_now, heartbeat_at, window_minutes):
+        location = (category_id, normalize_city(city))
+        entry = AvailabilityEntry(
+            # Emergency mode order: best rated, then verified; id keeps it stable
+            (-(rating_avg or 0), not is_verified, provider_id),
+            provider_id,
+            available_until_timestamp(is_available_now, heartbeat_at, window_minutes),
+        )
+        insort(self._buckets.setdefault(location, []), entry)
+        self._locations[provider_id] = (location, entry)
+    
+    def _remove(self, provider_id):
+        location, entry = self._locations.pop(provider_id, (None, None))
+        if location is None:
+            return
+        bucket = self._buckets[location]
+        bucket.remove(entry)
+        if not bucket:
+            del self._buckets[location]
+    
+    def _reindex(self, provider_ids):
+        """
+        Re-read some providers into the index.
+        
+        Returns:
+            set of the provider ids whose entries changed
+        """
+        rows = ServiceProvider.objects.filter(
+            id__in=provider_ids, is_active=True, accepts_emergency=True
+        ).values_list(*INDEX_FIELDS)
+        previous = {provider_id: self._locations.get(provider_id) for provider_id in provider_ids}
+        for provider_id in provider_ids:
+            self._remove(provider_id)
+        for row in rows:
+            self._insert(*row)
+        return {
+            provider_id for provider_id in provider_ids
+            if self._locations.get(provider_id) != previous[provider_id]
+        }
+    
+    def refresh(self, provider_ids):
+        """
+        Re-read the given providers into the index.
+        
+        Call after availability, emergency, category, city, rating or
+        activity changes (the providers signals do this for model saves).
+        Only providers whose entries changed are published to other
+        processes.
+        """
+        with self._lock:
+            self._ensure_current()
+            changed = self._reindex(set(provider_ids))
+            if changed:
+                self._publish(changed)
+    
+    def _publish(self, provider_ids):
+        """Store the changed ids under a new version, keeping this (already updated) copy current."""
+        try:
+            version = cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.add(VERSION_KEY, 1, timeout=None)
+            version = cache.get(VERSION_KEY, 1)
+        cache.set(CHANGES_KEY.format(version=version), sorted(provider_ids), timeout=CHANGES_TIMEOUT)
+        if version == self._version + 1:
+            self._version = version
+    
+    def lookup(self, category_id=None, city='', now=None):
+        """
+        Emergency-ready providers for a category and city.
+        
+        Args:
+            category_id: restrict to one category (None for all)
+            city: case-insensitive substring of the provider's city, as in
+                the city filter of the search page
+            now: epoch seconds to evaluate heartbeat expiry at
+        
+        Returns:
+            (available_now_ids, available_soon_ids), each best rated first
+        """
+        now = time.time() if now is None else now
+        city = normalize_city(city)
+        with self._lock:
+            self._ensure_current()
+            buckets = [
+                bucket for (bucket_category, bucket_city), bucket in self._buckets.items()
+                if (category_id is None or bucket_category == category_id)
+                and city in bucket_city
+            ]
+            available_now, available_soon = [], []
+            for entry in heapq.merge(*buckets):
+                if entry.available_until > now:
+                    available_now.append(entry.provider_id)
+                else:
+                    available_soon.append(entry.provider_id)
+        return available_now, available_soon
+
+
+availability_index = AvailabilityIndex()
+
+
+def record_heartbeat(provider):
+    """Confirm a provider is available now and update the index."""
+    provider.record_availability_heartbeat()
+    availability_index.refresh([provider.pk])
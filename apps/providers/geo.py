@@ -0,0 +1,190 @@
+"""
+Offline ZIP-code geocoding and radius search helpers.
+
+Coordinates come from a bundled table of US ZIP centroids
+(data/zip_centroids.csv.gz, derived from the MIT-licensed `zipcodes`
+package data), so no external geocoding service or PostGIS is needed.
+"""
+
+import csv
+import gzip
+import math
+from functools import lru_cache
+from pathlib import Path
+
+from django.db.models import F, FloatField, Func
+
+
+ZIP_CENTROIDS_PATH = Path(__file__).resolve().parent / 'data' / 'zip_centroids.csv.gz'
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE_LAT = 69.0
+
+DEFAULT_RADIUS_MILES = 25
+MAX_RADIUS_MILES = 500
+RADIUS_OPTIONS = [5, 10, 25, 50, 100]
+
+# Grid used to bucket providers for the indexed prefilter: half-degree cells
+# (about 35 x 25 miles in the continental US)
+CELLS_PER_DEGREE = 2
+MAX_PREFILTER_CELLS = 400
+
+
+@lru_cache(maxsize=1)
+def load_zip_centroids():
+    """Read the bundled ZIP table into {zip_code: (latitude, longitude)}."""
+    with gzip.open(ZIP_CENTROIDS_PATH, 'rt', newline='') as handle:
+        return {
+            row['zip_code']: (float(row['latitude']), float(row['longitude']))
+            for row in csv.DictReader(handle)
+        }
+
+
+def normalize_zip(zip_code):
+    """Reduce '94102-1234' / ' 94102 ' to the 5-digit ZIP, or '' if invalid."""
+    digits = (zip_code or '').strip().split('-')[0]
+    if len(digits) == 5 and digits.isdigit():
+        return digits
+    return ''
+
+
+def zip_to_coordinates(zip_code):
+    """
+    Look up the centroid of a US ZIP code.
+    
+    Returns:
+        (latitude, longitude) tuple or None if the ZIP is unknown
+    """
+    zip_code = normalize_zip(zip_code)
+    if not zip_code:
+        return None
+    return load_zip_centroids().get(zip_code)
+
+
+def parse_radius(value, default=None):
+    """Parse a radius query parameter in miles, clamped to MAX_RADIUS_MILES."""
+    try:
+        radius = float(value)
+    except (TypeError, ValueError):
+        return default
+    if not math.isfinite(radius) or radius <= 0:
+        return default
+    return min(radius, MAX_RADIUS_MILES)
+
+
+def bounding_box(latitude, longitude, radius_miles):
+    """
+    Lat/lon box that fully contains the circle around a point.
+    
+    Used as an index-friendly prefilter before the exact haversine check.
+    
+    Returns:
+        (min_lat, max_lat, min_lon, max_lon)
+    """
+    lat_delta = radius_miles / MILES_PER_DEGREE_LAT
+    # Longitude degrees shrink towards the poles; use the widest latitude in the box
+    widest_lat = min(abs(latitude) + lat_delta, 89.9)
+    lon_delta = radius_miles / (MILES_PER_DEGREE_LAT * math.cos(math.radians(widest_lat)))
+    return (
+        latitude - lat_delta,
+        latitude + lat_delta,
+        max(longitude - lon_delta, -180.0),
+        min(longitude + lon_delta, 180.0),
+    )
+
+
+def geo_cell(latitude, longitude):
+    """Integer id of the grid cell containing a point."""
+    row = math.floor((latitude + 90) * CELLS_PER_DEGREE)
+    column = math.floor((longitude + 180) * CELLS_PER_DEGREE)
+    return row * 360 * CELLS_PER_DEGREE + column
+
+
+def geo_cells_for_box(min_lat, max_lat, min_lon, max_lon):
+    """
+    Ids of all grid cells overlapping a bounding box.
+    
+    Returns:
+        list of cell ids, or None when the box spans more than
+        MAX_PREFILTER_CELLS cells (the plain bounding box is then used)
+    """
+    first_row, first_column = divmod(geo_cell(min_lat, min_lon), 360 * CELLS_PER_DEGREE)
+    last_row, last_column = divmod(geo_cell(max_lat, max_lon), 360 * CELLS_PER_DEGREE)
+    if (last_row - first_row + 1) * (last_column - first_column + 1) > MAX_PREFILTER_CELLS:
+        return None
+    return [
+        row * 360 * CELLS_PER_DEGREE + column
+        for row in range(first_row, last_row + 1)
+        for column in range(first_column, last_column + 1)
+    ]
+
+
+def bounding_box_filter(latitude, longitude, radius_miles, prefix='', use_cells=False):
+    """
+    Queryset filter kwargs for bounding_box() on `latitude`/`longitude` columns.
+    
+    With `use_cells` the filter also restricts the indexed `geo_cell` column to
+    the cells overlapping the box, which keeps the index scan proportional to
+    the area searched rather than to a whole band of latitude.
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_miles)
+    lookups = {
+        f'{prefix}latitude__gte': min_lat,
+        f'{prefix}latitude__lte': max_lat,
+        f'{prefix}longitude__gte': min_lon,
+        f'{prefix}longitude__lte': max_lon,
+    }
+    if use_cells:
+        cells = geo_cells_for_box(min_lat, max_lat, min_lon, max_lon)
+        if cells is not None:
+            lookups[f'{prefix}geo_cell__in'] = cells
+    return lookups
+
+
+def haversine_miles(lat1, lon1, lat2, lon2):
+    """Great-circle distance in miles between two points."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_MILES * math.asin(math.sqrt(min(a, 1.0)))
+
+
+class HaversineDistance(Func):
+    """
+    Great-circle distance in miles from a fixed point to the row's
+    `latitude`/`longitude` columns (or `<prefix>latitude`/`<prefix>longitude`).
+    
+    Compiled as a single SQL expression; the point's trigonometry is done in
+    Python so the database only evaluates the per-row terms.
+    """
+    
+    arity = 2
+    output_field = FloatField()
+    template = (
+        '%(diameter)s * ASIN(SQRT(LEAST(1.0, '
+        'POWER(SIN((RADIANS(%(latitude)s) - %(point_lat)s) / 2), 2) + '
+        '%(cos_point_lat)s * COS(RADIANS(%(latitude)s)) * '
+        'POWER(SIN((RADIANS(%(longitude)s) - %(point_lon)s) / 2), 2))))'
+    )
+    
+    def __init__(self, latitude, longitude, prefix=''):
+        self.point = (latitude, longitude)
+        super().__init__(F(f'{prefix}latitude'), F(f'{prefix}longitude'))
+    
+    def as_sql(self, compiler, connection, **extra_context):
+        lat_sql, lat_params = compiler.compile(self.source_expressions[0])
+        lon_sql, lon_params = compiler.compile(self.source_expressions[1])
+        point_lat, point_lon = (math.radians(value) for value in self.point)
+        # Constants are formatted as float literals; they come from our own
+        # lookup table, never from user input
+        sql = self.template % {
+            'diameter': repr(2 * EARTH_RADIUS_MILES),
+            'latitude': lat_sql,
+            'longitude': lon_sql,
+            'point_lat': repr(float(point_lat)),
+            'point_lon': repr(float(point_lon)),
+            'cos_point_lat': repr(float(math.cos(point_lat))),
+        }
+        return sql, (*lat_params, *lat_params, *lon_params)
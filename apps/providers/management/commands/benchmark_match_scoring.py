@@ -0,0 +1,118 @@
+"""
+Management command to benchmark the vectorized smart match scoring.
+
+Times match_scoring.score_candidates() plus top_k() against scoring and
+sorting synthetic candidates with the per-provider
+views.calculate_match_score(), for each urgency/priority combination.
+Parity of the two is covered by apps/providers/tests/test_match_scoring.py.
+Nothing is written to the database.
+"""
+
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.providers.forms import MatchingQuizForm
+from apps.providers.match_scoring import CandidateFeatures, PRICING_TIERS, score_candidates, top_k
+from apps.providers.models import ServiceProvider
+from apps.providers.views import calculate_match_score
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the vectorized smart match scores against the per-provider score'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--candidates',
+            type=int,
+            default=50000,
+            help='Number of synthetic candidates (default: 50000)',
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=5,
+            help='Matches to select (default: 5)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Timed runs of the vectorized scorer (default: 20)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=7,
+            help='Random seed for the synthetic candidates (default: 7)',
+        )
+    
+    def handle(self, *args, **options):
+        count = options['candidates']
+        k = options['top']
+        repeat = options['repeat']
+        
+        providers = self._make_providers(count, random.Random(options['seed']))
+        features = CandidateFeatures(
+            [provider.id for provider in providers],
+            [provider.rating_avg for provider in providers],
+            [provider.rating_count for provider in providers],
+            [provider.is_verified for provider in providers],
+            [provider.is_featured for provider in providers],
+            [provider.years_experience for provider in providers],
+            [PRICING_TIERS.get(provider.pricing_range, 0) for provider in providers],
+        )
+        
+        self.stdout.write(f'{count} candidates, top {k}\n')
+        self.stdout.write(f'  {"urgency / priority":<28}{"python ms":>12}{"numpy ms":>12}{"speedup":>10}')
+        
+        for urgency, _ in MatchingQuizForm.URGENCY_CHOICES:
+            for priority, _ in MatchingQuizForm.PRIORITY_CHOICES:
+                started = time.perf_counter()
+                scores = [
+                    calculate_match_score(provider, urgency, None, priority)
+                    for provider in providers
+                ]
+                # Ranked too, as top_k() is in the vectorized timing
+                sorted(range(count), key=lambda i: scores[i], reverse=True)[:k]
+                python_ms = (time.perf_counter() - started) * 1000
+                
+                numpy_ms = self._time(
+                    lambda: top_k(score_candidates(features, urgency, priority), k), repeat
+                )
+                speedup = python_ms / numpy_ms if numpy_ms else 0
+                self.stdout.write(
+                    f'  {f"{urgency} / {priority}":<28}{python_ms:>12.2f}{numpy_ms:>12.3f}'
+                    f'{speedup:>9.0f}x'
+                )
+        
+        self.stdout.write(self.style.SUCCESS('\nDone.'))
+    
+    def _make_providers(self, count, rng):
+        """Unsaved providers with realistic (and tie-heavy) scoring fields."""
+        pricing = list(PRICING_TIERS) + ['']
+        providers = []
+        for i in range(count):
+            rated = rng.random() < 0.8
+            providers.append(ServiceProvider(
+                id=i + 1,
+                rating_avg=round(rng.uniform(1, 5), rng.choice([1, 2, 6])) if rated else 0.0,
+                rating_count=rng.choice([0, 1, 4, 5, 7, 8, 10, 14, 15, 40]) if rated else 0,
+                is_verified=rng.random() < 0.4,
+                is_featured=rng.random() < 0.1,
+                years_experience=rng.choice([0, 1, 3, 5, 8, 12, 25]),
+                pricing_range=rng.choice(pricing),
+            ))
+        return providers
+    
+    def _time(self, fn, repeat):
+        """Median wall time in milliseconds (after one warm-up run)."""
+        fn()
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - started) * 1000)
+        return statistics.median(samples)
@@ -0,0 +1,217 @@
+"""
+Management command to benchmark provider search: full-text vs legacy icontains,
+plus ZIP radius search and facet counts.
+
+Synthetic providers are inserted inside a transaction that is rolled back at
+the end, so the command can be run against a development database safely.
+"""
+
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from django.http import QueryDict
+
+from apps.providers.geo import geo_cell, load_zip_centroids
+from apps.providers.models import ServiceCategory, ServiceProvider
+from apps.providers.search import ProviderSearchService
+
+
+TRADE_WORDS = [
+    'plumbing', 'electrical', 'roofing', 'painting', 'landscaping', 'cleaning',
+    'carpentry', 'hvac', 'flooring', 'drywall', 'tiling', 'moving', 'handyman',
+    'remodeling', 'welding', 'masonry', 'pest', 'locksmith', 'appliance', 'gutter',
+]
+FILLER_WORDS = [
+    'reliable', 'licensed', 'family', 'owned', 'local', 'affordable', 'quality',
+    'service', 'repair', 'install', 'residential', 'commercial', 'fast', 'friendly',
+    'experienced', 'insured', 'professional', 'emergency', 'estimates', 'guaranteed',
+]
+DEFAULT_QUERIES = ['plumbing', 'licensed electrical', 'roof', 'emergency hvac repair']
+DEFAULT_RADIUS_ZIPS = ['94102', '10001', '60601', '59001']
+BENCHMARK_STATES = ['CA', 'NY', 'IL', 'TX', 'WA', 'MT']
+PRICING_VALUES = [value for value, label in ServiceProvider.PRICING_CHOICES]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark full-text provider search against the legacy icontains path'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=str,
+            default='10000,100000,1000000',
+            help='Comma-separated table sizes to benchmark (default: 10000,100000,1000000)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Timed runs per query (default: 5)',
+        )
+        parser.add_argument(
+            '--query',
+            action='append',
+            dest='queries',
+            help='Search text to benchmark (repeatable)',
+        )
+        parser.add_argument(
+            '--zip',
+            action='append',
+            dest='zips',
+            help='ZIP code to benchmark radius search around (repeatable)',
+        )
+        parser.add_argument(
+            '--radius',
+            type=float,
+            default=25,
+            help='Radius in miles for the radius search benchmark (default: 25)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows per bulk insert (default: 5000)',
+        )
+    
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options['rows'].split(',') if size.strip())
+        queries = options['queries'] or DEFAULT_QUERIES
+        zips = options['zips'] or DEFAULT_RADIUS_ZIPS
+        radius = options['radius']
+        repeat = options['repeat']
+        batch_size = options['batch_size']
+        
+        rng = random.Random(42)
+        
+        with transaction.atomic():
+            category, _ = ServiceCategory.objects.get_or_create(
+                slug='benchmark-search',
+                defaults={'name': 'Benchmark Search'},
+            )
+            inserted = ServiceProvider.objects.filter(is_active=True).count()
+            
+            for size in sizes:
+                if size > inserted:
+                    self.stdout.write(f'Inserting {size - inserted} synthetic providers...')
+                    self._insert_providers(category, inserted, size, batch_size, rng)
+                    inserted = size
+                    with connection.cursor() as cursor:
+                        cursor.execute('ANALYZE providers_serviceprovider')
+                
+                self.stdout.write(self.style.MIGRATE_HEADING(f'\n{inserted} active providers'))
+                self.stdout.write(f'  {"query":<28}{"icontains ms":>14}{"full-text ms":>14}{"speedup":>10}')
+                
+                for query in queries:
+                    legacy_ms = self._time(lambda: self._run_icontains(query), repeat)
+                    fts_ms = self._time(lambda: self._run_full_text(query), repeat)
+                    speedup = legacy_ms / fts_ms if fts_ms else 0
+                    self.stdout.write(
+                        f'  {query[:27]:<28}{legacy_ms:>14.2f}{fts_ms:>14.2f}{speedup:>9.1f}x'
+                    )
+                
+                self.stdout.write(f'\n  {"zip / radius":<28}{"matches":>14}{"radius ms":>14}')
+                for zip_code in zips:
+                    matches = self._run_radius(zip_code, radius)
+                    radius_ms = self._time(lambda: self._run_radius(zip_code, radius), repeat)
+                    self.stdout.write(
+                        f'  {f"{zip_code} / {radius:g} mi":<28}{matches:>14}{radius_ms:>14.2f}'
+                    )
+                
+                self.stdout.write(f'\n  {"facets for":<28}{"results ms":>14}{"facets ms":>14}{"ratio":>10}')
+                facet_params = [('(none)', {}), *[(query, {'q': query}) for query in queries]]
+                facet_params.append((f'{zips[0]} / {radius:g} mi', {'zip': zips[0], 'radius': str(radius)}))
+                for label, values in facet_params:
+                    params = QueryDict(mutable=True)
+                    params.update({**values, 'verified': 'true', 'pricing': '$$'})
+                    results_ms = self._time(lambda: self._run_results(params), repeat)
+                    facets_ms = self._time(lambda: ProviderSearchService.facet_counts(params), repeat)
+                    ratio = facets_ms / results_ms if results_ms else 0
+                    self.stdout.write(
+                        f'  {label[:27]:<28}{results_ms:>14.2f}{facets_ms:>14.2f}{ratio:>9.1f}x'
+                    )
+            
+            # Never keep the synthetic rows
+            transaction.set_rollback(True)
+        
+        self.stdout.write(self.style.SUCCESS('\nDone. Synthetic rows were rolled back.'))
+    
+    def _insert_providers(self, category, start, end, batch_size, rng):
+        """Bulk insert providers numbered [start, end), spread over real ZIP codes."""
+        centroids = sorted(load_zip_centroids().items())
+        for batch_start in range(start, end, batch_size):
+            batch = []
+            for i in range(batch_start, min(batch_start + batch_size, end)):
+                trades = rng.sample(TRADE_WORDS, 3)
+                zip_code, (latitude, longitude) = rng.choice(centroids)
+                batch.append(ServiceProvider(
+                    name=f'{trades[0].title()} Pros {i}',
+                    slug=f'benchmark-search-{i}',
+                    tagline=f'{rng.choice(FILLER_WORDS)} {trades[0]} {rng.choice(FILLER_WORDS)}',
+                    description=' '.join(rng.choices(FILLER_WORDS + TRADE_WORDS, k=40)),
+                    skills=', '.join(trades),
+                    category=category,
+                    email=f'bench{i}@example.com',
+                    phone='555-0100',
+                    city='Benchmark City',
+                    state=rng.choice(BENCHMARK_STATES),
+                    zip_code=zip_code,
+                    latitude=latitude,
+                    longitude=longitude,
+                    geo_cell=geo_cell(latitude, longitude),
+                    pricing_range=rng.choice(PRICING_VALUES),
+                    is_verified=rng.random() < 0.4,
+                    accepts_credit_jobs=rng.random() < 0.3,
+                    accepts_barter=rng.random() < 0.2,
+                    is_active=True,
+                    is_draft=False,
+                ))
+            ServiceProvider.objects.bulk_create(batch)
+    
+    def _time(self, fn, repeat):
+        """Median wall time in milliseconds (after one warm-up run)."""
+        fn()
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - started) * 1000)
+        return statistics.median(samples)
+    
+    def _run_icontains(self, query):
+        """The pre-full-text search: four OR'd icontains clauses, count + first page."""
+        queryset = ServiceProvider.objects.filter(is_active=True).filter(
+            Q(name__icontains=query) |
+            Q(description__icontains=query) |
+            Q(skills__icontains=query) |
+            Q(tagline__icontains=query)
+        ).order_by('-is_featured', '-created_at')
+        queryset.count()
+        list(queryset.values_list('id', flat=True)[:12])
+    
+    def _run_full_text(self, query):
+        """Ranked full-text search, count + first page."""
+        params = QueryDict(mutable=True)
+        params['q'] = query
+        queryset = ProviderSearchService.search(params)
+        queryset.count()
+        list(queryset.values_list('id', flat=True)[:12])
+    
+    def _run_results(self, params):
+        """A filtered search page: count + first page."""
+        queryset = ProviderSearchService.search(params)
+        queryset.count()
+        list(queryset.values_list('id', flat=True)[:12])
+    
+    def _run_radius(self, zip_code, radius):
+        """ZIP radius search sorted by distance, count + first page."""
+        params = QueryDict(mutable=True)
+        params['zip'] = zip_code
+        params['radius'] = str(radius)
+        queryset = ProviderSearchService.search(params)
+        count = queryset.count()
+        list(queryset.values_list('id', flat=True)[:12])
+        return count
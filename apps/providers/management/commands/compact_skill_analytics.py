@@ -0,0 +1,52 @@
+"""
+Management command to compact skill analytics history.
+
+Keeps the current SkillDemand / SkillSupply / SkillMarketOpportunity record
+of every skill and area, recent history as it is, older history downsampled
+to one record per week and then per month, and deletes history older than
+SKILL_ANALYTICS_RETENTION_DAYS (see apps/providers/analytics_retention.py).
+Works in bounded batches, so it can run from cron at any time, e.g. after
+the nightly update_skill_analytics.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.providers.analytics_retention import compact_records
+from apps.providers.skill_analytics import SkillDemand, SkillMarketOpportunity, SkillSupply
+
+
+class Command(BaseCommand):
+    help = 'Downsample and expire old skill demand, supply and opportunity records'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention-days',
+            type=int,
+            default=settings.SKILL_ANALYTICS_RETENTION_DAYS,
+            help=f'Delete history older than this many days (default: {settings.SKILL_ANALYTICS_RETENTION_DAYS})',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Records deleted per batch (default: 1000)',
+        )
+    
+    def handle(self, *args, **options):
+        now = timezone.now()
+        total = 0
+        for model in (SkillDemand, SkillSupply, SkillMarketOpportunity):
+            self.stdout.write(f'Compacting {model._meta.verbose_name_plural}...')
+            started = time.perf_counter()
+            deleted = 0
+            for count in compact_records(model, now, options['retention_days'], options['batch_size']):
+                deleted += count
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f'  {deleted} records deleted ({deleted / elapsed if elapsed else 0:.0f} records/s)')
+            self.stdout.write(self.style.SUCCESS(f'✓ Deleted {deleted} {model._meta.verbose_name_plural}'))
+            total += deleted
+        self.stdout.write(self.style.SUCCESS(f'\nCompleted! Deleted {total} records.'))
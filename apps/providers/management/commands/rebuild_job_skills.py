@@ -0,0 +1,59 @@
+"""
+Management command to rebuild the skills job requests and quote requests mention.
+Use after bulk imports, skill changes or job edits made outside the ORM signals.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.accounts.modes_models import Skill
+from apps.providers import skill_mentions
+from apps.providers.models import QuoteRequest, QuoteRequestSkill, UnifiedJob, UnifiedJobSkill
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the UnifiedJobSkill and QuoteRequestSkill mention rows from the job text'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=skill_mentions.BATCH_SIZE,
+            help=f'Jobs scanned per query (default: {skill_mentions.BATCH_SIZE})',
+        )
+    
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        skill_mentions.bump_version()
+        matcher = skill_mentions.build_matcher(Skill)
+        
+        for label, job_model, mention_model, owner_field in (
+            ('job requests', UnifiedJob, UnifiedJobSkill, 'job'),
+            ('quote requests', QuoteRequest, QuoteRequestSkill, 'quote_request'),
+        ):
+            rows = job_model.objects.order_by('id').values_list('id', 'title', 'description')
+            total = rows.count()
+            self.stdout.write(f'Scanning {total} {label}...')
+            
+            started = time.perf_counter()
+            scanned = changed = 0
+            batch = []
+            for row in rows.iterator(chunk_size=batch_size):
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    changed += skill_mentions.sync_mention_rows(batch, mention_model, owner_field, matcher)
+                    scanned += len(batch)
+                    batch = []
+                    self.stdout.write(f'  Scanned {scanned}/{total} {label}...')
+            if batch:
+                changed += skill_mentions.sync_mention_rows(batch, mention_model, owner_field, matcher)
+                scanned += len(batch)
+            
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'  {scanned} {label} in {elapsed:.1f}s '
+                f'({scanned / elapsed if elapsed else 0:.0f}/s), {changed} mention rows written'
+            )
+        
+        self.stdout.write(self.style.SUCCESS('\nCompleted! Skill mentions rebuilt.'))
@@ -0,0 +1,43 @@
+"""
+Management command to rebuild stored provider rating aggregates from reviews.
+Use after bulk imports or any review changes made outside the ORM signals.
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.providers import result_cache
+from apps.providers.models import ServiceProvider
+
+
+class Command(BaseCommand):
+    help = 'Rebuild rating_avg, rating_count, the star histogram and rank_score for every provider'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Providers per grouped query / bulk update (default: 1000)',
+        )
+    
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        
+        provider_ids = ServiceProvider.objects.order_by('id').values_list('id', flat=True)
+        total = provider_ids.count()
+        self.stdout.write(f'Rebuilding rating aggregates for {total} providers...')
+        
+        updated = 0
+        batch = []
+        for provider_id in provider_ids.iterator(chunk_size=batch_size):
+            batch.append(provider_id)
+            if len(batch) >= batch_size:
+                updated += ServiceProvider.refresh_rating_aggregates(batch)
+                batch = []
+                self.stdout.write(f'  Updated {updated}/{total} providers...')
+        
+        if batch:
+            updated += ServiceProvider.refresh_rating_aggregates(batch)
+        result_cache.bump_version()
+        
+        self.stdout.write(self.style.SUCCESS(f'\nCompleted! Rebuilt ratings for {updated} providers.'))
@@ -0,0 +1,53 @@
+"""
+Management command to recompute every provider's stored rank_score.
+Use after changing the weights in apps/providers/ranking.py or after rating
+or flag changes made outside the ORM (raw SQL, queryset .update()).
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.providers import result_cache
+from apps.providers.models import ServiceProvider
+from apps.providers.ranking import RANK_INPUT_FIELDS, compute_rank_score
+
+
+class Command(BaseCommand):
+    help = 'Recompute rank_score for every provider from its stored ratings and flags'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Providers per bulk update (default: 2000)',
+        )
+    
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        
+        rows = ServiceProvider.objects.order_by('id').values_list('id', 'rank_score', *RANK_INPUT_FIELDS)
+        total = rows.count()
+        self.stdout.write(f'Recomputing rank scores for {total} providers...')
+        
+        checked = changed = 0
+        batch = []
+        for provider_id, current, *inputs in rows.iterator(chunk_size=batch_size):
+            checked += 1
+            score = compute_rank_score(*inputs)
+            if score != current:
+                batch.append(ServiceProvider(id=provider_id, rank_score=score))
+            if len(batch) >= batch_size:
+                ServiceProvider.objects.bulk_update(batch, ['rank_score'])
+                changed += len(batch)
+                batch = []
+                self.stdout.write(f'  Checked {checked}/{total} providers...')
+        
+        if batch:
+            ServiceProvider.objects.bulk_update(batch, ['rank_score'])
+            changed += len(batch)
+        if changed:
+            result_cache.bump_version()
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'\nCompleted! Updated {changed} of {total} rank scores.'
+        ))
@@ -1,16 +1,39 @@
 """
 Management command to update skill supply and demand analytics.
 Run daily via cron or scheduled task.
+
+Demand and supply signals for every skill and area are counted up front
+with a few grouped queries (SkillAnalyticsService.demand_signal_counts /
+supply_signal_counts), the previous records for trends are read in one
+query per model, and the new records are written with bulk upserts. The
+same counts update the daily rollup the dashboard reads (see
+apps/providers/skill_rollup.py). The time taken by each phase is reported
+at the end.
+
+With --incremental, only the areas whose signals may have changed since the
+last finished run are recomputed: those of jobs, providers, listings and
+users updated since that run started, of jobs that left the analysis window
+since, and the stale places the providers signals queued for deletions,
+moves and listing skill edits (see SkillAnalyticsService.changed_places).
+Other areas keep their latest records, and the rollup only re-derives the
+job buckets of the days changed jobs were created on, so the nightly cost
+follows the churn rather than the size of the data.
 """
 
-from django.core.management.base import BaseCommand
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
 from django.db.models import Q
 from django.utils import timezone
-from collections import defaultdict
 
 from apps.accounts.modes_models import Skill
 from apps.accounts.models import CustomUser
-from apps.providers.analytics_service import SkillAnalyticsService
+from apps.providers.analytics_service import SkillAnalyticsService, WATERMARK_OVERLAP, touched_locations
+from apps.providers.skill_analytics import (
+    SkillAnalyticsRun, SkillAnalyticsStalePlace, SkillDemand, SkillSupply
+)
+from apps.providers.skill_rollup import changed_job_days, write_daily_signals
 
 
 class Command(BaseCommand):
@@ -44,6 +67,17 @@ class Command(BaseCommand):
             default=25,
             help='Radius in miles for geographic area (default: 25)',
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Records per bulk upsert (default: 1000)',
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Only recompute areas with data changed since the last run (a full run if there is none)',
+        )
     
     def handle(self, *args, **options):
         days_back = options['days_back']
@@ -51,47 +85,133 @@ class Command(BaseCommand):
         state_filter = options.get('state')
         skill_filter = options.get('skill')
         radius = options['radius']
+        batch_size = options['batch_size']
+        incremental = options['incremental']
+        if incremental and (city_filter or state_filter or skill_filter):
+            raise CommandError('--incremental cannot be combined with --city, --state or --skill')
+        # Only runs over every skill and area serve as watermarks
+        full_scope = not (city_filter or state_filter or skill_filter)
         
         self.stdout.write(f'Starting skill analytics update (days_back={days_back}, radius={radius}mi)...')
+        timings = []
+        
+        def phase(name, started):
+            timings.append((name, time.perf_counter() - started))
         
         # Get skills to process
+        started = time.perf_counter()
         skills = Skill.objects.filter(is_active=True)
         if skill_filter:
             skills = skills.filter(slug=skill_filter)
+        skills = list(skills)
+        self.stdout.write(f'Processing {len(skills)} skills...')
         
-        skill_count = skills.count()
-        self.stdout.write(f'Processing {skill_count} skills...')
+        period_end = timezone.now()
+        period_start = period_end - timedelta(days=days_back)
+        
+        previous_run = None
+        job_days = None
+        if incremental:
+            previous_run = SkillAnalyticsRun.objects.filter(
+                days_back=days_back, finished_at__isnull=False
+            ).first()
+            if previous_run is None:
+                self.stdout.write('No finished run to continue from, updating every area...')
+        # Read before any data, so places queued from now on wait for the next run
+        stale_places = list(SkillAnalyticsStalePlace.objects.all()) if full_scope else []
+        run = None
+        if full_scope:
+            run = SkillAnalyticsRun.objects.create(
+                started_at=period_end, days_back=days_back, incremental=previous_run is not None
+            )
         
         # Get unique geographic areas from users and providers
         locations = self._get_locations(city_filter, state_filter)
-        location_count = len(locations)
-        self.stdout.write(f'Processing {location_count} geographic areas...')
+        phase('skills and areas', started)
+        
+        if previous_run is not None:
+            started = time.perf_counter()
+            places, listing_places = SkillAnalyticsService.changed_places(
+                previous_run.started_at - WATERMARK_OVERLAP,
+                previous_run.started_at - timedelta(days=days_back),
+                period_start,
+                stale_places,
+            )
+            self.stdout.write(
+                f'{len(places) + len(listing_places)} places changed since {previous_run.started_at:%Y-%m-%d %H:%M}'
+            )
+            locations = touched_locations(locations, places, listing_places)
+            job_days = changed_job_days(locations, previous_run.started_at - WATERMARK_OVERLAP, stale_places)
+            phase('changed areas', started)
+        self.stdout.write(f'Processing {len(locations)} geographic areas...')
+        
+        started = time.perf_counter()
+        demand_counts = SkillAnalyticsService.demand_signal_counts(skills, locations, period_start, period_end)
+        phase('demand signals', started)
+        
+        started = time.perf_counter()
+        supply_counts = SkillAnalyticsService.supply_signal_counts(skills, locations)
+        phase('supply signals', started)
+        
+        started = time.perf_counter()
+        previous_demand = SkillAnalyticsService.latest_scores(SkillDemand, 'demand_score', skills, locations)
+        previous_supply = SkillAnalyticsService.latest_scores(SkillSupply, 'supply_score', skills, locations)
+        phase('previous records', started)
         
         total_updates = 0
         errors = 0
+        records = []
+        build_seconds = write_seconds = 0
         
-        for skill in skills:
-            for city, state, zip_code in locations:
-                try:
-                    SkillAnalyticsService.update_skill_analytics(
-                        skill=skill,
-                        city=city,
-                        state=state,
-                        zip_code=zip_code,
-                        radius_miles=radius,
-                        days_back=days_back
-                    )
-                    total_updates += 1
-                    
-                    if total_updates % 10 == 0:
-                        self.stdout.write(f'  Updated {total_updates} records...')
-                
-                except Exception as e:
+        def write():
+            nonlocal write_seconds
+            started = time.perf_counter()
+            SkillAnalyticsService.save_analytics_records(records, batch_size)
+            records.clear()
+            write_seconds += time.perf_counter() - started
+        
+        for location in locations:
+            city, state, _ = location
+            started = time.perf_counter()
+            for skill in skills:
+                pair_records, error = SkillAnalyticsService.build_analytics_records(
+                    skill, location, demand_counts, supply_counts, previous_demand, previous_supply,
+                    radius, period_start, period_end
+                )
+                records.extend(pair_records)
+                if error:
                     errors += 1
                     self.stdout.write(
-                        self.style.ERROR(f'Error updating {skill.name} in {city}, {state}: {str(e)}')
+                        self.style.ERROR(f'Error updating {skill.name} in {city}, {state}: {error}')
                     )
+                else:
+                    total_updates += 1
+            build_seconds += time.perf_counter() - started
+            if len(records) >= batch_size:
+                write()
+                self.stdout.write(f'  Updated {total_updates} records...')
+        if records:
+            write()
+        timings.append(('build records', build_seconds))
+        timings.append(('write records', write_seconds))
+        
+        started = time.perf_counter()
+        rollup_rows = write_daily_signals(
+            skills, locations, demand_counts, supply_counts, period_end, batch_size, job_days
+        )
+        self.stdout.write(f'  Wrote {rollup_rows} daily rollup rows')
+        phase('daily rollup', started)
+        
+        if run is not None:
+            run.finished_at = timezone.now()
+            run.areas = len(locations)
+            run.records = total_updates
+            run.save(update_fields=['finished_at', 'areas', 'records'])
+            SkillAnalyticsStalePlace.objects.filter(id__in=[place.id for place in stale_places]).delete()
         
+        self.stdout.write('\nTiming:')
+        for name, seconds in timings:
+            self.stdout.write(f'  {name:<18} {seconds:8.2f} s')
         self.stdout.write(
             self.style.SUCCESS(
                 f'\nCompleted! Updated {total_updates} records with {errors} errors.'
@@ -0,0 +1,123 @@
+"""
+Vectorized scoring for the smart match quiz.
+
+Candidates are loaded as compact columns (rating, review count, verified,
+featured, experience, pricing tier) and scored for a whole category in one
+NumPy pass. Only the top-k winners are loaded as model instances and given
+match reasons.
+
+The arithmetic mirrors views.calculate_match_score() term by term, in the same
+order, so scores are bit-for-bit identical (checked by
+apps/providers/tests/test_match_scoring.py).
+"""
+
+import numpy as np
+
+
+# Pricing range -> tier number; 0 for anything unexpected
+PRICING_TIERS = {'$': 1, '$$': 2, '$$$': 3, '$$$$': 4}
+
+FEATURE_FIELDS = [
+    'id', 'rating_avg', 'rating_count', 'is_verified', 'is_featured',
+    'years_experience', 'pricing_range',
+]
+
+
+class CandidateFeatures:
+    """Columnar arrays of the provider fields the quiz score depends on."""
+    
+    def __init__(self, ids, rating, review_count, verified, featured, experience, pricing_tier):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.rating = np.asarray(rating, dtype=np.float64)
+        self.review_count = np.asarray(review_count, dtype=np.int64)
+        self.verified = np.asarray(verified, dtype=bool)
+        self.featured = np.asarray(featured, dtype=bool)
+        self.experience = np.asarray(experience, dtype=np.int64)
+        self.pricing_tier = np.asarray(pricing_tier, dtype=np.int8)
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    @classmethod
+    def from_queryset(cls, queryset):
+        """Load the features of a provider queryset, keeping its row order."""
+        rows = list(queryset.values_list(*FEATURE_FIELDS))
+        if not rows:
+            return cls([], [], [], [], [], [], [])
+        
+        ids, rating, review_count, verified, featured, experience, pricing = zip(*rows)
+        return cls(
+            ids,
+            [value or 0.0 for value in rating],
+            review_count,
+            verified,
+            featured,
+            [value or 0 for value in experience],
+            [PRICING_TIERS.get(value, 0) for value in pricing],
+        )
+
+
+def score_candidates(features, urgency, priority):
+    """
+    Match scores (0-10 scale) for every candidate.
+    
+    Same rules as views.calculate_match_score(); each term is added in the
+    same order (adding 0.0 where a rule does not apply) so the floating
+    point results match exactly.
+    
+    Returns:
+        float64 array aligned with features.ids
+    """
+    zero = 0.0
+    rating = features.rating
+    reviews = features.review_count
+    verified = features.verified
+    
+    score = np.full(len(features), 5.0)
+    
+    # Rating bonus, review count bonus, verified and featured bonuses
+    score += np.where(rating != 0, (rating - 3) * 0.5, zero)
+    score += np.where(reviews >= 10, 1.0, np.where(reviews >= 5, 0.5, zero))
+    score += np.where(verified, 0.5, zero)
+    score += np.where(features.featured, 0.3, zero)
+    
+    # Priority-based bonuses
+    if priority == 'quality':
+        score += np.where(rating >= 4.5, 1.0, zero)
+        score += np.where(verified, 0.5, zero)
+    elif priority == 'speed':
+        score += np.where(features.experience >= 5, 1.0, zero)
+    elif priority == 'price':
+        tier = features.pricing_tier
+        score += np.where(tier == 1, 1.0, np.where(tier == 2, 0.5, zero))
+    elif priority == 'reviews':
+        score += np.where(reviews >= 15, 1.5, np.where(reviews >= 8, 1.0, zero))
+    
+    # Urgency bonus (verified providers for emergencies)
+    if urgency == 'emergency':
+        score += np.where(verified, 0.5, zero)
+    
+    return score
+
+
+def top_k(scores, k):
+    """
+    Indices of the k highest scores, best first.
+    
+    Ties keep candidate order, as a stable descending sort of the full list
+    would, so results match sorting every candidate in Python.
+    """
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        # Lowest score that still makes the top k; among candidates tied on
+        # it, the earliest ones win
+        threshold = scores[np.argpartition(scores, n - k)[n - k]]
+        above = np.flatnonzero(scores > threshold)
+        tied = np.flatnonzero(scores == threshold)[:k - len(above)]
+        candidates = np.concatenate([above, tied])
+    else:
+        candidates = np.arange(n)
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order]
@@ -0,0 +1,89 @@
+# Generated by Django 5.0.1 on 2026-10-17 01:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+BACKFILL_RATING_AGGREGATES = """
+UPDATE providers_serviceprovider AS p
+SET rating_count = r.num,
+    rating_avg = r.avg_rating,
+    rating_1_count = r.num_1,
+    rating_2_count = r.num_2,
+    rating_3_count = r.num_3,
+    rating_4_count = r.num_4,
+    rating_5_count = r.num_5
+FROM (
+    SELECT provider_id,
+           COUNT(*) AS num,
+           AVG(rating)::double precision AS avg_rating,
+           COUNT(*) FILTER (WHERE rating = 1) AS num_1,
+           COUNT(*) FILTER (WHERE rating = 2) AS num_2,
+           COUNT(*) FILTER (WHERE rating = 3) AS num_3,
+           COUNT(*) FILTER (WHERE rating = 4) AS num_4,
+           COUNT(*) FILTER (WHERE rating = 5) AS num_5
+    FROM reviews_providerreview
+    GROUP BY provider_id
+) AS r
+WHERE p.id = r.provider_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('providers', '0012_provider_search_vector'),
+        ('reviews', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+    
+    operations = [
+        migrations.AddField(
+            model_name='serviceprovider',
+            name='rating_1_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='serviceprovider',
+            name='rating_2_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='serviceprovider',
+            name='rating_3_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='serviceprovider',
+            name='rating_4_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='serviceprovider',
+            name='rating_5_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='serviceprovider',
+            name='rating_avg',
+            field=models.FloatField(default=0, editable=False, help_text='Average review rating'),
+        ),
+        migrations.AddField(
+            model_name='serviceprovider',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of reviews'),
+        ),
+        migrations.AddIndex(
+            model_name='serviceprovider',
+            index=models.Index(fields=['-rating_avg', '-is_featured'], name='providers_rating_avg_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='serviceprovider',
+            index=models.Index(fields=['-rating_count', '-is_featured'], name='providers_rating_count_idx'),
+        ),
+        # Backfill the aggregates from existing reviews
+        migrations.RunSQL(
+            sql=BACKFILL_RATING_AGGREGATES,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
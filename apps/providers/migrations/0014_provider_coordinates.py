@@ -0,0 +1,72 @@
+# Generated by Django 5.0.1 on 2026-10-17 01:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+from apps.providers.geo import geo_cell, zip_to_coordinates
+
+
+def backfill_coordinates(apps, schema_editor):
+    """Geocode existing providers and service areas from the bundled ZIP table."""
+    for model_name, fields in (
+        ('ServiceProvider', ['latitude', 'longitude', 'geo_cell']),
+        ('ServiceArea', ['latitude', 'longitude']),
+    ):
+        model = apps.get_model('providers', model_name)
+        batch = []
+        for instance in model.objects.only('id', 'zip_code').iterator(chunk_size=2000):
+            coordinates = zip_to_coordinates(instance.zip_code)
+            if coordinates:
+                instance.latitude, instance.longitude = coordinates
+                instance.geo_cell = geo_cell(*coordinates)
+                batch.append(instance)
+            if len(batch) >= 2000:
+                model.objects.bulk_update(batch, fields)
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('providers', '0013_provider_rating_aggregates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+    
+    operations = [
+        migrations.AddField(
+            model_name='servicearea',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, help_text='ZIP centroid latitude, set from zip_code on save', null=True),
+        ),
+        migrations.AddField(
+            model_name='servicearea',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, help_text='ZIP centroid longitude, set from zip_code on save', null=True),
+        ),
+        migrations.AddField(
+            model_name='serviceprovider',
+            name='geo_cell',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Grid cell of latitude/longitude, used to prefilter radius searches', null=True),
+        ),
+        migrations.AddField(
+            model_name='serviceprovider',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, help_text='ZIP centroid latitude, set from zip_code on save', null=True),
+        ),
+        migrations.AddField(
+            model_name='serviceprovider',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, help_text='ZIP centroid longitude, set from zip_code on save', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='servicearea',
+            index=models.Index(fields=['latitude', 'longitude'], name='service_area_lat_lon_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='serviceprovider',
+            index=models.Index(fields=['geo_cell'], name='providers_geo_cell_idx'),
+        ),
+        migrations.RunPython(backfill_coordinates, migrations.RunPython.noop),
+    ]
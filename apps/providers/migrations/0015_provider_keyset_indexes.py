@@ -0,0 +1,39 @@
+# Generated by Django 5.0.1 on 2026-10-17 01:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('providers', '0014_provider_coordinates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+    
+    operations = [
+        migrations.RemoveIndex(
+            model_name='serviceprovider',
+            name='providers_rating_avg_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='serviceprovider',
+            name='providers_rating_count_idx',
+        ),
+        migrations.AddIndex(
+            model_name='serviceprovider',
+            index=models.Index(fields=['-rating_avg', '-is_featured', '-id'], name='providers_rating_avg_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='serviceprovider',
+            index=models.Index(fields=['-rating_count', '-is_featured', '-id'], name='providers_rating_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='serviceprovider',
+            index=models.Index(fields=['-created_at', '-id'], name='providers_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='serviceprovider',
+            index=models.Index(fields=['name', 'id'], name='providers_name_idx'),
+        ),
+    ]
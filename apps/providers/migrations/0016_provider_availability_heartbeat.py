@@ -0,0 +1,33 @@
+# Generated by Django 5.0.1 on 2026-10-17 01:57
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def start_heartbeat_windows(apps, schema_editor):
+    """Give providers already marked available a fresh window instead of expiring them."""
+    ServiceProvider = apps.get_model('providers', 'ServiceProvider')
+    ServiceProvider.objects.filter(is_available_now=True).update(
+        availability_heartbeat_at=timezone.now()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('providers', '0015_provider_keyset_indexes'),
+    ]
+    
+    operations = [
+        migrations.AddField(
+            model_name='serviceprovider',
+            name='availability_heartbeat_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='When the provider last confirmed being available now', null=True),
+        ),
+        migrations.AddField(
+            model_name='serviceprovider',
+            name='availability_window_minutes',
+            field=models.PositiveIntegerField(default=240, help_text='Minutes "available now" lasts after each confirmation (0 = until turned off)'),
+        ),
+        migrations.RunPython(start_heartbeat_windows, migrations.RunPython.noop),
+    ]
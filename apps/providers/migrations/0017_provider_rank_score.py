@@ -0,0 +1,47 @@
+# Generated by Django 5.0.1 on 2026-10-17 09:12
+
+from django.db import migrations, models
+from django.db.models import Q
+
+from apps.providers.ranking import RANK_INPUT_FIELDS, compute_rank_score
+
+
+def backfill_rank_scores(apps, schema_editor):
+    ServiceProvider = apps.get_model('providers', 'ServiceProvider')
+    rows = ServiceProvider.objects.order_by('id').values_list('id', *RANK_INPUT_FIELDS)
+    batch = []
+    for provider_id, *inputs in rows.iterator(chunk_size=2000):
+        batch.append(ServiceProvider(id=provider_id, rank_score=compute_rank_score(*inputs)))
+        if len(batch) >= 2000:
+            ServiceProvider.objects.bulk_update(batch, ['rank_score'])
+            batch = []
+    if batch:
+        ServiceProvider.objects.bulk_update(batch, ['rank_score'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('providers', '0016_provider_availability_heartbeat'),
+    ]
+    
+    operations = [
+        migrations.AddField(
+            model_name='serviceprovider',
+            name='rank_score',
+            field=models.FloatField(default=0, editable=False, help_text='Ranking for "top rated" listings (see apps/providers/ranking.py)'),
+        ),
+        migrations.RunPython(backfill_rank_scores, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='serviceprovider',
+            name='providers_rating_avg_idx',
+        ),
+        migrations.AddIndex(
+            model_name='serviceprovider',
+            index=models.Index(condition=Q(('is_active', True)), fields=['-rank_score', '-id'], name='providers_rank_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='serviceprovider',
+            index=models.Index(condition=Q(('is_active', True)), fields=['category', '-rank_score', '-id'], name='providers_cat_rank_score_idx'),
+        ),
+    ]
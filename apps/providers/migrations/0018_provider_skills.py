@@ -0,0 +1,53 @@
+# Generated by Django 5.0.1 on 2026-10-17 02:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from apps.providers.skills import sync_skill_rows
+
+
+def backfill_provider_skills(apps, schema_editor):
+    """Derive ProviderSkill rows from the existing skills text."""
+    ServiceProvider = apps.get_model('providers', 'ServiceProvider')
+    ProviderSkill = apps.get_model('providers', 'ProviderSkill')
+    Skill = apps.get_model('accounts', 'Skill')
+    
+    rows = ServiceProvider.objects.order_by('id').values_list('id', 'skills')
+    batch = []
+    for row in rows.iterator(chunk_size=2000):
+        batch.append(row)
+        if len(batch) >= 2000:
+            sync_skill_rows(batch, ProviderSkill, Skill)
+            batch = []
+    if batch:
+        sync_skill_rows(batch, ProviderSkill, Skill)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_rename_accounts_sk_to_user_idx_accounts_sk_to_user_5f2d3b_idx_and_more'),
+        ('providers', '0017_provider_rank_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProviderSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Skill as the provider wrote it', max_length=100)),
+                ('token', models.CharField(help_text='Lowercased, whitespace-collapsed name', max_length=100)),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+                ('provider', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skill_entries', to='providers.serviceprovider')),
+                ('skill', models.ForeignKey(blank=True, help_text='Canonical skill this entry names, if any', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='provider_skills', to='accounts.skill')),
+            ],
+            options={
+                'verbose_name': 'Provider Skill',
+                'verbose_name_plural': 'Provider Skills',
+                'ordering': ['provider', 'position'],
+                'indexes': [models.Index(fields=['skill', 'provider'], name='provider_skill_skill_idx'), models.Index(fields=['token', 'provider'], name='provider_skill_token_idx')],
+                'unique_together': {('provider', 'token')},
+            },
+        ),
+        migrations.RunPython(backfill_provider_skills, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.0.1 on 2026-10-17 03:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from apps.providers.skill_mentions import build_matcher, sync_mention_rows
+
+
+def backfill_skill_mentions(apps, schema_editor):
+    """Derive the skill mentions of the existing job requests and quote requests."""
+    Skill = apps.get_model('accounts', 'Skill')
+    matcher = build_matcher(Skill)
+    
+    for job_model, mention_model, owner_field in (
+        ('UnifiedJob', 'UnifiedJobSkill', 'job'),
+        ('QuoteRequest', 'QuoteRequestSkill', 'quote_request'),
+    ):
+        job_model = apps.get_model('providers', job_model)
+        mention_model = apps.get_model('providers', mention_model)
+        rows = job_model.objects.order_by('id').values_list('id', 'title', 'description')
+        batch = []
+        for row in rows.iterator(chunk_size=1000):
+            batch.append(row)
+            if len(batch) >= 1000:
+                sync_mention_rows(batch, mention_model, owner_field, matcher)
+                batch = []
+        if batch:
+            sync_mention_rows(batch, mention_model, owner_field, matcher)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_match_archive'),
+        ('providers', '0018_provider_skills'),
+    ]
+    
+    operations = [
+        migrations.CreateModel(
+            name='QuoteRequestSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quote_request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skill_mentions', to='providers.quoterequest')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quote_request_mentions', to='accounts.skill')),
+            ],
+            options={
+                'verbose_name': 'Quote Request Skill Mention',
+                'verbose_name_plural': 'Quote Request Skill Mentions',
+                'indexes': [models.Index(fields=['skill', 'quote_request'], name='quote_skill_skill_idx')],
+                'unique_together': {('quote_request', 'skill')},
+            },
+        ),
+        migrations.CreateModel(
+            name='UnifiedJobSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skill_mentions', to='providers.unifiedjob')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_mentions', to='accounts.skill')),
+            ],
+            options={
+                'verbose_name': 'Job Skill Mention',
+                'verbose_name_plural': 'Job Skill Mentions',
+                'indexes': [models.Index(fields=['skill', 'job'], name='job_skill_skill_idx')],
+                'unique_together': {('job', 'skill')},
+            },
+        ),
+        migrations.RunPython(backfill_skill_mentions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.0.1 on 2026-10-17 03:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_updated_at_indexes'),
+        ('providers', '0019_job_skill_mentions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SkillAnalyticsRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(help_text='When the run started reading data (its period end)')),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('days_back', models.IntegerField(help_text='Length of the analysis period in days')),
+                ('incremental', models.BooleanField(default=False)),
+                ('areas', models.IntegerField(default=0, help_text='Areas recomputed')),
+                ('records', models.IntegerField(default=0, help_text='Skill and area pairs updated')),
+            ],
+            options={
+                'verbose_name': 'Skill Analytics Run',
+                'verbose_name_plural': 'Skill Analytics Runs',
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SkillAnalyticsStalePlace',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('city', models.CharField(blank=True, max_length=100)),
+                ('state', models.CharField(blank=True, max_length=50)),
+                ('listing', models.BooleanField(default=False, help_text='From a listing, which counts in its city or state (not only both)')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Stale Skill Analytics Place',
+                'verbose_name_plural': 'Stale Skill Analytics Places',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='serviceprovider',
+            index=models.Index(fields=['updated_at'], name='providers_updated_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='unifiedjob',
+            index=models.Index(fields=['updated_at'], name='providers_u_updated_de98ee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='unifiedjob',
+            index=models.Index(fields=['created_at'], name='providers_u_created_d4851c_idx'),
+        ),
+    ]
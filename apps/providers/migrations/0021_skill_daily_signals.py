@@ -0,0 +1,38 @@
+# Generated by Django 5.0.1 on 2026-10-17 03:57
+
+import django.db.models.deletion
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_updated_at_indexes'),
+        ('providers', '0020_skill_analytics_runs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SkillDailySignal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('city', models.CharField(max_length=100)),
+                ('state', models.CharField(max_length=50)),
+                ('zip_code', models.CharField(blank=True, max_length=20)),
+                ('day', models.DateField()),
+                ('job_requests_count', models.IntegerField(default=0, help_text='Job requests created that day')),
+                ('skill_swap_wants_count', models.IntegerField(blank=True, help_text='Skill swap wants as of that day', null=True)),
+                ('provider_count', models.IntegerField(blank=True, help_text='Providers as of that day', null=True)),
+                ('skill_swap_offers_count', models.IntegerField(blank=True, help_text='Skill swap offers as of that day', null=True)),
+                ('freelance_listings_count', models.IntegerField(blank=True, help_text='Freelance listings as of that day', null=True)),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_signals', to='accounts.skill')),
+            ],
+            options={
+                'verbose_name': 'Daily Skill Signal',
+                'verbose_name_plural': 'Daily Skill Signals',
+                'indexes': [models.Index(django.db.models.functions.text.Upper('city'), django.db.models.functions.text.Upper('state'), models.F('zip_code'), models.F('day'), name='skill_daily_area_idx')],
+                'unique_together': {('skill', 'city', 'state', 'zip_code', 'day')},
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.0.1 on 2026-10-17 04:02
+
+from django.db import migrations, models
+
+from apps.providers.analytics_retention import mark_current_records
+
+
+def flag_current_records(apps, schema_editor):
+    """Flag the latest existing record of each skill and area as current."""
+    for model_name in ('SkillDemand', 'SkillSupply', 'SkillMarketOpportunity'):
+        mark_current_records(apps.get_model('providers', model_name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_updated_at_indexes'),
+        ('providers', '0021_skill_daily_signals'),
+    ]
+    
+    operations = [
+        migrations.AddField(
+            model_name='skilldemand',
+            name='is_current',
+            field=models.BooleanField(default=False, help_text='Latest record of its skill and area'),
+        ),
+        migrations.AddField(
+            model_name='skillmarketopportunity',
+            name='is_current',
+            field=models.BooleanField(default=False, help_text='Latest record of its skill and area'),
+        ),
+        migrations.AddField(
+            model_name='skillsupply',
+            name='is_current',
+            field=models.BooleanField(default=False, help_text='Latest record of its skill and area'),
+        ),
+        migrations.RunPython(flag_current_records, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='skilldemand',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_current', True)), fields=('skill', 'city', 'state', 'zip_code'), name='skill_demand_current_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='skillmarketopportunity',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_current', True)), fields=('skill', 'city', 'state', 'zip_code'), name='skill_opportunity_current_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='skillsupply',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_current', True)), fields=('skill', 'city', 'state', 'zip_code'), name='skill_supply_current_uniq'),
+        ),
+    ]
@@ -2,16 +2,28 @@
 Models for service providers and categories.
 """
 
-from django.db import models
+import datetime
+
+from django.db import models, transaction
 from django.conf import settings
 from django.urls import reverse
-from django.db.models import Avg
+from django.utils import timezone
+from django.db.models import Count, Q
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+
+from .geo import geo_cell, zip_to_coordinates
+from .ranking import RANK_INPUT_FIELDS, compute_rank_score
+from .skills import parse_skills
 
 # Import unified job models so Django discovers them
 from .unified_jobs import UnifiedJob, JobProposal, JobMessage
 
 # Import skill analytics models so Django discovers them
-from .skill_analytics import SkillDemand, SkillSupply, SkillMarketOpportunity
+from .skill_analytics import (
+    SkillDemand, SkillSupply, SkillMarketOpportunity, SkillAnalyticsRun, SkillAnalyticsStalePlace,
+    SkillDailySignal
+)
 
 # Import community project models so Django discovers them
 from .community_projects import (
@@ -23,6 +35,19 @@ from .community_projects import (
 from .user_badges import UserBadge, UserBadgeAward
 
 
+def set_coordinates_from_zip(instance):
+    """
+    Set `latitude`/`longitude` (and `geo_cell` where the model has it) on a
+    model instance from its `zip_code`.
+    """
+    instance.latitude, instance.longitude = zip_to_coordinates(instance.zip_code) or (None, None)
+    if hasattr(instance, 'geo_cell'):
+        instance.geo_cell = (
+            geo_cell(instance.latitude, instance.longitude)
+            if instance.latitude is not None else None
+        )
+
+
 class ServiceCategory(models.Model):
     """Category for service providers."""
     
@@ -107,6 +132,18 @@ class ServiceProvider(models.Model):
     city = models.CharField(max_length=100)
     state = models.CharField(max_length=100)
     zip_code = models.CharField(max_length=20)
+    latitude = models.FloatField(
+        null=True, blank=True, editable=False,
+        help_text='ZIP centroid latitude, set from zip_code on save'
+    )
+    longitude = models.FloatField(
+        null=True, blank=True, editable=False,
+        help_text='ZIP centroid longitude, set from zip_code on save'
+    )
+    geo_cell = models.PositiveIntegerField(
+        null=True, blank=True, editable=False,
+        help_text='Grid cell of latitude/longitude, used to prefilter radius searches'
+    )
     
     # Business Details
     pricing_range = models.CharField(
@@ -153,6 +190,42 @@ class ServiceProvider(models.Model):
         blank=True,
         help_text='Info about emergency rates (e.g., "25% premium for emergencies")'
     )
+    availability_heartbeat_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text='When the provider last confirmed being available now'
+    )
+    availability_window_minutes = models.PositiveIntegerField(
+        default=240,
+        help_text='Minutes "available now" lasts after each confirmation (0 = until turned off)'
+    )
+    
+    # Rating aggregates, kept in sync with reviews (see apps/reviews/signals.py)
+    rating_avg = models.FloatField(default=0, editable=False, help_text='Average review rating')
+    rating_count = models.PositiveIntegerField(default=0, editable=False, help_text='Number of reviews')
+    rating_1_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_2_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_3_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_4_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_5_count = models.PositiveIntegerField(default=0, editable=False)
+    rank_score = models.FloatField(
+        default=0,
+        editable=False,
+        help_text='Ranking for "top rated" listings (see apps/providers/ranking.py)'
+    )
+    
+    # Full-text search (weighted: name > tagline > skills > description)
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector('name', weight='A', config='english') +
+            SearchVector('tagline', weight='B', config='english') +
+            SearchVector('skills', weight='C', config='english') +
+            SearchVector('description', weight='D', config='english')
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -162,6 +235,32 @@ class ServiceProvider(models.Model):
         verbose_name = 'Service Provider'
         verbose_name_plural = 'Service Providers'
         ordering = ['-is_featured', '-created_at']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='providers_search_vector_gin'),
+            # Partial on is_active so "top rated" listings can be index-only scans
+            models.Index(
+                fields=['-rank_score', '-id'],
+                name='providers_rank_score_idx',
+                condition=Q(is_active=True),
+            ),
+            models.Index(
+                fields=['category', '-rank_score', '-id'],
+                name='providers_cat_rank_score_idx',
+                condition=Q(is_active=True),
+            ),
+            models.Index(fields=['-rating_count', '-is_featured', '-id'], name='providers_rating_count_idx'),
+            models.Index(fields=['-created_at', '-id'], name='providers_created_at_idx'),
+            models.Index(fields=['name', 'id'], name='providers_name_idx'),
+            models.Index(fields=['geo_cell'], name='providers_geo_cell_idx'),
+            # Watermark scans of incremental skill analytics runs
+            models.Index(fields=['updated_at'], name='providers_updated_at_idx'),
+        ]
+    
+    RATING_COUNT_FIELDS = [
+        'rating_avg', 'rating_count',
+        'rating_1_count', 'rating_2_count', 'rating_3_count', 'rating_4_count', 'rating_5_count',
+        'rank_score',
+    ]
     
     def __str__(self):
         return self.name
@@ -169,21 +268,136 @@ class ServiceProvider(models.Model):
     def get_absolute_url(self):
         return reverse('providers:provider_detail', kwargs={'slug': self.slug})
     
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'zip_code' in update_fields:
+            set_coordinates_from_zip(self)
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'latitude', 'longitude', 'geo_cell'}
+        if update_fields is None or set(RANK_INPUT_FIELDS) & set(update_fields):
+            self.rank_score = self.compute_rank_score()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {'rank_score'}
+        if update_fields is None or 'is_available_now' in update_fields:
+            # Turning availability on starts a heartbeat window; turning it off ends it
+            if not self.is_available_now:
+                self.availability_heartbeat_at = None
+            elif self.availability_heartbeat_at is None:
+                self.availability_heartbeat_at = timezone.now()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {'availability_heartbeat_at'}
+        super().save(*args, **kwargs)
+    
+    def compute_rank_score(self):
+        return compute_rank_score(
+            self.rating_avg, self.rating_count, self.is_verified, self.is_featured
+        )
+    
+    @property
+    def available_until(self):
+        """
+        When "available now" lapses without another heartbeat.
+        
+        Returns:
+            datetime, None if the provider is not available, or
+            datetime.max (UTC) when the window never expires
+        """
+        if not self.is_available_now:
+            return None
+        if not self.availability_window_minutes:
+            return datetime.datetime.max.replace(tzinfo=datetime.timezone.utc)
+        if self.availability_heartbeat_at is None:
+            return None
+        return self.availability_heartbeat_at + datetime.timedelta(minutes=self.availability_window_minutes)
+    
+    @property
+    def is_currently_available(self):
+        """is_available_now, unless the heartbeat window has lapsed."""
+        until = self.available_until
+        return until is not None and until > timezone.now()
+    
+    def record_availability_heartbeat(self):
+        """Confirm the provider is available now, restarting the heartbeat window."""
+        self.is_available_now = True
+        self.availability_heartbeat_at = timezone.now()
+        ServiceProvider.objects.filter(pk=self.pk).update(
+            is_available_now=True, availability_heartbeat_at=self.availability_heartbeat_at
+        )
+    
     @property
     def average_rating(self):
-        """Calculate average rating from reviews."""
-        avg = self.reviews.aggregate(avg_rating=Avg('rating'))['avg_rating']
-        return round(avg, 1) if avg else 0
+        """Average rating from the stored aggregate, rounded for display."""
+        return round(self.rating_avg, 1) if self.rating_avg else 0
     
     @property
     def review_count(self):
-        """Get total number of reviews."""
-        return self.reviews.count()
+        """Total number of reviews from the stored aggregate."""
+        return self.rating_count
+    
+    @property
+    def rating_histogram(self):
+        """Map of star value (1-5) to review count."""
+        return {star: getattr(self, f'rating_{star}_count') for star in range(1, 6)}
+    
+    @classmethod
+    def refresh_rating_aggregates(cls, provider_ids):
+        """
+        Recompute stored rating aggregates from reviews.
+        
+        Uses one grouped query over reviews and one bulk update for the given
+        providers, so the stored values are always exact. The provider rows
+        are locked (in id order) before the reviews are read, so concurrent
+        review writes for a provider recompute one after the other and the
+        last one sees every review. rank_score and the owners' match
+        reputation (UserReputation) are recomputed along with them.
+        """
+        from apps.accounts.matching_reputation import sync_user_reputation
+        from apps.reviews.models import ProviderReview
+        
+        provider_ids = set(provider_ids)
+        if not provider_ids:
+            return 0
+        
+        with transaction.atomic():
+            histograms = {provider_id: [0] * 6 for provider_id in provider_ids}
+            flags = {
+                provider_id: (is_verified, is_featured)
+                for provider_id, is_verified, is_featured in cls.objects.select_for_update().filter(
+                    id__in=provider_ids
+                ).order_by('id').values_list('id', 'is_verified', 'is_featured')
+            }
+            rows = ProviderReview.objects.filter(
+                provider_id__in=provider_ids
+            ).values('provider_id', 'rating').annotate(num=Count('id')).order_by()
+            for row in rows:
+                if 1 <= row['rating'] <= 5:
+                    histograms[row['provider_id']][row['rating']] += row['num']
+            
+            providers = []
+            for provider_id, histogram in histograms.items():
+                provider = cls(id=provider_id)
+                total = sum(histogram)
+                provider.rating_count = total
+                provider.rating_avg = (
+                    sum(star * histogram[star] for star in range(1, 6)) / total if total else 0
+                )
+                for star in range(1, 6):
+                    setattr(provider, f'rating_{star}_count', histogram[star])
+                provider.is_verified, provider.is_featured = flags.get(provider_id, (False, False))
+                provider.rank_score = provider.compute_rank_score()
+                providers.append(provider)
+            
+            cls.objects.bulk_update(providers, cls.RATING_COUNT_FIELDS)
+            # bulk_update skips the signals that keep it in sync
+            sync_user_reputation(
+                cls.objects.filter(id__in=provider_ids).values_list('user_id', flat=True)
+            )
+        return len(providers)
     
     @property
     def skills_list(self):
         """Return skills as a list."""
-        return [skill.strip() for skill in self.skills.split(',') if skill.strip()]
+        return [name for name, token in parse_skills(self.skills)]
     
     @property
     def location(self):
@@ -286,6 +500,46 @@ class ServiceProvider(models.Model):
         return self.completion_percentage >= 50
 
 
+class ProviderSkill(models.Model):
+    """
+    One skill from a provider's skills text, normalized and linked to the
+    canonical skill it names (see apps/providers/skills.py).
+    
+    Derived data: rows are rewritten whenever the provider's skills change,
+    so edit ServiceProvider.skills rather than these rows.
+    """
+    
+    provider = models.ForeignKey(
+        ServiceProvider,
+        on_delete=models.CASCADE,
+        related_name='skill_entries'
+    )
+    skill = models.ForeignKey(
+        'accounts.Skill',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='provider_skills',
+        help_text='Canonical skill this entry names, if any'
+    )
+    name = models.CharField(max_length=100, help_text='Skill as the provider wrote it')
+    token = models.CharField(max_length=100, help_text='Lowercased, whitespace-collapsed name')
+    position = models.PositiveSmallIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = 'Provider Skill'
+        verbose_name_plural = 'Provider Skills'
+        ordering = ['provider', 'position']
+        unique_together = ['provider', 'token']
+        indexes = [
+            models.Index(fields=['skill', 'provider'], name='provider_skill_skill_idx'),
+            models.Index(fields=['token', 'provider'], name='provider_skill_token_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} - {self.provider_id}"
+
+
 class FavoriteProvider(models.Model):
     """User's favorite/saved providers."""
     
@@ -437,6 +691,70 @@ class QuoteRequest(models.Model):
         return self.status == 'quoted' and self.quote_amount is not None
 
 
+class UnifiedJobSkill(models.Model):
+    """
+    A canonical skill a job request mentions in its title or description
+    (see apps/providers/skill_mentions.py).
+    
+    Derived data: rows are rewritten whenever the job's text or the skills
+    change, so edit the job rather than these rows.
+    """
+    
+    job = models.ForeignKey(
+        UnifiedJob,
+        on_delete=models.CASCADE,
+        related_name='skill_mentions'
+    )
+    skill = models.ForeignKey(
+        'accounts.Skill',
+        on_delete=models.CASCADE,
+        related_name='job_mentions'
+    )
+    
+    class Meta:
+        verbose_name = 'Job Skill Mention'
+        verbose_name_plural = 'Job Skill Mentions'
+        unique_together = ['job', 'skill']
+        indexes = [
+            models.Index(fields=['skill', 'job'], name='job_skill_skill_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.skill_id} - job {self.job_id}"
+
+
+class QuoteRequestSkill(models.Model):
+    """
+    A canonical skill a quote request mentions in its title or description
+    (see apps/providers/skill_mentions.py).
+    
+    Derived data: rows are rewritten whenever the request's text or the
+    skills change, so edit the quote request rather than these rows.
+    """
+    
+    quote_request = models.ForeignKey(
+        QuoteRequest,
+        on_delete=models.CASCADE,
+        related_name='skill_mentions'
+    )
+    skill = models.ForeignKey(
+        'accounts.Skill',
+        on_delete=models.CASCADE,
+        related_name='quote_request_mentions'
+    )
+    
+    class Meta:
+        verbose_name = 'Quote Request Skill Mention'
+        verbose_name_plural = 'Quote Request Skill Mentions'
+        unique_together = ['quote_request', 'skill']
+        indexes = [
+            models.Index(fields=['skill', 'quote_request'], name='quote_skill_skill_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.skill_id} - quote request {self.quote_request_id}"
+
+
 class BusinessHours(models.Model):
     """Business hours schedule for service providers."""
     
@@ -524,6 +842,14 @@ class ServiceArea(models.Model):
         default=25,
         help_text='Service radius in miles from this location'
     )
+    latitude = models.FloatField(
+        null=True, blank=True, editable=False,
+        help_text='ZIP centroid latitude, set from zip_code on save'
+    )
+    longitude = models.FloatField(
+        null=True, blank=True, editable=False,
+        help_text='ZIP centroid longitude, set from zip_code on save'
+    )
     is_primary = models.BooleanField(
         default=False,
         help_text='Primary service location'
@@ -534,6 +860,9 @@ class ServiceArea(models.Model):
         verbose_name = 'Service Area'
         verbose_name_plural = 'Service Areas'
         ordering = ['-is_primary', 'city', 'state']
+        indexes = [
+            models.Index(fields=['latitude', 'longitude'], name='service_area_lat_lon_idx'),
+        ]
     
     def __str__(self):
         return f"{self.city}, {self.state} {self.zip_code} ({self.radius_miles} miles) - {self.provider.name}"
@@ -545,6 +874,7 @@ class ServiceArea(models.Model):
                 provider=self.provider,
                 is_primary=True
             ).exclude(pk=self.pk).update(is_primary=False)
+        set_coordinates_from_zip(self)
         super().save(*args, **kwargs)
 
 
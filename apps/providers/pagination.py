@@ -0,0 +1,348 @@
+"""
+Keyset (cursor) pagination and cheap result counts for provider listings.
+
+Keyset pages filter on the sort key of the last row seen instead of using
+OFFSET, so every page is one index range scan no matter how deep it is.
+"""
+
+import base64
+import binascii
+import datetime
+import json
+
+from django.conf import settings
+from django.core.paginator import InvalidPage, Page
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from . import result_cache
+
+
+COUNT_MODES = ['exact', 'capped', 'estimate']
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor cannot be decoded or does not fit the ordering."""
+
+
+class CursorEncoder(json.JSONEncoder):
+    """JSON encoder keeping full datetime precision, so cursor keys compare equal."""
+    
+    def default(self, o):
+        if isinstance(o, (datetime.date, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values, reverse=False):
+    """Encode sort key values (and paging direction) as an opaque URL-safe token."""
+    payload = json.dumps({'v': values, 'r': reverse}, cls=CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a token from encode_cursor().
+    
+    Returns:
+        (values, reverse) tuple
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return list(payload['v']), bool(payload.get('r', False))
+    except (binascii.Error, ValueError, TypeError, KeyError, UnicodeDecodeError):
+        raise InvalidCursor('Invalid cursor.')
+
+
+def keyset_ordering(queryset):
+    """
+    The queryset's ordering as field names, ending in a unique `id` tiebreak.
+    
+    Only plain (optionally '-' prefixed) field or annotation names are
+    supported, which is what ProviderSearchService and OrderingFilter produce.
+    """
+    ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+    if not all(isinstance(field, str) for field in ordering):
+        raise ValueError('Keyset pagination needs an ordering of field names.')
+    
+    ordering = ['-id' if field == '-pk' else 'id' if field == 'pk' else field for field in ordering]
+    if 'id' not in ordering and '-id' not in ordering:
+        # Follow the direction of the last key so a composite index can serve it
+        ordering.append('-id' if ordering and ordering[-1].startswith('-') else 'id')
+    else:
+        # Keys after the unique id can never break a tie
+        tiebreak = max(ordering.index(key) for key in ('id', '-id') if key in ordering)
+        ordering = ordering[:tiebreak + 1]
+    return ordering
+
+
+def _reverse_ordering(ordering):
+    return [field[1:] if field.startswith('-') else f'-{field}' for field in ordering]
+
+
+def keyset_filter(ordering, values):
+    """
+    Q selecting rows strictly after `values` in `ordering`.
+    
+    Expands (a, b, c) > (x, y, z) per-key so mixed directions work, plus a
+    redundant bound on the leading key so the planner can use an index range
+    scan.
+    """
+    condition = None
+    for field, value in reversed(list(zip(ordering, values))):
+        name = field.lstrip('-')
+        after = Q(**{f"{name}__{'lt' if field.startswith('-') else 'gt'}": value})
+        condition = after if condition is None else after | (Q(**{name: value}) & condition)
+    
+    leading = ordering[0]
+    bound = Q(**{f"{leading.lstrip('-')}__{'lte' if leading.startswith('-') else 'gte'}": values[0]})
+    return bound & condition
+
+
+class KeysetPage:
+    """One page of keyset results, exposing the attributes templates use on Page."""
+    
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+    
+    def __iter__(self):
+        return iter(self.object_list)
+    
+    def __len__(self):
+        return len(self.object_list)
+    
+    def has_next(self):
+        return self.next_cursor is not None
+    
+    def has_previous(self):
+        return self.previous_cursor is not None
+    
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def paginate_keyset(queryset, cursor=None, page_size=12):
+    """
+    Fetch one page of an ordered queryset after (or before) a cursor.
+    
+    Args:
+        queryset: queryset ordered by field names (see keyset_ordering)
+        cursor: token from a previous page's next_cursor/previous_cursor
+        page_size: rows per page
+    
+    Returns:
+        KeysetPage
+    
+    Raises:
+        InvalidCursor: if the cursor is malformed or from another ordering
+    """
+    ordering = keyset_ordering(queryset)
+    values, reverse = decode_cursor(cursor) if cursor else (None, False)
+    if values is not None and len(values) != len(ordering):
+        raise InvalidCursor('Cursor does not match the current sort order.')
+    
+    page_ordering = _reverse_ordering(ordering) if reverse else ordering
+    page_queryset = queryset.order_by(*page_ordering)
+    if values is not None:
+        page_queryset = page_queryset.filter(keyset_filter(page_ordering, values))
+    
+    rows = list(page_queryset[:page_size + 1])
+    return keyset_page_from_rows(rows, ordering, page_size, reverse, after_cursor=values is not None)
+
+
+def keyset_page_from_rows(rows, ordering, page_size, reverse=False, after_cursor=False):
+    """
+    Build a KeysetPage from up to page_size + 1 fetched rows.
+    
+    Args:
+        rows: rows in page order (reversed when paging backwards)
+        ordering: the listing's keyset_ordering()
+        page_size: rows per page; an extra row means there is more
+        reverse: whether the rows were fetched paging backwards
+        after_cursor: whether the rows follow a cursor (i.e. not the first page)
+    """
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if reverse:
+        rows.reverse()
+    
+    if not rows:
+        return KeysetPage(rows)
+    
+    def key(row):
+        return [getattr(row, field.lstrip('-')) for field in ordering]
+    
+    # Going backwards we came from a later page; going forwards from an earlier one
+    has_next = has_more if not reverse else True
+    has_previous = has_more if reverse else after_cursor
+    return KeysetPage(
+        rows,
+        next_cursor=encode_cursor(key(rows[-1])) if has_next else None,
+        previous_cursor=encode_cursor(key(rows[0]), reverse=True) if has_previous else None,
+    )
+
+
+def cached_first_page(namespace, params, queryset, page_size=12, count_mode='exact', ignore=()):
+    """
+    First keyset page and result count of a listing, through the result cache.
+    
+    Args:
+        namespace: result_cache namespace of the listing
+        params: request parameters the listing was built from
+        queryset: the ordered listing queryset
+        page_size: rows per page
+        count_mode: see count_results()
+        ignore: parameters that do not affect the first page
+    
+    Returns:
+        (KeysetPage, count, is_exact) tuple
+    """
+    ordering = keyset_ordering(queryset)
+    
+    def build():
+        entry = result_cache.collect_ids(queryset.order_by(*ordering), limit=page_size + 1)
+        entry['count'], entry['count_is_exact'] = count_results(queryset, count_mode)
+        return entry
+    
+    entry = result_cache.get_or_build(namespace, params, build, ignore)
+    rows = result_cache.hydrate(entry, result_cache.hydration_queryset(queryset))
+    page = keyset_page_from_rows(rows, ordering, page_size)
+    return page, entry['count'], entry['count_is_exact']
+
+
+def get_count_mode(value=None):
+    """Validate a requested count mode, falling back to PROVIDER_SEARCH_COUNT_MODE."""
+    if value in COUNT_MODES:
+        return value
+    return getattr(settings, 'PROVIDER_SEARCH_COUNT_MODE', 'capped')
+
+
+def count_results(queryset, mode='exact', cap=None):
+    """
+    Count a listing's results.
+    
+    Modes:
+        exact: plain COUNT(*)
+        capped: count at most `cap` rows (COUNT over a LIMITed subquery)
+        estimate: the planner's row estimate when it is above `cap`,
+            otherwise a capped count
+    
+    Returns:
+        (count, is_exact) tuple
+    """
+    if cap is None:
+        cap = getattr(settings, 'PROVIDER_SEARCH_COUNT_CAP', 1000)
+    queryset = queryset.order_by()
+    
+    if mode == 'estimate':
+        plan = json.loads(queryset.explain(format='json'))
+        estimate = int(plan[0]['Plan']['Plan Rows'])
+        if estimate > cap:
+            return estimate, False
+        mode = 'capped'
+    
+    if mode == 'capped':
+        count = queryset[:cap + 1].count()
+        return min(count, cap), count <= cap
+    
+    return queryset.count(), True
+
+
+class ProviderSearchPagination(PageNumberPagination):
+    """
+    Page-number pagination, with a keyset mode for deep or large listings.
+    
+    Passing `?cursor=` (empty for the first page) or `?pagination=cursor`
+    switches to keyset pages, which return `next`/`previous` cursor links and
+    a count computed according to `?count=exact|capped|estimate`.
+    
+    Page-number pages and first keyset pages go through the provider result
+    cache (see result_cache); later keyset pages are cheap index range scans
+    and are always read from the database.
+    """
+    
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    cache_namespace = 'api'
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        self.keyset_page = None
+        self.request = request
+        if self.cursor_query_param not in params and params.get('pagination') != 'cursor':
+            return self._paginate_page_number(queryset, request)
+        
+        page_size = self.get_page_size(request)
+        cursor = params.get(self.cursor_query_param) or None
+        count_mode = get_count_mode(params.get(self.count_query_param))
+        if cursor is None:
+            self.keyset_page, self.count, self.count_is_exact = cached_first_page(
+                self.cache_namespace, params, queryset, page_size, count_mode
+            )
+            return self.keyset_page.object_list
+        
+        try:
+            self.keyset_page = paginate_keyset(queryset, cursor, page_size)
+        except InvalidCursor as exc:
+            raise NotFound(str(exc))
+        
+        self.count, self.count_is_exact = count_results(queryset, count_mode)
+        return self.keyset_page.object_list
+    
+    def _paginate_page_number(self, queryset, request):
+        """PageNumberPagination.paginate_queryset, reading the page IDs and count from the cache."""
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        
+        def build():
+            paginator = self.django_paginator_class(queryset, page_size)
+            page_number = self.get_page_number(request, paginator)
+            try:
+                page = paginator.page(page_number)
+            except InvalidPage as exc:
+                raise NotFound(self.invalid_page_message.format(
+                    page_number=page_number, message=str(exc)
+                ))
+            entry = result_cache.collect_ids(page.object_list)
+            entry['count'], entry['number'] = paginator.count, page.number
+            return entry
+        
+        entry = result_cache.get_or_build(self.cache_namespace, request.query_params, build)
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = entry['count']
+        self.page = Page(
+            result_cache.hydrate(entry, result_cache.hydration_queryset(queryset)),
+            entry['number'],
+            paginator,
+        )
+        
+        if paginator.num_pages > 1 and self.template is not None:
+            # The browsable API should display pagination controls.
+            self.display_page_controls = True
+        
+        return list(self.page)
+    
+    def get_paginated_response(self, data):
+        if self.keyset_page is None:
+            return super().get_paginated_response(data)
+        
+        return Response({
+            'count': self.count,
+            'count_is_exact': self.count_is_exact,
+            'next': self._cursor_link(self.keyset_page.next_cursor),
+            'previous': self._cursor_link(self.keyset_page.previous_cursor),
+            'results': data,
+        })
+    
+    def _cursor_link(self, cursor):
+        if cursor is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
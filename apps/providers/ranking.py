@@ -0,0 +1,48 @@
+"""
+Stored ranking score behind "sort by rating".
+
+A provider's rank_score is a Bayesian-smoothed rating (every provider starts
+with PRIOR_WEIGHT phantom reviews at PRIOR_RATING, so one 5-star review does
+not outrank hundreds of 4.8s) plus small bonuses for review volume,
+verification and featured status.
+"""
+
+import math
+
+
+PRIOR_RATING = 3.5
+PRIOR_WEIGHT = 10
+
+# log10(1 + reviews) * VOLUME_WEIGHT: about +0.35 at 200 reviews
+VOLUME_WEIGHT = 0.15
+VERIFIED_BONUS = 0.1
+FEATURED_BONUS = 0.05
+
+# Fields rank_score is computed from
+RANK_INPUT_FIELDS = ['rating_avg', 'rating_count', 'is_verified', 'is_featured']
+
+
+def compute_rank_score(rating_avg, rating_count, is_verified=False, is_featured=False):
+    """
+    Ranking score for a provider's stored rating aggregates and flags.
+    
+    Args:
+        rating_avg: average review rating (0 when there are no reviews)
+        rating_count: number of reviews
+        is_verified: verified provider
+        is_featured: featured provider
+    
+    Returns:
+        float score (roughly 1-6; higher ranks first)
+    """
+    rating_count = rating_count or 0
+    smoothed = (
+        (PRIOR_RATING * PRIOR_WEIGHT + (rating_avg or 0) * rating_count)
+        / (PRIOR_WEIGHT + rating_count)
+    )
+    score = smoothed + VOLUME_WEIGHT * math.log10(1 + rating_count)
+    if is_verified:
+        score += VERIFIED_BONUS
+    if is_featured:
+        score += FEATURED_BONUS
+    return score
@@ -0,0 +1,231 @@
+"""
+Versioned cache of provider listing results.
+
+Listings cache the ordered provider IDs of a result (with per-row annotations
+such as `distance`) plus its total, keyed on the normalized request
+parameters, and hydrate the rows with a single `id__in` query. Every key
+embeds a global version number that is bumped whenever providers, reviews or
+availability change, so stale entries are never read again and simply expire.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.http import urlencode
+
+from .search import ProviderSearchService
+
+
+VERSION_KEY = 'providers:results:version'
+STATS_KEY = 'providers:results:stats:{namespace}:{outcome}'
+
+NAMESPACES = ['search', 'category', 'api', 'facets']
+
+# Parameters matched case-insensitively, so 'Denver' and 'denver' share an entry
+CASE_INSENSITIVE_PARAMS = {'q', 'search', 'city', 'state', 'skill'}
+
+# Parameters that only page or order a listing; facet counts ignore them
+PAGING_PARAMS = ('cursor', 'page', 'page_size', 'pagination', 'count', 'sort', 'ordering', 'format')
+
+
+def get_cache():
+    return caches[getattr(settings, 'PROVIDER_RESULT_CACHE_ALIAS', 'default')]
+
+
+def is_enabled():
+    return getattr(settings, 'PROVIDER_RESULT_CACHE_TIMEOUT', 0) > 0
+
+
+def get_version():
+    """Current cache generation (starting at 1)."""
+    cache = get_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, timeout=None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def bump_version():
+    """Invalidate every cached result by moving to a new generation."""
+    cache = get_cache()
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        # No version stored yet (or it was evicted): any new value is unseen
+        cache.add(VERSION_KEY, 2, timeout=None)
+        return cache.get(VERSION_KEY, 2)
+
+
+def normalize_params(params, ignore=()):
+    """
+    Canonical, order-independent form of request parameters.
+    
+    Blank values and `ignore`d parameters are dropped, values are stripped and
+    the case-insensitive filters are lowercased.
+    
+    Returns:
+        sorted list of (name, value) pairs
+    """
+    lists = params.lists() if hasattr(params, 'lists') else (
+        (name, value if isinstance(value, (list, tuple)) else [value])
+        for name, value in params.items()
+    )
+    normalized = []
+    for name, values in lists:
+        if name in ignore:
+            continue
+        for value in values:
+            value = str(value).strip()
+            if not value:
+                continue
+            if name in CASE_INSENSITIVE_PARAMS:
+                value = ' '.join(value.lower().split())
+            normalized.append((name, value))
+    return sorted(normalized)
+
+
+def cache_key(namespace, params, ignore=()):
+    """Versioned key for a listing namespace and its request parameters."""
+    digest = hashlib.sha256(urlencode(normalize_params(params, ignore)).encode()).hexdigest()
+    return f'providers:results:{namespace}:v{get_version()}:{digest[:32]}'
+
+
+def record(namespace, outcome):
+    """Count a cache hit or miss for a namespace."""
+    cache = get_cache()
+    key = STATS_KEY.format(namespace=namespace, outcome=outcome)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_stats():
+    """
+    Hit/miss counters since the cache was last cleared.
+    
+    Returns:
+        dict of namespace -> {'hits', 'misses', 'hit_rate'}, plus the
+        current 'version'
+    """
+    cache = get_cache()
+    keys = {
+        (namespace, outcome): STATS_KEY.format(namespace=namespace, outcome=outcome)
+        for namespace in NAMESPACES
+        for outcome in ('hits', 'misses')
+    }
+    values = cache.get_many(list(keys.values()))
+    stats = {'version': get_version()}
+    for namespace in NAMESPACES:
+        hits = values.get(keys[(namespace, 'hits')], 0)
+        misses = values.get(keys[(namespace, 'misses')], 0)
+        stats[namespace] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 3) if hits + misses else None,
+        }
+    return stats
+
+
+def reset_stats():
+    get_cache().delete_many([
+        STATS_KEY.format(namespace=namespace, outcome=outcome)
+        for namespace in NAMESPACES
+        for outcome in ('hits', 'misses')
+    ])
+
+
+def collect_ids(queryset, limit=None):
+    """
+    The ordered IDs of a queryset's rows, with the values of its annotations.
+    
+    Returns:
+        dict with 'ids' and 'annotations' ({name: [value per id]})
+    """
+    names = list(queryset.query.annotation_select)
+    rows = queryset.values_list('id', *names)
+    if limit is not None:
+        rows = rows[:limit]
+    rows = list(rows)
+    return {
+        'ids': [row[0] for row in rows],
+        'annotations': {name: [row[i + 1] for row in rows] for i, name in enumerate(names)},
+    }
+
+
+def hydration_queryset(queryset):
+    """Unfiltered queryset over a listing's model, keeping its select_related()."""
+    manager = queryset.model._default_manager
+    related = queryset.query.select_related
+    if related is True:
+        return manager.select_related()
+    
+    def paths(tree, prefix=''):
+        for name, subtree in tree.items():
+            yield from paths(subtree, f'{prefix}{name}__') if subtree else [f'{prefix}{name}']
+    
+    return manager.select_related(*paths(related)) if related else manager.all()
+
+
+def hydrate(entry, queryset):
+    """
+    Load the rows of a cached entry in one `id__in` query, in cached order.
+    
+    Cached annotation values are set back on the instances. IDs whose rows
+    have since been deleted are skipped.
+    """
+    ids = entry['ids']
+    if not ids:
+        return []
+    
+    objects = queryset.in_bulk(ids)
+    rows = []
+    for i, provider_id in enumerate(ids):
+        obj = objects.get(provider_id)
+        if obj is None:
+            continue
+        for name, values in entry['annotations'].items():
+            setattr(obj, name, values[i])
+        rows.append(obj)
+    return rows
+
+
+def get_or_build(namespace, params, build, ignore=()):
+    """
+    Fetch a listing entry from the cache, building and storing it on a miss.
+    
+    Args:
+        namespace: one of NAMESPACES
+        params: request parameters the listing depends on
+        build: callable returning the entry dict (see collect_ids) to cache
+        ignore: parameters that do not affect the entry
+    
+    Returns:
+        the entry dict
+    """
+    if not is_enabled():
+        return build()
+    
+    cache = get_cache()
+    key = cache_key(namespace, params, ignore)
+    entry = cache.get(key)
+    if entry is not None:
+        record(namespace, 'hits')
+        return entry
+    
+    record(namespace, 'misses')
+    entry = build()
+    cache.set(key, entry, settings.PROVIDER_RESULT_CACHE_TIMEOUT)
+    return entry
+
+
+def cached_facet_counts(params, query_param='q'):
+    """ProviderSearchService.facet_counts() through the cache."""
+    return get_or_build(
+        'facets', params,
+        lambda: ProviderSearchService.facet_counts(params, query_param),
+        ignore=PAGING_PARAMS,
+    )
@@ -0,0 +1,358 @@
+"""
+Provider search: full-text ranking plus the filters and sort orders shared by
+the HTML search page and the providers API.
+"""
+
+import re
+from collections import defaultdict
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import Count, Exists, F, FloatField, OuterRef, Q, Subquery
+from django.db.models.functions import Cast, Coalesce
+from django.utils.text import slugify
+
+from .geo import (
+    DEFAULT_RADIUS_MILES, HaversineDistance, bounding_box_filter, parse_radius,
+    zip_to_coordinates,
+)
+from .models import ProviderSkill, ServiceArea, ServiceCategory, ServiceProvider
+from .skills import normalize_skill
+
+
+SEARCH_CONFIG = 'english'
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+class ProviderSearchService:
+    """Build filtered, ranked provider querysets from request parameters."""
+    
+    SORT_OPTIONS = ['relevance', 'distance', 'rating', 'reviews', 'newest', 'name']
+    
+    # Every ordering ends in a unique key so pages (OFFSET or keyset) are stable;
+    # the stored-column ones match composite indexes on ServiceProvider
+    SORT_ORDERINGS = {
+        'relevance': ['-search_rank', '-is_featured', '-id'],
+        'distance': ['distance', '-rank_score', '-id'],
+        'rating': ['-rank_score', '-id'],
+        'reviews': ['-rating_count', '-is_featured', '-id'],
+        'newest': ['-created_at', '-id'],
+        'name': ['name', 'id'],
+    }
+    
+    # Filter parameter -> ServiceProvider column for the facetable filters
+    FACET_FIELDS = {
+        'category': 'category_id',
+        'pricing': 'pricing_range',
+        'verified': 'is_verified',
+        'accepts_credits': 'accepts_credit_jobs',
+        'accepts_barter': 'accepts_barter',
+        'state': 'state',
+    }
+    BOOLEAN_FACETS = {
+        'verified': 'Verified',
+        'accepts_credits': 'Accepts credit jobs',
+        'accepts_barter': 'Accepts barter',
+    }
+    
+    @staticmethod
+    def build_search_query(query):
+        """
+        Turn free text into a tsquery.
+        
+        Every term must match; the last term is treated as a prefix so
+        results stay useful while the user is still typing.
+        
+        Returns:
+            SearchQuery or None if the text contains no searchable terms
+        """
+        terms = TOKEN_RE.findall(query.lower())
+        if not terms:
+            return None
+        
+        terms[-1] = f"{terms[-1]}:*"
+        return SearchQuery(' & '.join(terms), search_type='raw', config=SEARCH_CONFIG)
+    
+    @staticmethod
+    def apply_search(queryset, query):
+        """Restrict to providers matching the query and annotate `search_rank`."""
+        search_query = ProviderSearchService.build_search_query(query)
+        if search_query is None:
+            return queryset.none()
+        
+        # ts_rank() returns real; cast so keyset cursors round-trip the value exactly
+        return queryset.filter(search_vector=search_query).annotate(
+            search_rank=Cast(SearchRank(F('search_vector'), search_query), FloatField())
+        )
+    
+    @staticmethod
+    def apply_filters(queryset, params):
+        """Apply the category/location/skill/pricing/flag filters from a QueryDict."""
+        queryset = ProviderSearchService.apply_location_filters(queryset, params)
+        queryset = ProviderSearchService.apply_skill_filters(queryset, params)
+        return ProviderSearchService.apply_facet_filters(queryset, params)
+    
+    @staticmethod
+    def apply_skill_filters(queryset, params):
+        """
+        Restrict to providers having every `skill` parameter given.
+        
+        A value matches a provider skill with the same normalized text, or
+        one linked to the canonical skill whose slug it is, through the
+        indexed ProviderSkill rows.
+        """
+        for value in params.getlist('skill'):
+            token = normalize_skill(value)
+            if not token:
+                continue
+            queryset = queryset.filter(Exists(ProviderSkill.objects.filter(
+                Q(token=token) | Q(skill__slug=slugify(value)),
+                provider=OuterRef('pk'),
+            )))
+        return queryset
+    
+    @staticmethod
+    def apply_location_filters(queryset, params):
+        """Apply the city and ZIP/radius filters, which are not faceted."""
+        city = params.get('city', '').strip()
+        if city:
+            queryset = queryset.filter(city__icontains=city)
+        
+        zip_code = params.get('zip', '').strip()
+        if zip_code:
+            queryset = ProviderSearchService.apply_zip(queryset, zip_code, params.get('radius'))
+        
+        return queryset
+    
+    @staticmethod
+    def apply_facet_filters(queryset, params, exclude=None):
+        """
+        Apply the filters listed in FACET_FIELDS.
+        
+        Args:
+            queryset: provider queryset
+            params: QueryDict
+            exclude: facet parameter to leave out (used for per-facet counts)
+        """
+        category = params.get('category', '').strip()
+        if category and exclude != 'category':
+            queryset = queryset.filter(category__slug=category)
+        
+        state = params.get('state', '').strip()
+        if state and exclude != 'state':
+            queryset = queryset.filter(state__icontains=state)
+        
+        pricing = params.get('pricing', '').strip()
+        if pricing and exclude != 'pricing':
+            queryset = queryset.filter(pricing_range=pricing)
+        
+        for param in ProviderSearchService.BOOLEAN_FACETS:
+            if exclude != param and params.get(param, '').strip().lower() == 'true':
+                queryset = queryset.filter(**{ProviderSearchService.FACET_FIELDS[param]: True})
+        
+        return queryset
+    
+    @staticmethod
+    def apply_zip(queryset, zip_code, radius=None):
+        """
+        Filter by ZIP code.
+        
+        With a radius (miles) and a ZIP found in the bundled centroid table
+        this is a radius search (see apply_radius); otherwise it falls back
+        to a ZIP prefix match.
+        """
+        radius_miles = parse_radius(radius)
+        coordinates = zip_to_coordinates(zip_code) if radius_miles else None
+        if coordinates is None:
+            return queryset.filter(zip_code__startswith=zip_code)
+        
+        latitude, longitude = coordinates
+        return ProviderSearchService.apply_radius(queryset, latitude, longitude, radius_miles)
+    
+    @staticmethod
+    def apply_radius(queryset, latitude, longitude, radius_miles=DEFAULT_RADIUS_MILES):
+        """
+        Restrict to providers that serve a point and annotate `distance` (miles).
+        
+        A provider with geocoded service areas matches when one of those areas
+        covers the point (within the area's `radius_miles`) and lies within
+        `radius_miles` of it; a provider without service areas matches on its
+        own location. Candidates are prefiltered with the indexed grid cell /
+        bounding box of the search circle before the exact haversine distance
+        is computed.
+        """
+        box = bounding_box_filter(latitude, longitude, radius_miles)
+        
+        # Service areas covering the point; the nearest one of each provider
+        # gives its distance
+        covering_areas = ServiceArea.objects.filter(**box).annotate(
+            distance=HaversineDistance(latitude, longitude)
+        ).filter(
+            distance__lte=radius_miles
+        ).filter(
+            distance__lte=F('radius_miles')
+        )
+        area_distance = Subquery(
+            covering_areas.filter(provider=OuterRef('pk')).order_by('distance').values('distance')[:1],
+            output_field=FloatField(),
+        )
+        
+        # Providers without service areas match on their own location
+        cell_box = bounding_box_filter(latitude, longitude, radius_miles, use_cells=True)
+        located = ServiceProvider.objects.filter(**cell_box).exclude(
+            pk__in=ServiceArea.objects.filter(latitude__isnull=False).values('provider_id')
+        ).alias(
+            own_distance=HaversineDistance(latitude, longitude)
+        ).filter(
+            own_distance__lte=radius_miles
+        )
+        
+        # One IN over the union of both keeps each side on its own index
+        # (an OR of the two would scan every provider)
+        candidates = located.values('pk').union(covering_areas.values('provider_id'))
+        
+        return queryset.filter(pk__in=candidates).annotate(
+            distance=Coalesce(area_distance, HaversineDistance(latitude, longitude), output_field=FloatField())
+        )
+    
+    @staticmethod
+    def apply_sort(queryset, sort):
+        """
+        Order the queryset by one of SORT_OPTIONS.
+        
+        `relevance` needs the `search_rank` annotation from apply_search() and
+        `distance` the one from apply_radius(); both fall back to rating
+        without it. Unknown sorts leave the queryset's existing ordering in place.
+        """
+        if sort == 'relevance':
+            if 'search_rank' in queryset.query.annotations:
+                return queryset.order_by(*ProviderSearchService.SORT_ORDERINGS['relevance'])
+            sort = 'rating'
+        
+        if sort == 'distance':
+            if 'distance' in queryset.query.annotations:
+                return queryset.order_by(*ProviderSearchService.SORT_ORDERINGS['distance'])
+            sort = 'rating'
+        
+        if sort in ProviderSearchService.SORT_ORDERINGS:
+            queryset = queryset.order_by(*ProviderSearchService.SORT_ORDERINGS[sort])
+        
+        return queryset
+    
+    @staticmethod
+    def default_sort(queryset, fallback='rating'):
+        """Sort to use when none was requested: relevance, then distance, then fallback."""
+        if 'search_rank' in queryset.query.annotations:
+            return 'relevance'
+        if 'distance' in queryset.query.annotations:
+            return 'distance'
+        return fallback
+    
+    @staticmethod
+    def search(params, query_param='q', default_sort='rating'):
+        """
+        Build the provider queryset for a set of request parameters.
+        
+        Args:
+            params: QueryDict (request.GET or request.query_params)
+            query_param: name of the free-text parameter ('q' or 'search')
+            default_sort: sort used when none is given and there is no
+                search query or radius (searches default to relevance,
+                radius searches to distance)
+        """
+        queryset = ServiceProvider.objects.filter(is_active=True).select_related('category')
+        
+        query = params.get(query_param, '').strip()
+        if query:
+            queryset = ProviderSearchService.apply_search(queryset, query)
+        
+        queryset = ProviderSearchService.apply_filters(queryset, params)
+        
+        sort = params.get('sort', '').strip() or ProviderSearchService.default_sort(
+            queryset, default_sort
+        )
+        return ProviderSearchService.apply_sort(queryset, sort)
+    
+    @staticmethod
+    def facet_counts(params, query_param='q'):
+        """
+        Result counts for each value of the facetable filters.
+        
+        Each facet's counts respect every other active filter but not its own
+        (so selecting a category still shows how many results the other
+        categories would have). All facets come from one grouped query over
+        the search/location/skill matches: every group is added to a facet value
+        when it passes the other facets' active filters.
+        
+        Args:
+            params: QueryDict (request.GET or request.query_params)
+            query_param: name of the free-text parameter ('q' or 'search')
+        
+        Returns:
+            dict of facet parameter -> list of {'value', 'label', 'count'};
+            the boolean facets have a single 'true' entry
+        """
+        queryset = ServiceProvider.objects.filter(is_active=True)
+        
+        query = params.get(query_param, '').strip()
+        if query:
+            search_query = ProviderSearchService.build_search_query(query)
+            queryset = queryset.none() if search_query is None else queryset.filter(
+                search_vector=search_query
+            )
+        
+        queryset = ProviderSearchService.apply_location_filters(queryset, params)
+        queryset = ProviderSearchService.apply_skill_filters(queryset, params)
+        fields = ProviderSearchService.FACET_FIELDS
+        groups = queryset.values(*fields.values()).annotate(count=Count('id')).order_by()
+        
+        categories = list(ServiceCategory.objects.filter(is_active=True).values_list(
+            'id', 'slug', 'name'
+        ))
+        category_ids = {slug: category_id for category_id, slug, name in categories}
+        category = params.get('category', '').strip()
+        state = params.get('state', '').strip().lower()
+        pricing = params.get('pricing', '').strip()
+        
+        # Predicate per active facet filter, mirroring apply_facet_filters()
+        active = {}
+        if category:
+            active['category'] = lambda row: row['category_id'] == category_ids.get(category)
+        if state:
+            active['state'] = lambda row: state in (row['state'] or '').lower()
+        if pricing:
+            active['pricing'] = lambda row: row['pricing_range'] == pricing
+        for param in ProviderSearchService.BOOLEAN_FACETS:
+            if params.get(param, '').strip().lower() == 'true':
+                active[param] = lambda row, field=fields[param]: row[field]
+        
+        counts = {param: defaultdict(int) for param in fields}
+        for row in groups:
+            failed = {param for param, predicate in active.items() if not predicate(row)}
+            for param, field in fields.items():
+                if not failed - {param}:
+                    counts[param][row[field]] += row['count']
+        
+        def entries(choices, param):
+            return [
+                {'value': value, 'label': label, 'count': counts[param].get(key, 0)}
+                for key, value, label in choices
+            ]
+        
+        facets = {
+            'category': entries(categories, 'category'),
+            'pricing': entries(
+                [(value, value, label) for value, label in ServiceProvider.PRICING_CHOICES],
+                'pricing'
+            ),
+            'state': [
+                {'value': value, 'label': value, 'count': count}
+                for value, count in sorted(
+                    counts['state'].items(), key=lambda item: (-item[1], item[0])
+                )
+                if value and count
+            ],
+        }
+        for param, label in ProviderSearchService.BOOLEAN_FACETS.items():
+            facets[param] = [{'value': 'true', 'label': label, 'count': counts[param].get(True, 0)}]
+        return facets
@@ -26,14 +26,21 @@ class ServiceProviderListSerializer(serializers.ModelSerializer):
     average_rating = serializers.ReadOnlyField()
     review_count = serializers.ReadOnlyField()
     location = serializers.ReadOnlyField()
+    distance = serializers.SerializerMethodField()
     
     class Meta:
         model = ServiceProvider
         fields = [
             'id', 'name', 'slug', 'tagline', 'category', 'category_name',
-            'city', 'state', 'zip_code', 'location', 'pricing_range',
+            'city', 'state', 'zip_code', 'location', 'latitude', 'longitude',
+            'distance', 'pricing_range',
             'image', 'is_verified', 'average_rating', 'review_count'
         ]
+    
+    def get_distance(self, obj):
+        """Miles from the searched ZIP; only set for radius searches."""
+        distance = getattr(obj, 'distance', None)
+        return round(distance, 1) if distance is not None else None
 
 
 class ServiceProviderDetailSerializer(serializers.ModelSerializer):
@@ -52,6 +59,7 @@ class ServiceProviderDetailSerializer(serializers.ModelSerializer):
             'category', 'skills', 'skills_list',
             'email', 'phone', 'website',
             'address', 'city', 'state', 'zip_code', 'location',
+            'latitude', 'longitude',
             'pricing_range', 'years_experience',
             'image', 'logo', 'is_verified', 'is_featured',
             'average_rating', 'review_count',
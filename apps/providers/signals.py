@@ -0,0 +1,240 @@
+"""
+Signals invalidating cached provider listings (and updating the emergency
+availability index, normalized skills and job skill mentions) when their
+data changes.
+
+Changes that skill analytics cannot see through updated_at (rows deleted or
+moved to another city, listing skill picks, skill changes) queue stale places
+for the next incremental update_skill_analytics run.
+"""
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.accounts.models import CustomUser
+from apps.accounts.modes_models import FreelanceListing, Skill, SkillSwapListing
+
+from . import result_cache
+from .analytics_service import mark_every_place_stale, mark_places_stale
+from .availability import INDEXED_PROVIDER_FIELDS, availability_index
+from .models import BusinessHours, QuoteRequest, ServiceArea, ServiceCategory, ServiceProvider, UnifiedJob
+from .skill_mentions import (
+    bump_version as bump_skill_mentions_version, refresh_skill_mentions,
+    sync_job_skills, sync_quote_request_skills
+)
+from .skills import relink_skill, sync_provider_skills
+
+
+# Job fields skill mentions are found in
+MENTION_TEXT_FIELDS = {'title', 'description'}
+
+# Fields placing a row in skill analytics areas; users place their listings
+ANALYTICS_PLACE_FIELDS = {
+    UnifiedJob: ('service_city', 'service_state'),
+    ServiceProvider: ('city', 'state'),
+    CustomUser: ('city', 'state'),
+}
+
+
+@receiver(post_save, sender=ServiceProvider)
+@receiver(post_delete, sender=ServiceProvider)
+@receiver(post_save, sender=ServiceCategory)
+@receiver(post_delete, sender=ServiceCategory)
+@receiver(post_save, sender=ServiceArea)
+@receiver(post_delete, sender=ServiceArea)
+@receiver(post_save, sender=BusinessHours)
+@receiver(post_delete, sender=BusinessHours)
+def invalidate_provider_results(sender, **kwargs):
+    """Bump the result cache version once the change is committed."""
+    if kwargs.get('raw'):
+        return
+    # After commit, so a concurrent request cannot cache pre-change rows
+    # under the new version
+    transaction.on_commit(result_cache.bump_version)
+
+
+@receiver(pre_save, sender=ServiceProvider)
+def remember_indexed_fields(sender, instance, update_fields=None, **kwargs):
+    """Remember the stored values of the availability index fields, to tell whether a save changes them."""
+    instance._indexed_fields = None
+    if kwargs.get('raw') or not instance.pk:
+        return
+    if update_fields is not None and not set(INDEXED_PROVIDER_FIELDS) & set(update_fields):
+        # None of them is saved: what is stored is what the instance holds
+        instance._indexed_fields = tuple(getattr(instance, field) for field in INDEXED_PROVIDER_FIELDS)
+        return
+    instance._indexed_fields = ServiceProvider.objects.filter(
+        pk=instance.pk
+    ).values_list(*INDEXED_PROVIDER_FIELDS).first()
+
+
+@receiver(post_save, sender=ServiceProvider)
+def update_availability_index(sender, instance, created, **kwargs):
+    """Re-index the provider for emergency mode once a change to its indexed fields is committed."""
+    if kwargs.get('raw'):
+        return
+    previous = getattr(instance, '_indexed_fields', None)
+    if not created and previous is not None:
+        current = tuple(getattr(instance, field) for field in INDEXED_PROVIDER_FIELDS)
+        if current == previous:
+            return
+    provider_id = instance.pk
+    transaction.on_commit(lambda: availability_index.refresh([provider_id]))
+
+
+@receiver(post_delete, sender=ServiceProvider)
+def remove_from_availability_index(sender, instance, **kwargs):
+    """Drop a deleted provider from the emergency mode index once the deletion is committed."""
+    provider_id = instance.pk
+    transaction.on_commit(lambda: availability_index.refresh([provider_id]))
+
+
+@receiver(post_save, sender=ServiceProvider)
+def update_provider_skills(sender, instance, created, update_fields=None, **kwargs):
+    """Re-derive the provider's ProviderSkill rows when its skills text may have changed."""
+    if kwargs.get('raw'):
+        return
+    if created or update_fields is None or 'skills' in update_fields:
+        sync_provider_skills([instance.pk])
+
+
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+def update_skill_links(sender, instance, **kwargs):
+    """Link (or unlink) provider skills named by a created, renamed or deleted skill."""
+    if kwargs.get('raw'):
+        return
+    if relink_skill(instance):
+        transaction.on_commit(result_cache.bump_version)
+
+
+@receiver(post_save, sender=UnifiedJob)
+def update_job_skills(sender, instance, created, update_fields=None, **kwargs):
+    """Re-derive the skills a job request mentions when its text may have changed."""
+    if kwargs.get('raw'):
+        return
+    if created or update_fields is None or MENTION_TEXT_FIELDS & set(update_fields):
+        sync_job_skills([instance.pk])
+
+
+@receiver(post_save, sender=QuoteRequest)
+def update_quote_request_skills(sender, instance, created, update_fields=None, **kwargs):
+    """Re-derive the skills a quote request mentions when its text may have changed."""
+    if kwargs.get('raw'):
+        return
+    if created or update_fields is None or MENTION_TEXT_FIELDS & set(update_fields):
+        sync_quote_request_skills([instance.pk])
+
+
+@receiver(pre_save, sender=Skill)
+def remember_mentioned_skill(sender, instance, **kwargs):
+    """Remember the stored name and active flag, to tell whether mentions change."""
+    if kwargs.get('raw') or not instance.pk:
+        instance._previous_mention_key = None
+        return
+    instance._previous_mention_key = (
+        Skill.objects.filter(pk=instance.pk).values_list('name', 'is_active').first()
+    )
+
+
+@receiver(post_save, sender=Skill)
+def update_skill_mentions(sender, instance, created, **kwargs):
+    """Re-derive the job mentions of a created, renamed or (de)activated skill."""
+    if kwargs.get('raw'):
+        return
+    previous = getattr(instance, '_previous_mention_key', None)
+    if created or previous != (instance.name, instance.is_active):
+        refresh_skill_mentions(instance)
+
+
+@receiver(post_delete, sender=Skill)
+def forget_skill_mentions(sender, instance, **kwargs):
+    """The skill's mention rows are deleted with it; only the matchers need rebuilding."""
+    transaction.on_commit(bump_skill_mentions_version)
+
+
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+def queue_skill_analytics(sender, instance, **kwargs):
+    """A created, renamed, (de)activated or deleted skill changes analytics in every area."""
+    if kwargs.get('raw'):
+        return
+    previous = getattr(instance, '_previous_mention_key', None)
+    if kwargs.get('created') is False and previous == (instance.name, instance.is_active):
+        return
+    mark_every_place_stale()
+
+
+@receiver(pre_save, sender=UnifiedJob)
+@receiver(pre_save, sender=ServiceProvider)
+@receiver(pre_save, sender=CustomUser)
+def remember_analytics_place(sender, instance, update_fields=None, **kwargs):
+    """Remember the stored city and state, to tell whether a save moves the row."""
+    fields = ANALYTICS_PLACE_FIELDS[sender]
+    instance._previous_analytics_place = None
+    if kwargs.get('raw') or not instance.pk:
+        return
+    if update_fields is not None and not set(fields) & set(update_fields):
+        return
+    instance._previous_analytics_place = sender._default_manager.filter(
+        pk=instance.pk
+    ).values_list(*fields).first()
+
+
+@receiver(post_save, sender=UnifiedJob)
+@receiver(post_save, sender=ServiceProvider)
+@receiver(post_save, sender=CustomUser)
+def queue_moved_analytics_place(sender, instance, **kwargs):
+    """
+    Queue the place a row moved away from; its new place shows through
+    updated_at.
+    """
+    if kwargs.get('raw'):
+        return
+    previous = getattr(instance, '_previous_analytics_place', None)
+    current = tuple(getattr(instance, field) for field in ANALYTICS_PLACE_FIELDS[sender])
+    if previous is not None and previous != current:
+        mark_places_stale([previous], listing=sender is CustomUser)
+
+
+@receiver(post_delete, sender=UnifiedJob)
+@receiver(post_delete, sender=ServiceProvider)
+@receiver(post_delete, sender=CustomUser)
+def queue_deleted_analytics_place(sender, instance, **kwargs):
+    """Queue the place of a deleted job, provider or (listing owning) user."""
+    place = tuple(getattr(instance, field) for field in ANALYTICS_PLACE_FIELDS[sender])
+    mark_places_stale([place], listing=sender is CustomUser)
+
+
+@receiver(post_delete, sender=SkillSwapListing)
+@receiver(post_delete, sender=FreelanceListing)
+def queue_deleted_listing_place(sender, instance, **kwargs):
+    """Queue the place of a deleted listing's user (see queue_deleted_analytics_place if the user went too)."""
+    mark_places_stale(
+        CustomUser.objects.filter(pk=instance.user_id).values_list('city', 'state'), listing=True
+    )
+
+
+@receiver(m2m_changed, sender=SkillSwapListing.skills_offered.through)
+@receiver(m2m_changed, sender=SkillSwapListing.skills_wanted.through)
+@receiver(m2m_changed, sender=FreelanceListing.skills.through)
+def queue_listing_skills_place(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """Queue the places of the listings whose picked skills changed (from either side)."""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            mark_places_stale([(instance.user.city, instance.user.state)], listing=True)
+        return
+    
+    # Changed from the Skill side: pk_set holds listing ids, except for a
+    # clear, where the affected listings have to be read before it happens
+    user_field = f'{model._meta.model_name}__user'
+    if action == 'pre_clear':
+        mark_places_stale(
+            sender.objects.filter(skill=instance).values_list(f'{user_field}__city', f'{user_field}__state'),
+            listing=True,
+        )
+    elif action in ('post_add', 'post_remove'):
+        mark_places_stale(
+            model.objects.filter(pk__in=pk_set).values_list('user__city', 'user__state'), listing=True
+        )
@@ -3,6 +3,7 @@ Skill supply and demand analytics models.
 """
 
 from django.db import models
+from django.db.models.functions import Upper
 from django.conf import settings
 from django.utils import timezone
 from django.core.validators import MinValueValidator
@@ -62,6 +63,7 @@ class SkillDemand(models.Model):
     period_start = models.DateTimeField(help_text='Start of analysis period')
     period_end = models.DateTimeField(help_text='End of analysis period')
     calculated_at = models.DateTimeField(auto_now_add=True, help_text='When this record was calculated')
+    is_current = models.BooleanField(default=False, help_text='Latest record of its skill and area')
     
     class Meta:
         verbose_name = 'Skill Demand'
@@ -75,6 +77,14 @@ class SkillDemand(models.Model):
         unique_together = [
             ['skill', 'city', 'state', 'zip_code', 'period_start', 'period_end']
         ]
+        constraints = [
+            # One current record per skill and area; also indexes the live rows
+            models.UniqueConstraint(
+                fields=['skill', 'city', 'state', 'zip_code'],
+                condition=models.Q(is_current=True),
+                name='skill_demand_current_uniq',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.skill.name} - {self.city}, {self.state} (Score: {self.demand_score})"
@@ -154,6 +164,7 @@ class SkillSupply(models.Model):
     period_start = models.DateTimeField(help_text='Start of analysis period')
     period_end = models.DateTimeField(help_text='End of analysis period')
     calculated_at = models.DateTimeField(auto_now_add=True, help_text='When this record was calculated')
+    is_current = models.BooleanField(default=False, help_text='Latest record of its skill and area')
     
     class Meta:
         verbose_name = 'Skill Supply'
@@ -167,6 +178,14 @@ class SkillSupply(models.Model):
         unique_together = [
             ['skill', 'city', 'state', 'zip_code', 'period_start', 'period_end']
         ]
+        constraints = [
+            # One current record per skill and area; also indexes the live rows
+            models.UniqueConstraint(
+                fields=['skill', 'city', 'state', 'zip_code'],
+                condition=models.Q(is_current=True),
+                name='skill_supply_current_uniq',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.skill.name} - {self.city}, {self.state} (Score: {self.supply_score})"
@@ -218,6 +237,7 @@ class SkillMarketOpportunity(models.Model):
     period_start = models.DateTimeField()
     period_end = models.DateTimeField()
     calculated_at = models.DateTimeField(auto_now_add=True)
+    is_current = models.BooleanField(default=False, help_text='Latest record of its skill and area')
     
     class Meta:
         verbose_name = 'Skill Market Opportunity'
@@ -231,6 +251,14 @@ class SkillMarketOpportunity(models.Model):
         unique_together = [
             ['skill', 'city', 'state', 'zip_code', 'period_start', 'period_end']
         ]
+        constraints = [
+            # One current record per skill and area; also indexes the live rows
+            models.UniqueConstraint(
+                fields=['skill', 'city', 'state', 'zip_code'],
+                condition=models.Q(is_current=True),
+                name='skill_opportunity_current_uniq',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.skill.name} - {self.city}, {self.state} ({self.get_market_status_display()})"
@@ -241,3 +269,99 @@ class SkillMarketOpportunity(models.Model):
         if self.supply_score == 0:
             return Decimal('999.99')  # Infinite demand, no supply
         return self.demand_score / self.supply_score
+
+
+class SkillAnalyticsRun(models.Model):
+    """
+    One update_skill_analytics run over every skill and area.
+    
+    The latest finished run's started_at is the watermark of the next
+    incremental run: only areas with data changed since then are recomputed.
+    """
+    
+    started_at = models.DateTimeField(
+        help_text='When the run started reading data (its period end)'
+    )
+    finished_at = models.DateTimeField(null=True, blank=True)
+    days_back = models.IntegerField(help_text='Length of the analysis period in days')
+    incremental = models.BooleanField(default=False)
+    areas = models.IntegerField(default=0, help_text='Areas recomputed')
+    records = models.IntegerField(default=0, help_text='Skill and area pairs updated')
+    
+    class Meta:
+        verbose_name = 'Skill Analytics Run'
+        verbose_name_plural = 'Skill Analytics Runs'
+        ordering = ['-started_at']
+    
+    def __str__(self):
+        kind = 'incremental' if self.incremental else 'full'
+        return f"{kind} run at {self.started_at:%Y-%m-%d %H:%M} ({self.areas} areas)"
+
+
+class SkillAnalyticsStalePlace(models.Model):
+    """
+    A city and state whose skill analytics changed in a way updated_at cannot
+    show: a job, provider or listing deleted or moved away, or a listing's
+    skills edited. Queued by the providers signals for the next incremental
+    update_skill_analytics run.
+    """
+    
+    city = models.CharField(max_length=100, blank=True)
+    state = models.CharField(max_length=50, blank=True)
+    listing = models.BooleanField(
+        default=False,
+        help_text='From a listing, which counts in its city or state (not only both)'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Stale Skill Analytics Place'
+        verbose_name_plural = 'Stale Skill Analytics Places'
+    
+    def __str__(self):
+        return f"{self.city}, {self.state}"
+
+
+class SkillDailySignal(models.Model):
+    """
+    Demand and supply signals of a skill in an area on one day.
+    
+    job_requests_count counts the job requests created that day, so a
+    window's count is the sum of its days. The listing and provider counts
+    are levels, written only on days they changed (NULL otherwise): the
+    level as of a day is the latest one written up to it. See
+    apps/providers/skill_rollup.py.
+    """
+    
+    skill = models.ForeignKey(
+        'accounts.Skill',
+        on_delete=models.CASCADE,
+        related_name='daily_signals',
+    )
+    city = models.CharField(max_length=100)
+    state = models.CharField(max_length=50)
+    zip_code = models.CharField(max_length=20, blank=True)
+    day = models.DateField()
+    
+    # Demand
+    job_requests_count = models.IntegerField(default=0, help_text='Job requests created that day')
+    skill_swap_wants_count = models.IntegerField(null=True, blank=True, help_text='Skill swap wants as of that day')
+    
+    # Supply
+    provider_count = models.IntegerField(null=True, blank=True, help_text='Providers as of that day')
+    skill_swap_offers_count = models.IntegerField(null=True, blank=True, help_text='Skill swap offers as of that day')
+    freelance_listings_count = models.IntegerField(null=True, blank=True, help_text='Freelance listings as of that day')
+    
+    class Meta:
+        verbose_name = 'Daily Skill Signal'
+        verbose_name_plural = 'Daily Skill Signals'
+        indexes = [
+            # Dashboard reads: one area (matched case-insensitively), a range of days
+            models.Index(Upper('city'), Upper('state'), 'zip_code', 'day', name='skill_daily_area_idx'),
+        ]
+        unique_together = [
+            ['skill', 'city', 'state', 'zip_code', 'day']
+        ]
+    
+    def __str__(self):
+        return f"{self.skill.name} - {self.city}, {self.state} on {self.day}"
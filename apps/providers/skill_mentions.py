@@ -0,0 +1,247 @@
+"""
+Skills mentioned in job text.
+
+Demand analytics count a job request (UnifiedJob) or quote request towards a
+skill when the skill's name appears in its title or description. Rather than
+searching every text once per skill, SkillMatcher compiles the active skill
+names into one Aho-Corasick automaton that finds all of them in a single
+pass over the text. Text and names are compared lowercased with whitespace
+collapsed, and a mention must start and end on a word boundary, so 'Go'
+matches "Go developer" but not "good".
+
+The skills each job mentions are stored as UnifiedJobSkill /
+QuoteRequestSkill rows, which analytics (and job feeds or search) join on
+instead of re-scanning text. Rows are kept in sync by the providers signals
+(job and quote request saves, Skill changes), rebuilt by the
+rebuild_job_skills command and built in bulk by the 0019 migration; the sync
+helper takes the model classes so the migration can pass its historical
+models.
+"""
+
+from collections import deque
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from .skills import normalize_skill
+
+
+# Bumped on every skill change so each process rebuilds its matcher
+VERSION_KEY = 'providers:skill_mentions:version'
+
+# Jobs scanned per query when rebuilding mentions
+BATCH_SIZE = 1000
+
+# Process-wide matcher and the version it was built for
+_matcher = (None, None)
+
+
+def normalize_text(text):
+    """Lowercased, whitespace-collapsed text, as skill names are matched."""
+    return ' '.join((text or '').lower().split())
+
+
+def _is_word(char):
+    return char.isalnum() or char == '_'
+
+
+class SkillMatcher:
+    """Aho-Corasick automaton finding every skill name mentioned in a text."""
+    
+    def __init__(self, skills):
+        """
+        Args:
+            skills: iterable of (skill id, name)
+        """
+        # State 0 is the root; each state has its transitions, failure link
+        # and the (length, skill id) of the names ending there
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for skill_id, name in skills:
+            pattern = normalize_skill(name)
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                following = self._goto[state].get(char)
+                if following is None:
+                    following = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[state][char] = following
+                state = following
+            self._output[state].append((len(pattern), skill_id))
+        
+        # Failure links, breadth first: the longest proper suffix of a
+        # state's path that is also a path from the root
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, following in self._goto[state].items():
+                queue.append(following)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[following] = fail
+                self._output[following] = self._output[following] + self._output[fail]
+    
+    def find(self, *texts):
+        """
+        Skills mentioned in any of the texts, on word boundaries.
+        
+        Returns:
+            set of skill ids
+        """
+        found = set()
+        goto, fail, output = self._goto, self._fail, self._output
+        for text in texts:
+            text = normalize_text(text)
+            state = 0
+            for end, char in enumerate(text):
+                while state and char not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(char, 0)
+                for length, skill_id in output[state]:
+                    if skill_id not in found and self._on_boundaries(text, end + 1 - length, end + 1):
+                        found.add(skill_id)
+        return found
+    
+    @staticmethod
+    def _on_boundaries(text, start, stop):
+        """Whether text[start:stop] neither continues nor is continued by a word."""
+        if start > 0 and _is_word(text[start - 1]) and _is_word(text[start]):
+            return False
+        if stop < len(text) and _is_word(text[stop - 1]) and _is_word(text[stop]):
+            return False
+        return True
+
+
+def build_matcher(skill_model):
+    """A SkillMatcher for the active skills."""
+    return SkillMatcher(skill_model.objects.filter(is_active=True).values_list('id', 'name'))
+
+
+def get_matcher():
+    """
+    The process's matcher for the active skills.
+    
+    Rebuilt whenever another process (or this one) changed a skill since it
+    was built; see bump_version.
+    """
+    global _matcher
+    from apps.accounts.modes_models import Skill
+    
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, timeout=None)
+        version = cache.get(VERSION_KEY, 1)
+    matcher, built_for = _matcher
+    if matcher is None or built_for != version:
+        matcher = build_matcher(Skill)
+        _matcher = (matcher, version)
+    return matcher
+
+
+def bump_version():
+    """Make every process rebuild its matcher (call after a skill changes)."""
+    global _matcher
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 2, timeout=None)
+    _matcher = (None, None)
+
+
+def sync_mention_rows(rows, mention_model, owner_field, matcher):
+    """
+    Bring the skill mention rows of some jobs in line with their text.
+    
+    Only differences are written: mentions no longer found are deleted and
+    new ones created.
+    
+    Args:
+        rows: iterable of (job id, title, description)
+        mention_model: UnifiedJobSkill or QuoteRequestSkill model class
+        owner_field: the mention model's job field ('job' or 'quote_request')
+        matcher: SkillMatcher
+    
+    Returns:
+        number of rows created or deleted
+    """
+    owner_id = f'{owner_field}_id'
+    wanted = set()
+    owner_ids = []
+    for job_id, title, description in rows:
+        owner_ids.append(job_id)
+        wanted.update((job_id, skill_id) for skill_id in matcher.find(title, description))
+    if not owner_ids:
+        return 0
+    
+    stale = []
+    existing = mention_model.objects.filter(**{f'{owner_id}__in': owner_ids})
+    for row_id, job_id, skill_id in existing.values_list('id', owner_id, 'skill_id'):
+        if (job_id, skill_id) in wanted:
+            wanted.discard((job_id, skill_id))
+        else:
+            stale.append(row_id)
+    if stale:
+        mention_model.objects.filter(id__in=stale).delete()
+    if wanted:
+        mention_model.objects.bulk_create([
+            mention_model(**{owner_id: job_id, 'skill_id': skill_id})
+            for job_id, skill_id in wanted
+        ])
+    return len(stale) + len(wanted)
+
+
+def sync_job_skills(job_ids):
+    """Re-derive the skill mentions of the given job requests."""
+    from .models import UnifiedJob, UnifiedJobSkill
+    
+    rows = UnifiedJob.objects.filter(id__in=set(job_ids)).values_list('id', 'title', 'description')
+    return sync_mention_rows(rows, UnifiedJobSkill, 'job', get_matcher())
+
+
+def sync_quote_request_skills(quote_request_ids):
+    """Re-derive the skill mentions of the given quote requests."""
+    from .models import QuoteRequest, QuoteRequestSkill
+    
+    rows = QuoteRequest.objects.filter(id__in=set(quote_request_ids)).values_list('id', 'title', 'description')
+    return sync_mention_rows(rows, QuoteRequestSkill, 'quote_request', get_matcher())
+
+
+def refresh_skill_mentions(skill):
+    """
+    Re-derive the mentions a created, renamed, (de)activated or deleted skill affects.
+    
+    Only jobs already linked to the skill, or whose text contains its name,
+    are re-scanned.
+    """
+    from .models import QuoteRequest, QuoteRequestSkill, UnifiedJob, UnifiedJobSkill
+    
+    bump_version()
+    name = normalize_skill(skill.name)
+    for job_model, mention_model, owner_field in (
+        (UnifiedJob, UnifiedJobSkill, 'job'),
+        (QuoteRequest, QuoteRequestSkill, 'quote_request'),
+    ):
+        job_ids = set()
+        if skill.pk:
+            job_ids.update(
+                mention_model.objects.filter(skill_id=skill.pk).values_list(f'{owner_field}_id', flat=True)
+            )
+        if name and skill.is_active:
+            job_ids.update(
+                job_model.objects.filter(
+                    Q(title__icontains=name) | Q(description__icontains=name)
+                ).values_list('id', flat=True)
+            )
+        job_ids = sorted(job_ids)
+        for start in range(0, len(job_ids), BATCH_SIZE):
+            rows = job_model.objects.filter(id__in=job_ids[start:start + BATCH_SIZE]).values_list(
+                'id', 'title', 'description'
+            )
+            sync_mention_rows(rows, mention_model, owner_field, get_matcher())
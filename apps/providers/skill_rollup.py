@@ -0,0 +1,378 @@
+"""
+Daily rollup of skill demand and supply signals.
+
+SkillDemand / SkillSupply records hold one fixed window per run, so any
+other lookback would mean running the whole pipeline again. SkillDailySignal
+keeps the signals per skill, area and day instead, and the dashboard answers
+any lookback (7, 30, 90, 365 days) and its trend from a few index reads:
+
+- job_requests_count is an event count (the job requests created that day),
+  so a window's count is the sum of its days.
+- the wanted, offered, provider and freelance counts are levels (how many
+  there were as of that day). They are only written when they change, so
+  the level as of a day is the latest one written up to it.
+
+Scores follow update_skill_analytics: demand = jobs x 2 + wants, supply =
+providers x 3 + offers + freelance listings x 2, and the trend compares a
+window with the one before it.
+
+update_skill_analytics writes the rollup for the areas it computes
+(write_daily_signals), re-deriving the job buckets of the last ROLLUP_DAYS,
+or on incremental runs only those of the days changed jobs were created on
+(changed_job_days); get_area_signals reads it.
+"""
+
+from collections import namedtuple
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db.models import Q, Sum
+from django.db.models.functions import TruncDate, Upper
+from django.utils import timezone
+
+from apps.accounts.modes_models import Skill
+
+from .analytics_service import EVERY_PLACE, SkillAnalyticsService, count_by_area, in_areas, touched_locations
+from .models import UnifiedJob, UnifiedJobSkill
+from .skill_analytics import SkillDailySignal
+
+
+# Days of job buckets re-derived by each run: the longest lookback and the
+# window before it, for its trend
+ROLLUP_DAYS = 730
+
+# Longest lookback the dashboard offers
+MAX_LOOKBACK_DAYS = 365
+
+# Level counts, as of the day they were written
+LEVEL_FIELDS = ['skill_swap_wants_count', 'provider_count', 'skill_swap_offers_count', 'freelance_listings_count']
+
+# Unique key of the rollup rows
+ROW_KEY_FIELDS = ['skill', 'city', 'state', 'zip_code', 'day']
+
+# A skill's signals in an area over a lookback window
+SkillWindow = namedtuple('SkillWindow', [
+    'skill', 'demand_score', 'supply_score', 'opportunity_score', 'market_status',
+    'previous_demand_score', 'demand_change_percent', 'job_requests_count',
+    'skill_swap_wants_count', 'provider_count', 'skill_swap_offers_count', 'freelance_listings_count',
+])
+
+
+def daily_job_counts(skills, locations, since, until, days=None):
+    """
+    Job requests mentioning each skill per area and creation day.
+    
+    One query, tallied with count_by_area().
+    
+    Args:
+        days: only count jobs created on these days (default: every day)
+    
+    Returns:
+        dict of location -> Counter of (skill id, day) -> count
+    """
+    rows = UnifiedJobSkill.objects.filter(
+        job__created_at__gte=since,
+        job__created_at__lte=until,
+        skill__in=[skill.id for skill in skills],
+    ).filter(
+        in_areas(locations, 'job__service_city', 'job__service_state')
+    )
+    if days is not None:
+        tz = timezone.get_current_timezone()
+        on_days = Q(pk__in=[])
+        for day in days:
+            start = datetime.combine(day, time.min, tzinfo=tz)
+            on_days |= Q(job__created_at__gte=start, job__created_at__lt=start + timedelta(days=1))
+        rows = rows.filter(on_days)
+    rows = rows.annotate(
+        day=TruncDate('job__created_at')
+    ).values_list('job__service_city', 'job__service_state', 'job__service_zip', 'skill_id', 'day')
+    return count_by_area(
+        ((city, state, zip_code, (skill_id, day)) for city, state, zip_code, skill_id, day in rows.iterator(chunk_size=5000)),
+        locations,
+    )
+
+
+def changed_job_days(locations, since, stale_places=()):
+    """
+    The days whose job buckets may have changed since a watermark, by area.
+    
+    A job created or edited since `since` changes the buckets of the day it
+    was created on. Deleted and moved jobs and skill changes cannot be
+    dated: the areas of their stale places are left out, to be re-derived
+    whole. Days that fell out of the last ROLLUP_DAYS need no rewrite, as no
+    lookback reads them.
+    
+    Args:
+        locations: (city, state, zip_code) areas
+        since: watermark; jobs updated from then on are changed
+        stale_places: SkillAnalyticsStalePlace rows
+    
+    Returns:
+        dict of location -> set of days, for the areas that can be
+        re-derived day by day
+    """
+    if any(place.listing and (place.city, place.state) == EVERY_PLACE for place in stale_places):
+        return {}
+    stale = {(place.city.upper(), place.state.upper()) for place in stale_places if not place.listing}
+    whole = set(touched_locations(locations, stale, set()))
+    rows = UnifiedJob.objects.filter(
+        updated_at__gte=since
+    ).filter(
+        in_areas(locations, 'service_city', 'service_state')
+    ).annotate(
+        day=TruncDate('created_at')
+    ).values_list('service_city', 'service_state', 'service_zip', 'day').distinct()
+    by_area = count_by_area(rows, locations)
+    return {location: set(by_area.get(location, ())) for location in locations if location not in whole}
+
+
+def write_daily_signals(skills, locations, demand_counts, supply_counts, period_end, batch_size=1000,
+                        job_days=None):
+    """
+    Bring the rollup of some skills and areas up to date.
+    
+    Job buckets of the last ROLLUP_DAYS (or of job_days) are re-derived and
+    only differences written; levels are written for the day of period_end
+    where they differ from the latest ones stored.
+    
+    Args:
+        skills: Skill objects
+        locations: (city, state, zip_code) areas
+        demand_counts, supply_counts: SkillAnalyticsService.demand_signal_counts /
+            supply_signal_counts results for the same skills and areas
+        period_end: datetime the counts were taken at
+        batch_size: rows per bulk upsert
+        job_days: changed_job_days() result; the areas in it only re-derive
+            those days, the others every day
+    
+    Returns:
+        number of rows written or deleted
+    """
+    today = timezone.localdate(period_end)
+    since = today - timedelta(days=ROLLUP_DAYS)
+    skill_ids = [skill.id for skill in skills]
+    job_days = {
+        location: {day for day in days if since <= day <= today}
+        for location, days in (job_days or {}).items()
+    }
+    whole = [location for location in locations if location not in job_days]
+    by_day = [location for location in locations if job_days.get(location)]
+    
+    # Job buckets: re-derived, compared with the stored ones
+    since_start = datetime.combine(since, time.min, tzinfo=timezone.get_current_timezone())
+    jobs = {}
+    by_area = {}
+    if whole:
+        by_area.update(daily_job_counts(skills, whole, since_start, period_end))
+    if by_day:
+        days = set().union(*(job_days[location] for location in by_day))
+        for location, counts in daily_job_counts(skills, by_day, since_start, period_end, days).items():
+            by_area[location] = {key: count for key, count in counts.items() if key[1] in job_days[location]}
+    for location, counts in by_area.items():
+        for (skill_id, day), count in counts.items():
+            jobs[(skill_id, *location, day)] = count
+    
+    stored = SkillDailySignal.objects.filter(skill__in=skill_ids).filter(in_areas(locations, 'city', 'state'))
+    stored_jobs = Q(pk__in=[])
+    if whole:
+        stored_jobs |= in_areas(whole, 'city', 'state') & Q(day__gte=since)
+    if by_day:
+        stored_jobs |= in_areas(by_day, 'city', 'state') & Q(day__in=days)
+    empty = []
+    for row_id, *key, count, provider_count in stored.filter(
+        stored_jobs, job_requests_count__gt=0
+    ).values_list('id', 'skill_id', 'city', 'state', 'zip_code', 'day', 'job_requests_count', 'provider_count'):
+        key = tuple(key)
+        location, day = key[1:4], key[4]
+        if location not in by_area or (location in job_days and day not in job_days[location]):
+            continue
+        wanted = jobs.get(key, 0)
+        if wanted == count:
+            jobs.pop(key, None)
+        elif wanted == 0 and provider_count is None:
+            # Nothing left on the row
+            empty.append(row_id)
+            jobs.pop(key, None)
+        else:
+            jobs[key] = wanted
+    
+    # Levels: written where they differ from the latest stored
+    latest = {
+        row[:4]: row[4:]
+        for row in stored.filter(
+            provider_count__isnull=False
+        ).order_by(
+            'skill_id', 'city', 'state', 'zip_code', '-day'
+        ).distinct(
+            'skill_id', 'city', 'state', 'zip_code'
+        ).values_list('skill_id', 'city', 'state', 'zip_code', *LEVEL_FIELDS).iterator(chunk_size=5000)
+    }
+    levels = {}
+    for location in locations:
+        for skill_id in skill_ids:
+            current = (
+                demand_counts['skill_swap_wants_count'][location].get(skill_id, 0),
+                supply_counts['provider_count'][location].get(skill_id, 0),
+                supply_counts['skill_swap_offers_count'][location].get(skill_id, 0),
+                supply_counts['freelance_listings_count'][location].get(skill_id, 0),
+            )
+            previous = latest.get((skill_id, *location))
+            if previous == current or (previous is None and not any(current)):
+                continue
+            levels[(skill_id, *location, today)] = current
+    
+    if empty:
+        SkillDailySignal.objects.filter(id__in=empty).delete()
+    _upsert(
+        [SkillDailySignal(**_key_fields(key), job_requests_count=count) for key, count in jobs.items()],
+        ['job_requests_count'],
+        batch_size,
+    )
+    _upsert(
+        [SkillDailySignal(**_key_fields(key), **dict(zip(LEVEL_FIELDS, values))) for key, values in levels.items()],
+        LEVEL_FIELDS,
+        batch_size,
+    )
+    return len(empty) + len(jobs) + len(levels)
+
+
+def _key_fields(key):
+    skill_id, city, state, zip_code, day = key
+    return {'skill_id': skill_id, 'city': city, 'state': state, 'zip_code': zip_code, 'day': day}
+
+
+def _upsert(rows, update_fields, batch_size):
+    if rows:
+        SkillDailySignal.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=ROW_KEY_FIELDS,
+            update_fields=update_fields,
+            batch_size=batch_size,
+        )
+
+
+def find_areas(city, state, zip_code=None):
+    """
+    The rollup areas making up a city, state and optional ZIP code.
+    
+    City and state match case-insensitively. With a ZIP code, the area
+    whose ZIP starts with its first five characters; without one, the whole
+    city (the area with no ZIP) if there is one, else one area per ZIP
+    prefix of the city, whose signals add up to the city's.
+    
+    Returns:
+        list of (city, state, zip_code) as stored
+    """
+    areas = SkillDailySignal.objects.alias(
+        upper_city=Upper('city'), upper_state=Upper('state')
+    ).filter(upper_city=(city or '').upper(), upper_state=(state or '').upper())
+    if zip_code:
+        area = areas.filter(
+            zip_code__startswith=zip_code[:5]
+        ).order_by(Upper('city'), Upper('state'), 'zip_code').values_list('city', 'state', 'zip_code').first()
+        return [area] if area else []
+    
+    by_prefix = {}
+    for area in areas.order_by('zip_code', 'city', 'state').values_list('city', 'state', 'zip_code').distinct():
+        if not area[2]:
+            return [area]
+        # Spellings of one area count the same signals
+        by_prefix.setdefault(area[2][:5], area)
+    return list(by_prefix.values())
+
+
+def _latest_levels(rows, day):
+    """Level counts of each skill as of a day, added up over the areas (skill id -> tuple)."""
+    levels = {}
+    for skill_id, *counts in rows.filter(
+        provider_count__isnull=False, day__lte=day
+    ).order_by(
+        'skill_id', 'city', 'state', 'zip_code', '-day'
+    ).distinct(
+        'skill_id', 'city', 'state', 'zip_code'
+    ).values_list('skill_id', *LEVEL_FIELDS):
+        total = levels.get(skill_id, (0,) * len(LEVEL_FIELDS))
+        levels[skill_id] = tuple(map(sum, zip(total, counts)))
+    return levels
+
+
+def get_area_signals(city, state, zip_code=None, days_back=30, today=None):
+    """
+    Every active skill's signals in an area over the last days_back days.
+    
+    Without a ZIP code this is the city-level view, added up over the
+    city's areas (see find_areas). Five queries whatever the lookback: the
+    areas, the job sums of the window and the one before it, the levels as
+    of the end of each, and the skills.
+    
+    Args:
+        days_back: window length in days, ending today (inclusive)
+        today: date the window ends on (default: today)
+    
+    Returns:
+        list of SkillWindow; previous_demand_score and demand_change_percent
+        are None when the rollup has no level snapshot of the area before the
+        window and the skill has levels (job buckets always reach back)
+    """
+    areas = find_areas(city, state, zip_code)
+    if not areas:
+        return []
+    today = today or timezone.localdate()
+    start = today - timedelta(days=days_back - 1)
+    previous_start = start - timedelta(days=days_back)
+    
+    # The areas share the (upper-cased) city and state the index leads with
+    stored_areas = Q()
+    for area_city, area_state, area_zip in areas:
+        stored_areas |= Q(city=area_city, state=area_state, zip_code=area_zip)
+    rows = SkillDailySignal.objects.alias(
+        upper_city=Upper('city'), upper_state=Upper('state')
+    ).filter(
+        upper_city=areas[0][0].upper(), upper_state=areas[0][1].upper(),
+        zip_code__in={area_zip for _, _, area_zip in areas},
+    ).filter(stored_areas)
+    jobs = {
+        skill_id: (current or 0, previous or 0)
+        for skill_id, current, previous in rows.filter(
+            day__gte=previous_start, day__lte=today
+        ).values('skill_id').annotate(
+            current=Sum('job_requests_count', filter=Q(day__gte=start)),
+            previous=Sum('job_requests_count', filter=Q(day__lt=start)),
+        ).values_list('skill_id', 'current', 'previous')
+    }
+    levels = _latest_levels(rows, today)
+    previous_levels = _latest_levels(rows, start - timedelta(days=1))
+    
+    skills = Skill.objects.filter(id__in=set(jobs) | set(levels), is_active=True).in_bulk()
+    windows = []
+    for skill_id, skill in skills.items():
+        job_count, previous_job_count = jobs.get(skill_id, (0, 0))
+        wants, providers, offers, freelance = levels.get(skill_id, (0, 0, 0, 0))
+        demand_score = Decimal(job_count * 2 + wants)
+        supply_score = Decimal(providers * 3 + offers + freelance * 2)
+        # Levels are only written when they change, so a skill missing from a
+        # level snapshot (or never given a level row) had none at the time;
+        # unknown only before the rollup's first snapshot of the area
+        previous_score = None
+        if previous_levels or skill_id not in levels:
+            previous_wants = previous_levels.get(skill_id, (0,) * len(LEVEL_FIELDS))[0]
+            previous_score = Decimal(previous_job_count * 2 + previous_wants)
+        change_percent = SkillAnalyticsService.change_percent(demand_score, previous_score)
+        opportunity_score, market_status = SkillAnalyticsService.market_opportunity(demand_score, supply_score)
+        windows.append(SkillWindow(
+            skill=skill,
+            demand_score=demand_score,
+            supply_score=supply_score,
+            opportunity_score=opportunity_score,
+            market_status=market_status,
+            previous_demand_score=previous_score,
+            demand_change_percent=change_percent.quantize(Decimal('0.01')) if change_percent is not None else None,
+            job_requests_count=job_count,
+            skill_swap_wants_count=wants,
+            provider_count=providers,
+            skill_swap_offers_count=offers,
+            freelance_listings_count=freelance,
+        ))
+    return windows
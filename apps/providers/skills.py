@@ -0,0 +1,154 @@
+"""
+Normalized provider skills.
+
+ServiceProvider.skills stays the comma-separated text providers edit. Each
+distinct skill in it is also stored as a ProviderSkill row holding the
+normalized token and, when the token names a canonical accounts.Skill (by
+name or slug), a link to that skill. Skill filters and supply counts join on
+these indexed rows instead of scanning the text.
+
+Rows are kept in sync by the providers signals (provider saves and Skill
+changes) and built in bulk by the 0018 migration; the sync helpers take the
+model classes so the migration can pass its historical models.
+"""
+
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils.text import slugify
+
+
+# Matches ProviderSkill.name / token and accounts.Skill.name
+MAX_SKILL_LENGTH = 100
+
+
+def normalize_skill(name):
+    """Lowercased, whitespace-collapsed form used as a skill's token."""
+    return ' '.join((name or '').lower().split())[:MAX_SKILL_LENGTH]
+
+
+def parse_skills(text):
+    """
+    Distinct skills of a comma-separated skills field, in order.
+    
+    Returns:
+        list of (name, token) pairs; name keeps the provider's spelling
+    """
+    skills = []
+    seen = set()
+    for name in (text or '').split(','):
+        name = ' '.join(name.split())[:MAX_SKILL_LENGTH]
+        token = normalize_skill(name)
+        if token and token not in seen:
+            seen.add(token)
+            skills.append((name, token))
+    return skills
+
+
+def resolve_skill_ids(skill_model, tokens):
+    """
+    Canonical skills named by tokens, matched on name (case-insensitive) or slug.
+    
+    Returns:
+        dict of token -> Skill id for the tokens that name a skill
+    """
+    tokens = set(tokens)
+    if not tokens:
+        return {}
+    slugs = {slugify(token): token for token in tokens}
+    rows = skill_model.objects.annotate(lower_name=Lower('name')).filter(
+        Q(lower_name__in=tokens) | Q(slug__in=list(slugs))
+    ).values_list('id', 'lower_name', 'slug')
+    
+    by_name, by_slug = {}, {}
+    for skill_id, lower_name, slug in rows:
+        by_name[lower_name] = skill_id
+        if slug in slugs:
+            by_slug[slugs[slug]] = skill_id
+    # A name match wins over a slug match
+    return {**by_slug, **{token: by_name[token] for token in tokens if token in by_name}}
+
+
+def sync_skill_rows(provider_rows, provider_skill_model, skill_model):
+    """
+    Bring the ProviderSkill rows of some providers in line with their text.
+    
+    Only rows that changed are written: removed skills are deleted, new ones
+    created and renamed, re-linked or re-ordered ones updated.
+    
+    Args:
+        provider_rows: iterable of (provider_id, skills_text)
+        provider_skill_model: ProviderSkill model class
+        skill_model: accounts.Skill model class
+    
+    Returns:
+        number of rows created, updated or deleted
+    """
+    wanted = {provider_id: parse_skills(text) for provider_id, text in provider_rows}
+    if not wanted:
+        return 0
+    skill_ids = resolve_skill_ids(
+        skill_model, {token for skills in wanted.values() for name, token in skills}
+    )
+    
+    existing = {}
+    for row in provider_skill_model.objects.filter(provider_id__in=list(wanted)):
+        existing[(row.provider_id, row.token)] = row
+    
+    to_create, to_update = [], []
+    for provider_id, skills in wanted.items():
+        for position, (name, token) in enumerate(skills):
+            skill_id = skill_ids.get(token)
+            row = existing.pop((provider_id, token), None)
+            if row is None:
+                to_create.append(provider_skill_model(
+                    provider_id=provider_id, skill_id=skill_id,
+                    name=name, token=token, position=position,
+                ))
+            elif (row.name, row.skill_id, row.position) != (name, skill_id, position):
+                row.name, row.skill_id, row.position = name, skill_id, position
+                to_update.append(row)
+    
+    if existing:
+        provider_skill_model.objects.filter(
+            id__in=[row.id for row in existing.values()]
+        ).delete()
+    if to_update:
+        provider_skill_model.objects.bulk_update(to_update, ['name', 'skill', 'position'])
+    if to_create:
+        provider_skill_model.objects.bulk_create(to_create)
+    return len(existing) + len(to_update) + len(to_create)
+
+
+def sync_provider_skills(provider_ids):
+    """Re-derive the ProviderSkill rows of the given providers from their skills text."""
+    from apps.accounts.modes_models import Skill
+    from .models import ProviderSkill, ServiceProvider
+    
+    rows = ServiceProvider.objects.filter(id__in=set(provider_ids)).values_list('id', 'skills')
+    return sync_skill_rows(rows, ProviderSkill, Skill)
+
+
+def relink_skill(skill):
+    """
+    Re-resolve the provider skills a canonical skill may name or used to name.
+    
+    Call after a Skill is created, renamed or deleted. Rows whose token is the
+    skill's name (or its slug with spaces), and rows linked to it, are linked
+    to whichever skill their token now resolves to, if any.
+    """
+    from apps.accounts.modes_models import Skill
+    from .models import ProviderSkill
+    
+    tokens = {normalize_skill(skill.name), normalize_skill(skill.slug.replace('-', ' '))}
+    if skill.pk:
+        tokens.update(ProviderSkill.objects.filter(skill_id=skill.pk).values_list('token', flat=True))
+    tokens.discard('')
+    skill_ids = resolve_skill_ids(Skill, tokens)
+    
+    updated = 0
+    for token in tokens:
+        skill_id = skill_ids.get(token)
+        updated += ProviderSkill.objects.filter(token=token).exclude(
+            skill_id=skill_id
+        ).update(skill_id=skill_id)
+    return updated
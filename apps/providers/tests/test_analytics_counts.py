@@ -0,0 +1,185 @@
+"""
+Parity of the bulk skill analytics with the per-pair update_skill_analytics numbers.
+
+count_by_area promises the counts of the per-area queries (iexact city and
+state, or city-or-state for listings, plus a prefix match on the first five
+characters of the area's ZIP code), and build_analytics_records the scores
+update_skill_analytics derives from them; these tests check both against a
+direct reimplementation of those rules, without the database.
+"""
+
+import random
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+
+from apps.accounts.modes_models import Skill
+from apps.providers.analytics_service import SkillAnalyticsService, count_by_area
+
+
+# Case variants, city-only and state-only places and empty values
+PLACES = [
+    ('Austin', 'TX'), ('austin', 'tx'), ('AUSTIN', 'Tx'), ('Dallas', 'TX'), ('Austin', ''),
+    ('', 'TX'), ('', 'tx'), ('', ''), ('Springfield', 'IL'), ('Springfield', 'MO'),
+    ('springfield', ''), ('Kansas City', 'MO'), ('Kansas City', 'KS'), ('Denver', 'CO'),
+]
+# Full, extended, short and empty ZIP codes
+ZIP_CODES = [
+    '78701', '78702', '78701-1234', '787', '78', '7', '', '75201', '62701', '65801',
+    '64101', '64105', '80202', '8',
+]
+LOCATIONS = [
+    ('Austin', 'TX', ''), ('austin', 'tx', '78701'), ('Austin', 'TX', '78701-1234'),
+    ('Austin', 'TX', '787'), ('Dallas', 'TX', '75'), ('Springfield', 'IL', ''),
+    ('Springfield', 'MO', '65801'), ('Kansas City', 'MO', '641'), ('Kansas City', 'KS', ''),
+    ('Denver', 'CO', '8'), ('Boulder', 'CO', ''),
+]
+SKILL_IDS = [1, 2, 3, 4]
+
+
+def make_rows(count, seed=11):
+    """(city, state, zip_code, skill id) signal rows."""
+    rng = random.Random(seed)
+    return [
+        (*rng.choice(PLACES), rng.choice(ZIP_CODES), rng.choice(SKILL_IDS))
+        for _ in range(count)
+    ]
+
+
+def counts_in_area(rows, location, either_place=False):
+    """skill id -> count of the rows the per-area queries match in one area."""
+    area_city, area_state, area_zip = location
+    counts = {}
+    for city, state, zip_code, skill_id in rows:
+        in_city = city.upper() == area_city.upper()
+        in_state = state.upper() == area_state.upper()
+        if not ((in_city or in_state) if either_place else (in_city and in_state)):
+            continue
+        if area_zip and not zip_code.startswith(area_zip[:5]):
+            continue
+        counts[skill_id] = counts.get(skill_id, 0) + 1
+    return counts
+
+
+class CountByAreaTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.rows = make_rows(5000)
+    
+    def test_counts_match_per_area_rules(self):
+        for either_place in (False, True):
+            counts = count_by_area(self.rows, LOCATIONS, either_place=either_place)
+            self.assertEqual(set(counts), set(LOCATIONS))
+            for location in LOCATIONS:
+                with self.subTest(either_place=either_place, location=location):
+                    self.assertEqual(
+                        {skill_id: count for skill_id, count in counts[location].items() if count},
+                        counts_in_area(self.rows, location, either_place),
+                    )
+    
+    def test_no_rows(self):
+        for either_place in (False, True):
+            with self.subTest(either_place=either_place):
+                counts = count_by_area([], LOCATIONS, either_place=either_place)
+                self.assertEqual({location: dict(counts[location]) for location in LOCATIONS},
+                                 {location: {} for location in LOCATIONS})
+
+
+class BuildAnalyticsRecordsTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.skills = [Skill(id=skill_id, name=f'Skill {skill_id}') for skill_id in SKILL_IDS]
+        rows = {
+            field: make_rows(800, seed)
+            for seed, field in enumerate([
+                'job_requests_count', 'skill_swap_wants_count', 'provider_count',
+                'skill_swap_offers_count', 'freelance_listings_count',
+            ])
+        }
+        listing_fields = {'skill_swap_wants_count', 'skill_swap_offers_count', 'freelance_listings_count'}
+        cls.rows = rows
+        cls.listing_fields = listing_fields
+        cls.demand_counts = {
+            field: count_by_area(rows[field], LOCATIONS, either_place=field in listing_fields)
+            for field in ('job_requests_count', 'skill_swap_wants_count')
+        }
+        cls.supply_counts = {
+            field: count_by_area(rows[field], LOCATIONS, either_place=field in listing_fields)
+            for field in ('provider_count', 'skill_swap_offers_count', 'freelance_listings_count')
+        }
+        # Previous scores: none, zero and positive ones
+        rng = random.Random(5)
+        cls.previous_demand = {}
+        cls.previous_supply = {}
+        for skill_id in SKILL_IDS:
+            for city, state, zip_code in LOCATIONS:
+                for previous in (cls.previous_demand, cls.previous_supply):
+                    score = rng.choice([None, Decimal('0'), Decimal('3'), Decimal('150'), Decimal('999')])
+                    if score is not None:
+                        previous[(skill_id, city, state, zip_code)] = score
+    
+    def expected_counts(self, location, skill_id, fields):
+        return {
+            field: counts_in_area(self.rows[field], location, field in self.listing_fields).get(skill_id, 0)
+            for field in fields
+        }
+    
+    def test_records_match_per_pair_numbers(self):
+        for skill in self.skills:
+            for location in LOCATIONS:
+                with self.subTest(skill=skill.id, location=location):
+                    records, error = SkillAnalyticsService.build_analytics_records(
+                        skill, location, self.demand_counts, self.supply_counts,
+                        self.previous_demand, self.previous_supply, 25, None, None,
+                    )
+                    key = (skill.id, *location)
+                    
+                    demand = self.expected_counts(location, skill.id, self.demand_counts)
+                    demand_score = Decimal(demand['job_requests_count'] * 2 + demand['skill_swap_wants_count'])
+                    supply = self.expected_counts(location, skill.id, self.supply_counts)
+                    supply_score = Decimal(
+                        supply['provider_count'] * 3 + supply['skill_swap_offers_count']
+                        + supply['freelance_listings_count'] * 2
+                    )
+                    previous_demand = self.previous_demand.get(key)
+                    previous_supply = self.previous_supply.get(key)
+                    demand_change = (
+                        (demand_score - previous_demand) / previous_demand * 100 if previous_demand else None
+                    )
+                    supply_change = (
+                        (supply_score - previous_supply) / previous_supply * 100 if previous_supply else None
+                    )
+                    for change, kind in ((demand_change, 'demand'), (supply_change, 'supply')):
+                        if change is not None and abs(change.quantize(Decimal('0.01'))) >= 1000:
+                            self.assertEqual(error, f'{kind} change of {change:.2f}% is out of range')
+                            break
+                    else:
+                        self.assertIsNone(error)
+                    
+                    if not records:
+                        continue
+                    record = records[0]
+                    self.assertEqual(
+                        {field: getattr(record, field) for field in demand}, demand
+                    )
+                    self.assertEqual(record.demand_score, demand_score)
+                    self.assertEqual(record.total_demand_signals, sum(demand.values()))
+                    self.assertEqual(record.previous_demand_score, previous_demand)
+                    self.assertEqual(record.demand_change_percent, demand_change)
+                    self.assertEqual(record.zip_code, location[2])
+                    if len(records) == 1:
+                        continue
+                    record = records[1]
+                    self.assertEqual(
+                        {field: getattr(record, field) for field in supply}, supply
+                    )
+                    self.assertEqual(record.supply_score, supply_score)
+                    self.assertEqual(record.total_supply_signals, sum(supply.values()))
+                    self.assertEqual(record.previous_supply_score, previous_supply)
+                    self.assertEqual(record.supply_change_percent, supply_change)
+                    record = records[2]
+                    self.assertEqual((record.demand_score, record.supply_score), (demand_score, supply_score))
@@ -0,0 +1,108 @@
+"""
+Parity of the vectorized smart match scoring with calculate_match_score().
+
+match_scoring promises bit-for-bit identical scores and the same top-k order
+as scoring and sorting every candidate in Python; these tests check both on
+unsaved providers for every urgency/priority combination of the quiz.
+"""
+
+import random
+
+from django.test import SimpleTestCase
+
+from apps.providers.forms import MatchingQuizForm
+from apps.providers.match_scoring import CandidateFeatures, PRICING_TIERS, score_candidates, top_k
+from apps.providers.models import ServiceProvider
+from apps.providers.views import calculate_match_score
+
+
+def make_providers(count, seed=7):
+    """Unsaved providers with realistic (and tie-heavy) scoring fields."""
+    rng = random.Random(seed)
+    pricing = list(PRICING_TIERS) + ['']
+    providers = []
+    for i in range(count):
+        rated = rng.random() < 0.8
+        providers.append(ServiceProvider(
+            id=i + 1,
+            rating_avg=round(rng.uniform(1, 5), rng.choice([1, 2, 6])) if rated else 0.0,
+            rating_count=rng.choice([0, 1, 4, 5, 7, 8, 10, 14, 15, 40]) if rated else 0,
+            is_verified=rng.random() < 0.4,
+            is_featured=rng.random() < 0.1,
+            years_experience=rng.choice([0, 1, 3, 5, 8, 12, 25]),
+            pricing_range=rng.choice(pricing),
+        ))
+    # The boundaries of every rule
+    for rating_avg in (0.0, 3.0, 4.5, 4.49):
+        for rating_count in (4, 5, 8, 10, 15):
+            providers.append(ServiceProvider(
+                id=len(providers) + 1,
+                rating_avg=rating_avg,
+                rating_count=rating_count,
+                is_verified=rating_count % 2 == 0,
+                is_featured=False,
+                years_experience=rating_count // 2,
+                pricing_range=pricing[rating_count % len(pricing)],
+            ))
+    return providers
+
+
+def features_of(providers):
+    return CandidateFeatures(
+        [provider.id for provider in providers],
+        [provider.rating_avg for provider in providers],
+        [provider.rating_count for provider in providers],
+        [provider.is_verified for provider in providers],
+        [provider.is_featured for provider in providers],
+        [provider.years_experience for provider in providers],
+        [PRICING_TIERS.get(provider.pricing_range, 0) for provider in providers],
+    )
+
+
+def combinations():
+    for urgency, _ in MatchingQuizForm.URGENCY_CHOICES:
+        for priority, _ in MatchingQuizForm.PRIORITY_CHOICES:
+            yield urgency, priority
+
+
+class ScoreCandidatesTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.providers = make_providers(3000)
+        cls.features = features_of(cls.providers)
+    
+    def test_scores_match_calculate_match_score(self):
+        for urgency, priority in combinations():
+            with self.subTest(urgency=urgency, priority=priority):
+                expected = [
+                    calculate_match_score(provider, urgency, None, priority)
+                    for provider in self.providers
+                ]
+                self.assertEqual(score_candidates(self.features, urgency, priority).tolist(), expected)
+    
+    def test_top_k_matches_sorting_every_candidate(self):
+        count = len(self.providers)
+        for urgency, priority in combinations():
+            expected = [
+                calculate_match_score(provider, urgency, None, priority)
+                for provider in self.providers
+            ]
+            ranking = sorted(range(count), key=lambda i: expected[i], reverse=True)
+            scores = score_candidates(self.features, urgency, priority)
+            for k in (1, 5, 50, count, count + 10):
+                with self.subTest(urgency=urgency, priority=priority, k=k):
+                    self.assertEqual(top_k(scores, k).tolist(), ranking[:k])
+    
+    def test_no_candidates(self):
+        features = features_of([])
+        for urgency, priority in combinations():
+            with self.subTest(urgency=urgency, priority=priority):
+                scores = score_candidates(features, urgency, priority)
+                self.assertEqual(scores.tolist(), [])
+                self.assertEqual(top_k(scores, 5).tolist(), [])
+    
+    def test_top_zero(self):
+        scores = score_candidates(self.features, 'emergency', 'quality')
+        self.assertEqual(top_k(scores, 0).tolist(), [])
@@ -0,0 +1,102 @@
+"""
+Trends of the daily skill rollup (get_area_signals).
+
+Levels are only written when they change, so these tests store rollup rows
+directly and check which skills get a previous window score.
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+
+from apps.accounts.modes_models import Skill
+from apps.providers.analytics_service import SkillAnalyticsService
+from apps.providers.skill_analytics import SkillDailySignal
+from apps.providers.skill_rollup import get_area_signals
+
+
+TODAY = date(2026, 6, 30)
+# First day of the 30 day window ending TODAY
+START = TODAY - timedelta(days=29)
+
+
+class AreaSignalTrendTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.plumbing, cls.tiling, cls.welding = (
+            Skill.objects.create(name=name, slug=name.lower()) for name in ('Plumbing', 'Tiling', 'Welding')
+        )
+    
+    def add_jobs(self, skill, day, count, zip_code=''):
+        SkillDailySignal.objects.create(
+            skill=skill, city='Austin', state='TX', zip_code=zip_code, day=day, job_requests_count=count
+        )
+    
+    def add_levels(self, skill, day, wants, providers=0, zip_code=''):
+        SkillDailySignal.objects.update_or_create(
+            skill=skill, city='Austin', state='TX', zip_code=zip_code, day=day,
+            defaults={
+                'skill_swap_wants_count': wants, 'provider_count': providers,
+                'skill_swap_offers_count': 0, 'freelance_listings_count': 0,
+            },
+        )
+    
+    def signals(self, **kwargs):
+        return {window.skill: window for window in get_area_signals('austin', 'tx', today=TODAY, **kwargs)}
+    
+    def test_jobs_only_skill_has_a_trend(self):
+        self.add_jobs(self.plumbing, START - timedelta(days=10), 2)
+        self.add_jobs(self.plumbing, START + timedelta(days=3), 4)
+        self.add_jobs(self.plumbing, TODAY, 1)
+        
+        window = self.signals()[self.plumbing]
+        self.assertEqual(window.job_requests_count, 5)
+        self.assertEqual(window.demand_score, Decimal(10))
+        self.assertEqual(window.previous_demand_score, Decimal(4))
+        self.assertEqual(window.demand_change_percent, Decimal('150.00'))
+        self.assertEqual(
+            [window.skill for window in SkillAnalyticsService.get_trending_skills(
+                'Austin', 'TX', signals=list(self.signals().values())
+            )],
+            [self.plumbing],
+        )
+    
+    def test_jobs_only_skill_new_in_the_window(self):
+        self.add_jobs(self.plumbing, TODAY, 3)
+        
+        window = self.signals()[self.plumbing]
+        self.assertEqual(window.previous_demand_score, Decimal(0))
+        self.assertIsNone(window.demand_change_percent)
+    
+    def test_missing_levels_are_zero_after_a_snapshot(self):
+        # Tiling's levels were snapshotted before the window, welding had none
+        # then and got its first level row inside it
+        self.add_levels(self.tiling, START - timedelta(days=20), wants=3)
+        self.add_jobs(self.welding, START - timedelta(days=5), 1)
+        self.add_levels(self.welding, START + timedelta(days=2), wants=4)
+        
+        signals = self.signals()
+        self.assertEqual(signals[self.tiling].previous_demand_score, Decimal(3))
+        self.assertEqual(signals[self.welding].previous_demand_score, Decimal(2))
+        self.assertEqual(signals[self.welding].demand_score, Decimal(4))
+        self.assertEqual(signals[self.welding].demand_change_percent, Decimal('100.00'))
+    
+    def test_levels_before_the_first_snapshot_are_unknown(self):
+        self.add_jobs(self.welding, START - timedelta(days=5), 1)
+        self.add_levels(self.welding, START + timedelta(days=2), wants=4)
+        
+        window = self.signals()[self.welding]
+        self.assertIsNone(window.previous_demand_score)
+        self.assertIsNone(window.demand_change_percent)
+    
+    def test_city_view_adds_up_zip_areas(self):
+        self.add_jobs(self.plumbing, START - timedelta(days=1), 1, zip_code='78701')
+        self.add_jobs(self.plumbing, START - timedelta(days=1), 1, zip_code='78702')
+        self.add_jobs(self.plumbing, TODAY, 3, zip_code='78702')
+        
+        window = self.signals()[self.plumbing]
+        self.assertEqual(window.previous_demand_score, Decimal(4))
+        self.assertEqual(window.demand_score, Decimal(6))
+        self.assertEqual(self.signals(zip_code='78701')[self.plumbing].demand_change_percent, Decimal('-100.00'))
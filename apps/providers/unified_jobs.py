@@ -208,6 +208,9 @@ class UnifiedJob(models.Model):
             models.Index(fields=['requester', 'status', '-created_at']),
             models.Index(fields=['provider', 'status', '-created_at']),
             models.Index(fields=['payment_type', 'status']),
+            # Watermark scans of incremental skill analytics runs
+            models.Index(fields=['updated_at']),
+            models.Index(fields=['created_at']),
         ]
     
     def __str__(self):
@@ -26,6 +26,7 @@ urlpatterns = [
     path('profile/preview/', views.provider_profile_preview, name='profile_preview'),
     path('profile/status/', views.provider_profile_status, name='profile_status'),
     path('profile/edit/', views.ProviderProfileEditView.as_view(), name='profile_edit'),
+    path('profile/availability/', views.availability_heartbeat, name='availability_heartbeat'),
     
     # Quote requests
     path('quotes/', views.MyQuotesView.as_view(), name='my_quotes'),
@@ -7,9 +7,9 @@ from django.views.generic import ListView, DetailView, CreateView, UpdateView, T
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, Http404
 from django.views.decorators.http import require_POST
-from django.db.models import Q, Avg, Count
+from django.db.models import Q, Count
 from django.utils import timezone
 from django.urls import reverse
 from django.utils.text import slugify
@@ -24,6 +24,14 @@ from .forms import (
     BusinessHoursForm, ServiceAreaForm, ServiceAreaFormSet,
     ProviderMediaForm, ProviderAvailabilityForm
 )
+from .availability import availability_index, record_heartbeat
+from .geo import RADIUS_OPTIONS
+from .match_scoring import CandidateFeatures, score_candidates, top_k
+from . import result_cache
+from .pagination import (
+    InvalidCursor, cached_first_page, count_results, get_count_mode, paginate_keyset,
+)
+from .search import ProviderSearchService
 
 
 class ProviderSearchView(ListView):
@@ -35,88 +43,56 @@ class ProviderSearchView(ListView):
     paginate_by = 12
     
     def get_queryset(self):
-        queryset = ServiceProvider.objects.filter(is_active=True).select_related('category')
+        return ProviderSearchService.search(self.request.GET)
+    
+    def paginate_queryset(self, queryset, page_size):
+        """
+        Keyset pages via ?cursor= instead of OFFSET page numbers.
         
-        # Search query
-        query = self.request.GET.get('q', '').strip()
-        if query:
-            queryset = queryset.filter(
-                Q(name__icontains=query) |
-                Q(description__icontains=query) |
-                Q(skills__icontains=query) |
-                Q(tagline__icontains=query)
+        The first page (IDs and total) comes from the provider result cache.
+        """
+        cursor = self.request.GET.get('cursor') or None
+        self.cached_total = None
+        if cursor is None:
+            page, count, is_exact = cached_first_page(
+                'search', self.request.GET, queryset, page_size,
+                get_count_mode(self.request.GET.get('count')), ignore=('page',)
             )
+            self.cached_total = (count, is_exact)
+            return (None, page, page.object_list, page.has_other_pages())
         
-        # Filter by category
-        category = self.request.GET.get('category', '').strip()
-        if category:
-            queryset = queryset.filter(category__slug=category)
-        
-        # Filter by city
-        city = self.request.GET.get('city', '').strip()
-        if city:
-            queryset = queryset.filter(city__icontains=city)
-        
-        # Filter by state
-        state = self.request.GET.get('state', '').strip()
-        if state:
-            queryset = queryset.filter(state__icontains=state)
-        
-        # Filter by zip code
-        zip_code = self.request.GET.get('zip', '').strip()
-        if zip_code:
-            queryset = queryset.filter(zip_code__startswith=zip_code)
-        
-        # Filter by pricing
-        pricing = self.request.GET.get('pricing', '').strip()
-        if pricing:
-            queryset = queryset.filter(pricing_range=pricing)
-        
-        # Filter verified only
-        verified = self.request.GET.get('verified', '').strip()
-        if verified == 'true':
-            queryset = queryset.filter(is_verified=True)
-        
-        # Filter by job acceptance preferences
-        accepts_credits = self.request.GET.get('accepts_credits', '').strip()
-        if accepts_credits == 'true':
-            queryset = queryset.filter(accepts_credit_jobs=True)
-        
-        accepts_barter = self.request.GET.get('accepts_barter', '').strip()
-        if accepts_barter == 'true':
-            queryset = queryset.filter(accepts_barter=True)
-        
-        # Sorting
-        sort = self.request.GET.get('sort', 'rating')
-        if sort == 'rating':
-            queryset = queryset.annotate(
-                avg_rating=Avg('reviews__rating')
-            ).order_by('-avg_rating', '-is_featured')
-        elif sort == 'reviews':
-            queryset = queryset.annotate(
-                num_reviews=Count('reviews')
-            ).order_by('-num_reviews', '-is_featured')
-        elif sort == 'newest':
-            queryset = queryset.order_by('-created_at')
-        elif sort == 'name':
-            queryset = queryset.order_by('name')
-        
-        return queryset
+        try:
+            page = paginate_keyset(queryset, cursor, page_size)
+        except InvalidCursor:
+            raise Http404('Invalid cursor.')
+        return (None, page, page.object_list, page.has_other_pages())
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        query_params = self.request.GET.copy()
+        query_params.pop('cursor', None)
+        query_params.pop('page', None)
+        context['query_string'] = query_params.urlencode()
         context['categories'] = ServiceCategory.objects.filter(is_active=True)
+        context['facets'] = result_cache.cached_facet_counts(self.request.GET)
         context['search_query'] = self.request.GET.get('q', '')
         context['selected_category'] = self.request.GET.get('category', '')
         context['selected_city'] = self.request.GET.get('city', '')
+        context['selected_skills'] = [skill for skill in self.request.GET.getlist('skill') if skill.strip()]
         context['selected_state'] = self.request.GET.get('state', '')
         context['selected_zip'] = self.request.GET.get('zip', '')
+        context['selected_radius'] = self.request.GET.get('radius', '')
+        context['radius_options'] = RADIUS_OPTIONS
         context['selected_pricing'] = self.request.GET.get('pricing', '')
         context['verified_only'] = self.request.GET.get('verified', '')
         context['accepts_credits'] = self.request.GET.get('accepts_credits', '')
         context['accepts_barter'] = self.request.GET.get('accepts_barter', '')
-        context['sort_by'] = self.request.GET.get('sort', 'rating')
-        context['total_results'] = self.get_queryset().count()
+        context['sort_by'] = self.request.GET.get('sort') or ProviderSearchService.default_sort(
+            self.object_list
+        )
+        context['total_results'], context['total_results_exact'] = self.cached_total or count_results(
+            self.object_list, get_count_mode(self.request.GET.get('count'))
+        )
         return context
 
 
@@ -160,9 +136,10 @@ class ProviderDetailView(DetailView):
         """Calculate rating distribution for charts."""
         distribution = {}
         total = provider.review_count
+        histogram = provider.rating_histogram
         
         for i in range(1, 6):
-            count = provider.reviews.filter(rating=i).count()
+            count = histogram[i]
             percentage = (count / total * 100) if total > 0 else 0
             distribution[i] = {
                 'count': count,
@@ -194,12 +171,19 @@ class CategoryDetailView(DetailView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['providers'] = ServiceProvider.objects.filter(
+        providers = ServiceProvider.objects.filter(
             category=self.object,
             is_active=True
-        ).annotate(
-            avg_rating=Avg('reviews__rating')
-        ).order_by('-is_featured', '-avg_rating')[:12]
+        ).order_by('-rank_score', '-id')
+        
+        def build():
+            entry = result_cache.collect_ids(providers, limit=12)
+            entry['count'] = providers.count()
+            return entry
+        
+        entry = result_cache.get_or_build('category', {'category': self.object.slug}, build)
+        context['providers'] = result_cache.hydrate(entry, ServiceProvider.objects.all())
+        context['total_providers'] = entry['count']
         return context
 
 
@@ -424,18 +408,15 @@ def compare_providers(request):
     providers = ServiceProvider.objects.filter(
         id__in=ids,
         is_active=True
-    ).select_related('category').annotate(
-        avg_rating=Avg('reviews__rating'),
-        review_count_val=Count('reviews')
-    )
+    ).select_related('category')
     
     # Build comparison data
     comparison_data = []
     for provider in providers:
         comparison_data.append({
             'provider': provider,
-            'rating': provider.avg_rating or 0,
-            'reviews': provider.review_count_val or 0,
+            'rating': provider.rating_avg,
+            'reviews': provider.rating_count,
             'skills': provider.skills_list[:5],  # Top 5 skills
         })
     
@@ -455,30 +436,40 @@ def emergency_mode(request):
     # Get filter parameters
     category_slug = request.GET.get('category', '')
     city = request.GET.get('city', '').strip()
+    zip_code = request.GET.get('zip', '').strip()
+    radius = request.GET.get('radius', '').strip()
     
-    # Base queryset - only emergency-ready providers
-    providers = ServiceProvider.objects.filter(
-        is_active=True,
-        accepts_emergency=True
-    ).select_related('category').annotate(
-        avg_rating=Avg('reviews__rating'),
-        review_count_val=Count('reviews')
-    )
-    
-    # Filter by category
+    # Emergency-ready providers for the category and city, already split by
+    # live availability (heartbeat expiry included) and sorted by rating
+    category_id = None
     if category_slug:
-        providers = providers.filter(category__slug=category_slug)
-    
-    # Filter by city
-    if city:
-        providers = providers.filter(city__icontains=city)
-    
-    # Sort: Available now first, then by rating
-    providers = providers.order_by('-is_available_now', '-avg_rating', '-is_verified')
+        category_id = ServiceCategory.objects.filter(
+            slug=category_slug
+        ).values_list('id', flat=True).first()
+    if category_slug and category_id is None:
+        available_ids, soon_ids = [], []
+    else:
+        available_ids, soon_ids = availability_index.lookup(category_id, city)
     
-    # Separate available now vs others
-    available_now = [p for p in providers if p.is_available_now]
-    available_soon = [p for p in providers if not p.is_available_now]
+    # One query hydrates both lists
+    providers = ServiceProvider.objects.filter(
+        id__in=available_ids + soon_ids
+    ).select_related('category')
+    
+    # Filter by ZIP, as a radius search when a radius is given
+    if zip_code:
+        providers = ProviderSearchService.apply_zip(providers, zip_code, radius)
+    
+    if 'distance' in providers.query.annotations:
+        # Nearest first within each list, then by rating
+        available = set(available_ids)
+        providers = list(providers.order_by('distance', '-rating_avg', '-is_verified', 'id'))
+        available_now = [p for p in providers if p.id in available]
+        available_soon = [p for p in providers if p.id not in available]
+    else:
+        providers = {provider.id: provider for provider in providers}
+        available_now = [providers[i] for i in available_ids if i in providers]
+        available_soon = [providers[i] for i in soon_ids if i in providers]
     
     return render(request, 'providers/emergency_mode.html', {
         'categories': categories,
@@ -486,6 +477,9 @@ def emergency_mode(request):
         'available_soon': available_soon,
         'selected_category': category_slug,
         'selected_city': city,
+        'selected_zip': zip_code,
+        'selected_radius': radius,
+        'radius_options': RADIUS_OPTIONS,
         'total_count': len(available_now) + len(available_soon),
     })
 
@@ -499,10 +493,7 @@ def find_matching_providers(category, city, urgency, budget, priority):
     providers = ServiceProvider.objects.filter(
         category=category,
         is_active=True
-    ).select_related('category').annotate(
-        avg_rating=Avg('reviews__rating'),
-        review_count_val=Count('reviews')
-    )
+    ).select_related('category')
     
     # Filter by city (flexible matching)
     city_matches = providers.filter(city__icontains=city)
@@ -520,10 +511,19 @@ def find_matching_providers(category, city, urgency, budget, priority):
     if budget in budget_map:
         providers = providers.filter(pricing_range__in=budget_map[budget])
     
-    # Score each provider
+    # Score every candidate in one vectorized pass, then load and explain
+    # only the winners
+    features = CandidateFeatures.from_queryset(providers)
+    scores = score_candidates(features, urgency, priority)
+    winners = top_k(scores, 5)
+    
+    winner_providers = ServiceProvider.objects.select_related('category').in_bulk(
+        features.ids[winners].tolist()
+    )
     scored_providers = []
-    for provider in providers:
-        score = calculate_match_score(provider, urgency, budget, priority)
+    for index in winners:
+        provider = winner_providers[int(features.ids[index])]
+        score = float(scores[index])
         scored_providers.append({
             'provider': provider,
             'score': score,
@@ -531,25 +531,25 @@ def find_matching_providers(category, city, urgency, budget, priority):
             'match_reasons': get_match_reasons(provider, urgency, budget, priority),
         })
     
-    # Sort by score descending
-    scored_providers.sort(key=lambda x: x['score'], reverse=True)
-    
-    # Return top 5 matches
-    return scored_providers[:5]
+    return scored_providers
 
 
 def calculate_match_score(provider, urgency, budget, priority):
     """
     Calculate a match score (0-10) based on provider attributes and user preferences.
+    
+    Reference implementation for a single provider; find_matching_providers()
+    scores whole categories with match_scoring.score_candidates(), which
+    must stay in sync with these rules.
     """
     score = 5.0  # Base score
     
     # Rating bonus (up to +2)
-    if provider.avg_rating:
-        score += (provider.avg_rating - 3) * 0.5  # 5-star = +1, 4-star = +0.5
+    if provider.rating_avg:
+        score += (provider.rating_avg - 3) * 0.5  # 5-star = +1, 4-star = +0.5
     
     # Review count bonus (up to +1)
-    review_count = provider.review_count_val or 0
+    review_count = provider.rating_count
     if review_count >= 10:
         score += 1
     elif review_count >= 5:
@@ -566,7 +566,7 @@ def calculate_match_score(provider, urgency, budget, priority):
     # Priority-based bonuses
     if priority == 'quality':
         # Prioritize rating and verified status
-        if provider.avg_rating and provider.avg_rating >= 4.5:
+        if provider.rating_avg and provider.rating_avg >= 4.5:
             score += 1
         if provider.is_verified:
             score += 0.5
@@ -604,14 +604,14 @@ def get_match_reasons(provider, urgency, budget, priority):
     reasons = []
     
     # Rating
-    if provider.avg_rating:
-        if provider.avg_rating >= 4.5:
-            reasons.append(f"⭐ Excellent rating ({provider.avg_rating:.1f}/5)")
-        elif provider.avg_rating >= 4.0:
-            reasons.append(f"⭐ Great rating ({provider.avg_rating:.1f}/5)")
+    if provider.rating_avg:
+        if provider.rating_avg >= 4.5:
+            reasons.append(f"⭐ Excellent rating ({provider.rating_avg:.1f}/5)")
+        elif provider.rating_avg >= 4.0:
+            reasons.append(f"⭐ Great rating ({provider.rating_avg:.1f}/5)")
     
     # Reviews
-    review_count = provider.review_count_val or 0
+    review_count = provider.rating_count
     if review_count >= 10:
         reasons.append(f"💬 {review_count} verified reviews")
     elif review_count >= 5:
@@ -635,7 +635,7 @@ def get_match_reasons(provider, urgency, budget, priority):
         reasons.append("✨ Premium service tier")
     
     # Priority match
-    if priority == 'quality' and provider.avg_rating and provider.avg_rating >= 4.5:
+    if priority == 'quality' and provider.rating_avg and provider.rating_avg >= 4.5:
         reasons.append("🎯 Top quality in category")
     elif priority == 'speed' and provider.years_experience and provider.years_experience >= 5:
         reasons.append("⚡ Experienced & efficient")
@@ -924,6 +924,24 @@ def provider_profile_status(request):
     })
 
 
+@require_POST
+@login_required
+def availability_heartbeat(request):
+    """Confirm the provider is available now, restarting their availability window."""
+    provider = get_object_or_404(ServiceProvider, user=request.user)
+    record_heartbeat(provider)
+    
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        until = provider.available_until
+        return JsonResponse({
+            'success': True,
+            'available_until': until.isoformat() if provider.availability_window_minutes else None,
+        })
+    
+    messages.success(request, 'You are marked as available now.')
+    return redirect('providers:profile_status')
+
+
 class ProviderProfileEditView(LoginRequiredMixin, UpdateView):
     """Edit existing provider profile."""
     
@@ -935,11 +953,18 @@ class ProviderProfileEditView(LoginRequiredMixin, UpdateView):
         'pricing_range', 'years_experience',
         'logo', 'image',
         'accepts_emergency', 'emergency_rate_info', 'is_available_now',
+        'availability_window_minutes',
     ]
     
     def get_object(self):
         return get_object_or_404(ServiceProvider, user=self.request.user)
     
+    def form_valid(self, form):
+        # Saving the profile with "Currently Available" ticked confirms it
+        if form.instance.is_available_now:
+            form.instance.availability_heartbeat_at = timezone.now()
+        return super().form_valid(form)
+    
     def get_success_url(self):
         messages.success(self.request, 'Profile updated successfully!')
         return reverse('providers:profile_status')
@@ -972,6 +997,7 @@ class ProviderProfileEditView(LoginRequiredMixin, UpdateView):
                     'accepts_emergency': forms.CheckboxInput(attrs={'class': 'checkbox'}),
                     'emergency_rate_info': forms.TextInput(attrs={'class': 'input'}),
                     'is_available_now': forms.CheckboxInput(attrs={'class': 'checkbox'}),
+                    'availability_window_minutes': forms.NumberInput(attrs={'class': 'input', 'min': 0}),
                 }
         return ProviderEditForm
 
@@ -63,7 +63,7 @@ class ReviewViewSet(viewsets.ModelViewSet):
         """Mark a review as helpful."""
         review = self.get_object()
         review.helpful_count += 1
-        review.save()
+        review.save(update_fields=['helpful_count'])
         
         return Response({
             'success': True,
@@ -9,4 +9,8 @@ class ReviewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.reviews'
     verbose_name = 'Provider Reviews'
+    
+    def ready(self):
+        """Import signals when app is ready."""
+        import apps.reviews.signals  # noqa
 
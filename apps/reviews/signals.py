@@ -0,0 +1,50 @@
+"""
+Signals keeping provider rating aggregates (and cached provider listings) in
+sync with reviews.
+"""
+
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import ProviderReview
+from apps.providers import result_cache
+from apps.providers.availability import availability_index
+from apps.providers.models import ServiceProvider
+
+
+@receiver(pre_save, sender=ProviderReview)
+def remember_previous_provider(sender, instance, **kwargs):
+    """Remember the stored provider so a review moved between providers updates both."""
+    instance._previous_provider_id = None
+    if instance.pk and not kwargs.get('raw'):
+        instance._previous_provider_id = ProviderReview.objects.filter(
+            pk=instance.pk
+        ).values_list('provider_id', flat=True).first()
+
+
+@receiver(post_save, sender=ProviderReview)
+def update_provider_rating_on_save(sender, instance, created, update_fields=None, **kwargs):
+    """Recompute the provider's stored rating after a review is created or edited."""
+    if update_fields is not None and not {'rating', 'provider'} & set(update_fields):
+        # e.g. helpful votes - nothing rating-related changed
+        return
+    
+    provider_ids = {instance.provider_id}
+    previous_provider_id = getattr(instance, '_previous_provider_id', None)
+    if previous_provider_id:
+        provider_ids.add(previous_provider_id)
+    
+    ServiceProvider.refresh_rating_aggregates(provider_ids)
+    transaction.on_commit(result_cache.bump_version)
+    # Emergency mode orders by rating
+    transaction.on_commit(lambda: availability_index.refresh(provider_ids))
+
+
+@receiver(post_delete, sender=ProviderReview)
+def update_provider_rating_on_delete(sender, instance, **kwargs):
+    """Recompute the provider's stored rating after a review is deleted."""
+    ServiceProvider.refresh_rating_aggregates([instance.provider_id])
+    transaction.on_commit(result_cache.bump_version)
+    provider_id = instance.provider_id
+    transaction.on_commit(lambda: availability_index.refresh([provider_id]))
@@ -91,7 +91,7 @@ def mark_helpful(request, review_id):
     
     # Simple increment (in production, track which users marked helpful)
     review.helpful_count += 1
-    review.save()
+    review.save(update_fields=['helpful_count'])
     
     return JsonResponse({
         'success': True,
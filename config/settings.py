@@ -25,6 +25,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third party apps
     'rest_framework',
@@ -84,6 +85,15 @@ DATABASES = {
     }
 }
 
+# Cache (local memory by default; point CACHE_BACKEND/CACHE_LOCATION at a
+# shared backend such as Redis when running several server processes)
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='findapro'),
+    }
+}
+
 # Custom User Model
 AUTH_USER_MODEL = 'accounts.CustomUser'
 
@@ -155,6 +165,37 @@ LOGIN_URL = 'accounts:login'
 LOGIN_REDIRECT_URL = 'core:home'
 LOGOUT_REDIRECT_URL = 'core:home'
 
+# Provider search: how listings count results in cursor mode (exact, capped,
+# estimate) and where capped/estimated counts stop counting exactly
+PROVIDER_SEARCH_COUNT_MODE = config('PROVIDER_SEARCH_COUNT_MODE', default='capped')
+PROVIDER_SEARCH_COUNT_CAP = config('PROVIDER_SEARCH_COUNT_CAP', default=1000, cast=int)
+
+# Provider listing result cache (apps/providers/result_cache.py): seconds to
+# keep a cached result; 0 disables the cache
+PROVIDER_RESULT_CACHE_ALIAS = 'default'
+PROVIDER_RESULT_CACHE_TIMEOUT = config('PROVIDER_RESULT_CACHE_TIMEOUT', default=300, cast=int)
+
+# Emergency mode availability index (apps/providers/availability.py): seconds
+# after which a process rebuilds its in-memory copy even without published
+# changes; the only way changes reach other processes with LocMemCache
+AVAILABILITY_INDEX_MAX_AGE = config('AVAILABILITY_INDEX_MAX_AGE', default=300, cast=int)
+
+# Freelance matching: find collaborators through MinHash/LSH buckets
+# (apps/accounts/matching_lsh.py) instead of the exact skill index; probing
+# fewer bands (1-32) is faster but finds fewer of the best matches
+MATCHING_FREELANCE_LSH = config('MATCHING_FREELANCE_LSH', default=False, cast=bool)
+MATCHING_FREELANCE_LSH_PROBE_BANDS = config('MATCHING_FREELANCE_LSH_PROBE_BANDS', default=32, cast=int)
+
+# Match sweeper (sweep_matches command): pending/viewed suggestions not
+# re-scored for MATCH_EXPIRE_AFTER_DAYS expire, and expired or not-interested
+# matches untouched for MATCH_ARCHIVE_AFTER_DAYS move to the archive tables
+MATCH_EXPIRE_AFTER_DAYS = config('MATCH_EXPIRE_AFTER_DAYS', default=30, cast=int)
+MATCH_ARCHIVE_AFTER_DAYS = config('MATCH_ARCHIVE_AFTER_DAYS', default=90, cast=int)
+
+# Skill analytics history (compact_skill_analytics command): records older
+# than this are deleted; younger history is downsampled to weeks and months
+SKILL_ANALYTICS_RETENTION_DAYS = config('SKILL_ANALYTICS_RETENTION_DAYS', default=730, cast=int)
+
 # OpenAI
 OPENAI_API_KEY = config('OPENAI_API_KEY', default='')
 